@@ -0,0 +1,90 @@
+"""gpu full-text search
+
+Revision ID: 526d63994dbe
+Revises: ea21abe18123
+Create Date: 2026-10-17 06:02:41.118204+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '526d63994dbe'
+down_revision: Union[str, None] = 'ea21abe18123'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS gpu_search USING fts5(
+        name, model, specs,
+        content='gpus', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gpu_search_after_insert AFTER INSERT ON gpus BEGIN
+        INSERT INTO gpu_search(rowid, name, model, specs)
+        VALUES (new.id, new.name, new.model, new.specs);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gpu_search_after_delete AFTER DELETE ON gpus BEGIN
+        INSERT INTO gpu_search(gpu_search, rowid, name, model, specs)
+        VALUES ('delete', old.id, old.name, old.model, old.specs);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gpu_search_after_update AFTER UPDATE OF name, model, specs ON gpus BEGIN
+        INSERT INTO gpu_search(gpu_search, rowid, name, model, specs)
+        VALUES ('delete', old.id, old.name, old.model, old.specs);
+        INSERT INTO gpu_search(rowid, name, model, specs)
+        VALUES (new.id, new.name, new.model, new.specs);
+    END
+    """,
+    # Index the rows that already exist
+    "INSERT INTO gpu_search(gpu_search) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS gpu_search_after_update",
+    "DROP TRIGGER IF EXISTS gpu_search_after_delete",
+    "DROP TRIGGER IF EXISTS gpu_search_after_insert",
+    "DROP TABLE IF EXISTS gpu_search",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS gpu_search_document_trgm_idx
+    ON gpus USING gin ((name || ' ' || model || ' ' || coalesce(specs::text, '')) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS gpu_search_model_trgm_idx
+    ON gpus USING gin (model gin_trgm_ops)
+    """,
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS gpu_search_model_trgm_idx",
+    "DROP INDEX IF EXISTS gpu_search_document_trgm_idx",
+]
+
+
+def _run(statements_by_dialect) -> None:
+    dialect = op.get_context().dialect.name
+    for statement in statements_by_dialect.get(dialect, []):
+        op.execute(sa.text(statement))
+
+
+def upgrade() -> None:
+    _run({"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE})
+
+
+def downgrade() -> None:
+    _run({"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE})
@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import pydantic
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings
@@ -13,6 +13,11 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    AUTH_CACHE_TTL_SECONDS: int = 300  # How long decoded (signature-checked) tokens are reused
+    AUTH_USER_CACHE_TTL_SECONDS: int = 15  # How long user snapshots are reused; a user deactivated or deleted through another process keeps authenticating here for up to this long
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    PASSWORD_HASH_WORKERS: int = 4  # Threads dedicated to bcrypt hashing/verification
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # Waiting bcrypt jobs before new logins get 503
     
     # CORS
     CORS_ORIGINS: List[str] = ["*"]  # In production, specify your frontend URL
@@ -36,9 +41,131 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'orbyte.db')}"
-    
+    DB_ECHO: bool = False  # Log every SQL statement (development only)
+    DB_POOL_SIZE: int = 5  # Persistent connections kept per engine
+    DB_MAX_OVERFLOW: int = 10  # Extra connections allowed above the pool size
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_PRE_PING: bool = True  # Check connections on checkout (server databases)
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DATABASE_READ_URLS: str = ""  # Comma-separated read replica URLs used by read-only routes
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # Pin a client to the primary after it writes (0 disables)
+
+    # SQLite engine profile (applied to every new connection)
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256 MB
+    SQLITE_CACHE_SIZE: int = -64000  # Negative = KiB, i.e. ~64 MB page cache
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_TEMP_STORE: str = "MEMORY"
+
     # JWT
     JWT_ALGORITHM: str = "HS256"
+
+    # Pagination
+    DEFAULT_PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 200  # Hard cap on items per page for list endpoints
+
+    # In-memory GPU marketplace index
+    GPU_INDEX_ENABLED: bool = True  # Serve list_gpus filters from memory once loaded
+    GPU_INDEX_RESYNC_SECONDS: int = 0  # Periodic full reload as a safety net; other processes' changes arrive through the change feed (0 disables)
+    GPU_FEED_POLL_SECONDS: float = 1.0  # How often the gpu_changes feed is read for GPU changes made by other processes
+    GPU_FEED_RETENTION_SECONDS: int = 3600  # Feed rows older than this are pruned
+    GPU_CACHE_MAX_AGE_SECONDS: int = 5  # Cache-Control max-age of GET /api/gpus/ and /api/gpus/{gpu_id}; revalidated by ETag after that
+
+    # GPU detail documents (/api/gpus/{gpu_id}/details)
+    GPU_DETAIL_CACHE_MAX_ENTRIES: int = 4096  # Pre-serialized documents kept in memory (0 disables)
+    GPU_DETAIL_CACHE_TTL_SECONDS: int = 60  # Longest a document is reused; changes made by other processes (workers, other replicas) invalidate it through the change feed within GPU_FEED_POLL_SECONDS
+
+    # Host GPU telemetry (NVML)
+    GPU_TELEMETRY_ENABLED: bool = True  # Sample local GPUs in the background for /api/gpus/system-gpus
+    GPU_TELEMETRY_INTERVAL_SECONDS: float = 2.0  # Time between samples
+    GPU_TELEMETRY_WORKERS: int = 8  # Devices sampled in parallel
+    GPU_TELEMETRY_REFRESH_SECONDS: int = 60  # Re-enumerate devices this often to pick up hot-plugged GPUs (0 disables)
+    GPU_TELEMETRY_NVML_MODULE: str = "pynvml"  # NVML binding to import; point at a fake one to run without GPUs
+
+    # GPU telemetry history (/api/gpus/{gpu_id}/telemetry)
+    GPU_TELEMETRY_HISTORY_ENABLED: bool = True  # Record sampled metrics into rolled-up time series
+    GPU_TELEMETRY_HISTORY_TIERS: str = "1:3600,60:1440,3600:720"  # step_seconds:buckets per rollup tier (1s for an hour, 1m for a day, 1h for 30 days)
+    GPU_TELEMETRY_HISTORY_MAX_SERIES: int = 256  # GPUs whose history is held in memory (~160 KB each); the rest is read back from disk
+    GPU_TELEMETRY_HISTORY_FLUSH_SECONDS: int = 60  # How often changed history is written to disk
+    GPU_TELEMETRY_HISTORY_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "telemetry")
+
+    # Provider heartbeats (POST /api/gpus/heartbeat)
+    HEARTBEAT_FLUSH_SECONDS: float = 5.0  # Coalesced reports are written to the database this often
+    HEARTBEAT_BATCH_MAX_SIZE: int = 1024  # GPU reports accepted per request
+    HEARTBEAT_TIMEOUT_SECONDS: int = 30  # A reporting GPU goes OFFLINE after this long without a heartbeat (0 disables)
+    LIVENESS_TICK_SECONDS: float = 1.0  # Resolution of heartbeat expiry
+
+    # GPU allocation scheduler
+    SCHEDULER_DEFAULT_POLICY: str = "best_fit_vram"  # best_fit_vram, cheapest or least_loaded
+    SCHEDULER_CANDIDATE_POOL: int = 16  # Candidates ranked per placement round
+    SCHEDULER_MAX_CLAIM_ATTEMPTS: int = 8  # Conditional UPDATEs tried before giving up
+
+    # Task queue workers
+    TASK_WORKERS_EMBEDDED: bool = True  # Run a worker pool inside the API process (scale out with `python -m backend.worker`)
+    TASK_WORKER_CONCURRENCY: int = 4  # Tasks of each type a worker process runs at once
+    TASK_TYPE_CONCURRENCY: str = ""  # Per-type overrides, e.g. "model_training=1,text_generation=8"
+    TASK_LEASE_SECONDS: int = 30  # Visibility timeout; a task whose lease lapses is recovered by another worker
+    TASK_POLL_INTERVAL_SECONDS: float = 1.0  # Idle workers look for new tasks this often
+    TASK_MAX_ATTEMPTS: int = 3  # Claims allowed before a repeatedly crashing task is failed
+    TASK_BATCH_MAX_SIZE: int = 10000  # Tasks accepted by one POST /api/tasks/batch
+
+    # Task event stream
+    TASK_EVENT_POLL_SECONDS: float = 0.5  # How soon events committed by other processes reach subscribers
+    TASK_EVENT_RETENTION_SECONDS: int = 86400  # How far back a stream can resume
+    TASK_STREAM_QUEUE_SIZE: int = 1000  # Undelivered events per subscriber before it is disconnected
+    TASK_STREAM_HEARTBEAT_SECONDS: int = 15  # Idle keep-alive interval for SSE streams
+
+    # Streamed task output (text generation tokens)
+    TASK_OUTPUT_FLUSH_SECONDS: float = 0.2  # Chunks are batched to the database (and polled by other processes) this often
+    TASK_OUTPUT_MEMORY_SECONDS: int = 60  # Finished streams stay in memory this long for late readers
+    TASK_OUTPUT_RETENTION_SECONDS: int = 86400  # How long persisted chunks can be replayed
+
+    # Result cache for deterministic tasks
+    RESULT_CACHE_TASK_TYPES: str = ""  # Opt-in task types whose results are reused, e.g. "text_generation,image_generation"
+    RESULT_CACHE_TTL_SECONDS: int = 3600  # How old a reused result may be
+    RESULT_CACHE_MAX_ENTRIES: int = 10000  # In-memory LRU in front of the database lookup
+
+    # Blob store for large task payloads
+    BLOB_STORE_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "blobs")
+    BLOB_SPILL_THRESHOLD_BYTES: int = 64 * 1024  # input_data/output_data larger than this (as JSON) move to the store
+    BLOB_CHUNK_SIZE: int = 256 * 1024  # Read size when a download cannot use sendfile
+    BLOB_ACCEL_REDIRECT_PREFIX: str = ""  # e.g. "/_blobs/" to hand downloads to an nginx internal location over BLOB_STORE_PATH
+
+    # Request logging
+    LOG_REQUESTS: bool = True
+    LOG_SAMPLE_RATE: float = 1.0  # Fraction of requests to log (0.0 - 1.0)
+    LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = {"/api/health": 0.0}  # Per path-prefix overrides
+    LOG_BODY_MAX_BYTES: int = 1024  # Max bytes of request/response body kept per record
+    LOG_REDACT_HEADERS: List[str] = ["authorization", "cookie", "set-cookie"]
+    LOG_REDACT_PARAMS: List[str] = ["token", "access_token", "password", "secret"]  # Query parameters logged as "***"
+    LOG_QUEUE_SIZE: int = 1000  # Pending log records before new ones are dropped
+
+    @property
+    def database_read_urls(self) -> List[str]:
+        return [url.strip() for url in self.DATABASE_READ_URLS.split(",") if url.strip()]
+
+    @property
+    def result_cache_task_types(self) -> List[str]:
+        return [item.strip().lower() for item in self.RESULT_CACHE_TASK_TYPES.split(",") if item.strip()]
+
+    @property
+    def gpu_telemetry_history_tiers(self) -> List[Tuple[int, int]]:
+        tiers = []
+        for item in self.GPU_TELEMETRY_HISTORY_TIERS.split(","):
+            step, _, buckets = item.partition(":")
+            if step.strip() and buckets.strip():
+                tiers.append((int(step), int(buckets)))
+        return sorted(tiers)
+
+    @property
+    def task_type_concurrency(self) -> Dict[str, int]:
+        overrides = {}
+        for item in self.TASK_TYPE_CONCURRENCY.split(","):
+            task_type, _, slots = item.partition("=")
+            if task_type.strip() and slots.strip():
+                overrides[task_type.strip().lower()] = int(slots)
+        return overrides
     
     # Temporarily disable .env file loading
     model_config = {
@@ -52,6 +179,9 @@ settings = Settings(
     SECRET_KEY="temporary-secret-key-for-development",
     ACCESS_TOKEN_EXPIRE_MINUTES=10080,
     CORS_ORIGINS=["*"],
-    DATABASE_URL=f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'orbyte.db')}",
+    DATABASE_URL=os.getenv(
+        "DATABASE_URL",
+        f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'orbyte.db')}"
+    ),
     JWT_ALGORITHM="HS256"
 )
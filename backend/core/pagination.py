@@ -0,0 +1,79 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from .config import settings
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor token"""
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor token, raising 400 if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Apply the hard page size cap"""
+    if limit is None or limit < 1:
+        return settings.DEFAULT_PAGE_SIZE
+    return min(limit, settings.MAX_PAGE_SIZE)
+
+
+def _created_at_bound(db: AsyncSession, created_at: datetime) -> Any:
+    # SQLite stores server-side CURRENT_TIMESTAMP as text without fractional
+    # seconds, so compare against the same text form to keep ties exact
+    if db.bind is not None and db.bind.dialect.name == "sqlite":
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if created_at.microsecond else "%Y-%m-%d %H:%M:%S"
+        return created_at.strftime(fmt)
+    return created_at
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    model,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Run a keyset-paginated query ordered newest first by (created_at, id).
+
+    Returns:
+        The rows of this page and the cursor for the next page (None on the last page).
+    """
+    limit = clamp_page_size(limit)
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        bound = _created_at_bound(db, created_at)
+        query = query.where(or_(
+            model.created_at < bound,
+            and_(model.created_at == bound, model.id < row_id)
+        ))
+
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    rows = result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
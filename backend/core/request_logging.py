@@ -0,0 +1,170 @@
+"""
+Request/response logging middleware.
+
+Implemented as a pure ASGI middleware so request and response bodies are never
+buffered: chunks are forwarded as they arrive and only a capped prefix is kept
+for the log record. Records are pushed onto a bounded asyncio queue and written
+by a background consumer, so a slow log sink never sits on the request path.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+logger = logging.getLogger("orbyte.requests")
+
+# Content types that are streamed to the client and should never be captured
+STREAMING_CONTENT_TYPES = ("text/event-stream", "application/octet-stream")
+
+
+class RequestLoggingMiddleware:
+    """
+    Sampled, non-buffering request/response logger.
+
+    Args:
+        app: The wrapped ASGI application.
+        sample_rate: Default fraction (0.0 - 1.0) of requests to log.
+        route_sample_rates: Per path-prefix sample rates; the longest matching
+            prefix wins (e.g. {"/api/health": 0.0, "/api/tasks": 1.0}).
+        max_body_bytes: Maximum number of body bytes kept per request/response.
+        redact_headers: Header names whose values are replaced with "***".
+        redact_params: Query parameter names whose values are replaced with "***"
+            (e.g. the `token` of EventSource and WebSocket clients).
+        queue_size: Maximum number of pending log records; extra records are dropped.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = 1.0,
+        route_sample_rates: Optional[Dict[str, float]] = None,
+        max_body_bytes: int = 1024,
+        redact_headers: Iterable[str] = ("authorization", "cookie", "set-cookie"),
+        redact_params: Iterable[str] = ("token", "access_token", "password", "secret"),
+        queue_size: int = 1000,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        # Sort longest prefix first so the most specific route wins
+        self.route_sample_rates: List[Tuple[str, float]] = sorted(
+            (route_sample_rates or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+        self.max_body_bytes = max_body_bytes
+        self.redact_headers = {h.lower() for h in redact_headers}
+        self.redact_params = {p.lower() for p in redact_params}
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    def _rate_for(self, path: str) -> float:
+        for prefix, rate in self.route_sample_rates:
+            if path.startswith(prefix):
+                return rate
+        return self.sample_rate
+
+    def _headers(self, raw_headers) -> Dict[str, str]:
+        headers = {}
+        for key, value in raw_headers:
+            name = key.decode("latin-1").lower()
+            headers[name] = "***" if name in self.redact_headers else value.decode("latin-1")
+        return headers
+
+    def _query(self, raw_query: bytes) -> str:
+        fields = []
+        for field in raw_query.decode("latin-1").split("&"):
+            name, sep, _ = field.partition("=")
+            if sep and unquote_plus(name).lower() in self.redact_params:
+                field = f"{name}=***"
+            fields.append(field)
+        return "&".join(fields)
+
+    def _ensure_consumer(self):
+        if self._consumer is None or self._consumer.done():
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def _consume(self):
+        while True:
+            record = await self._queue.get()
+            try:
+                logger.info(
+                    "%s %s -> %s (%.1f ms)",
+                    record["method"], record["path"], record["status"], record["duration_ms"],
+                    extra={"request_log": record},
+                )
+                logger.debug("Request log record: %s", record)
+            except Exception:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def _enqueue(self, record: Dict):
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rate = self._rate_for(scope["path"])
+        if rate <= 0.0 or (rate < 1.0 and random.random() >= rate):
+            await self.app(scope, receive, send)
+            return
+
+        self._ensure_consumer()
+        start = time.perf_counter()
+        max_bytes = self.max_body_bytes
+        request_body = bytearray()
+        response_body = bytearray()
+        request_size = 0
+        response_size = 0
+        response_status = None
+        response_headers: Dict[str, str] = {}
+        capture_response = True
+
+        async def receive_wrapper():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                request_size += len(chunk)
+                if len(request_body) < max_bytes:
+                    request_body.extend(chunk[:max_bytes - len(request_body)])
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_status, response_headers, response_size, capture_response
+            if message["type"] == "http.response.start":
+                response_status = message["status"]
+                response_headers = self._headers(message.get("headers", []))
+                content_type = response_headers.get("content-type", "")
+                capture_response = not content_type.startswith(STREAMING_CONTENT_TYPES)
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                response_size += len(chunk)
+                if capture_response and len(response_body) < max_bytes:
+                    response_body.extend(chunk[:max_bytes - len(response_body)])
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            query = self._query(scope.get("query_string", b""))
+            self._enqueue({
+                "method": scope["method"],
+                "path": scope["path"] + (f"?{query}" if query else ""),
+                "status": response_status or 500,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+                "request_headers": self._headers(scope.get("headers", [])),
+                "request_size": request_size,
+                "request_body": request_body.decode("utf-8", errors="replace"),
+                "response_headers": response_headers,
+                "response_size": response_size,
+                "response_body": response_body.decode("utf-8", errors="replace"),
+            })
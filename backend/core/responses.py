@@ -0,0 +1,158 @@
+import os
+import re
+from typing import BinaryIO, Callable, Mapping, Optional, Tuple
+
+import anyio
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .config import settings
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Resolve a single-range Range header to an inclusive (start, end) byte span.
+
+    Returns None when the header is absent or not a single byte range (the
+    whole object is served), and (size, size) when the range is unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip().replace(" ", ""))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return size, size
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return size, size
+    return start, end
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header names `etag` (weak comparison, as RFC 9110 requires here)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class RangeFileResponse(Response):
+    """
+    Stream an immutable file with ETag, If-None-Match and single-range support.
+
+    The body never passes through Python in full. It goes out as one sendfile
+    when the ASGI server offers the zerocopy extension, is handed to nginx via
+    X-Accel-Redirect when `accel_redirect` is set, and otherwise is read in
+    BLOB_CHUNK_SIZE pieces.
+
+    Args:
+        open_file: Opens the file for binary reading.
+        size: Size of the file in bytes.
+        etag: Strong validator; content-addressed files use their digest.
+        request_headers: Headers of the request, for Range, If-Range and If-None-Match.
+        accel_redirect: Internal nginx location to serve the file from instead.
+    """
+
+    def __init__(
+        self,
+        open_file: Callable[[], BinaryIO],
+        size: int,
+        etag: str,
+        request_headers: Mapping[str, str],
+        media_type: str = "application/octet-stream",
+        filename: Optional[str] = None,
+        accel_redirect: Optional[str] = None
+    ):
+        self.open_file = open_file
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+        self.start, self.end = 0, size - 1
+        self.send_body = True
+
+        etag = f'"{etag}"'
+        headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            # Content never changes under the same validator
+            "cache-control": "private, max-age=31536000, immutable",
+        }
+        if filename:
+            headers["content-disposition"] = f'attachment; filename="{filename}"'
+
+        if accel_redirect:
+            # nginx serves the file (and any Range) itself with sendfile
+            self.status_code = 200
+            self.send_body = False
+            headers["x-accel-redirect"] = accel_redirect
+        elif etag_matches(request_headers.get("if-none-match"), etag):
+            self.status_code = 304
+            self.send_body = False
+        else:
+            if_range = request_headers.get("if-range")
+            byte_range = None
+            if if_range is None or if_range.strip() == etag:
+                byte_range = parse_range(request_headers.get("range"), size)
+            if byte_range == (size, size):
+                self.status_code = 416
+                self.send_body = False
+                headers["content-range"] = f"bytes */{size}"
+                headers["content-length"] = "0"
+            elif byte_range is not None:
+                self.status_code = 206
+                self.start, self.end = byte_range
+                headers["content-range"] = f"bytes {self.start}-{self.end}/{size}"
+                headers["content-length"] = str(self.end - self.start + 1)
+            else:
+                self.status_code = 200
+                headers["content-length"] = str(size)
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        remaining = self.end - self.start + 1
+        if not self.send_body or scope.get("method") == "HEAD" or remaining <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        file = await anyio.to_thread.run_sync(self.open_file)
+        try:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file,
+                    "offset": self.start,
+                    "count": remaining,
+                    "more_body": False,
+                })
+                return
+            await anyio.to_thread.run_sync(file.seek, self.start, os.SEEK_SET)
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(file.read, min(settings.BLOB_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; end the response rather than hang the client
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await anyio.to_thread.run_sync(file.close)
@@ -1,13 +1,25 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..database import SessionLocal, get_db
+from ..database import AsyncSessionLocal, SessionLocal, get_async_db
+from .cache import TTLCache
+from .config import settings
+from .utils import percentile
+
+logger = logging.getLogger(__name__)
 
 # Security configuration
 SECRET_KEY = "your-secret-key-here"  # In production, use environment variable
@@ -23,6 +35,39 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Bounded pool for bcrypt work so hashing never runs on the event loop
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_jobs_in_flight = 0
+
+async def _run_password_job(func, *args):
+    """
+    Run a bcrypt call on the password pool, rejecting work once the pool
+    and its queue are full instead of letting logins pile up
+    """
+    global _password_jobs_in_flight
+    max_in_flight = settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE
+    if _password_jobs_in_flight >= max_in_flight:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    _password_jobs_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs_in_flight -= 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(get_password_hash, password)
+
 def get_user(db: Session, email: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.email == email).first()
 
@@ -34,6 +79,18 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
         return None
     return user
 
+async def get_user_async(db: AsyncSession, email: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    user = await get_user_async(db, email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -44,96 +101,107 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Auth caches: token -> decoded claims, email -> user snapshot
+_claims_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+# Changes made in this process drop snapshots at once; those made elsewhere are seen after the TTL
+_user_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_ENTRIES, ttl=settings.AUTH_USER_CACHE_TTL_SECONDS)
+
+# Recent auth latencies in ms, kept separately for cache hits and misses
+_auth_latencies = {"hit": deque(maxlen=1000), "miss": deque(maxlen=1000)}
+
+USER_SNAPSHOT_FIELDS = ("id", "email", "wallet_address", "is_active", "is_admin", "created_at", "updated_at")
+
+def invalidate_user_cache(email: str) -> None:
+    """
+    Drop the cached snapshot of a user so the next request reloads it
+    """
+    _user_cache.pop(email)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_user_on_change(mapper, connection, target):
+    invalidate_user_cache(target.email)
+    # An email change leaves the snapshot cached under the previous address
+    for old_email in inspect(target).attrs.email.history.deleted or ():
+        invalidate_user_cache(old_email)
+
+def _decode_token_claims(token: str) -> Optional[dict]:
+    claims = _claims_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as e:
+        logger.debug(f"JWT error: {e}")
+        return None
+    if not payload.get("sub"):
+        return None
+    claims = {"sub": payload["sub"], "exp": payload.get("exp")}
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if claims["exp"] is not None:
+        # Never serve a cached token past its own expiry
+        ttl = min(ttl, claims["exp"] - time.time())
+    _claims_cache.set(token, claims, ttl=ttl)
+    return claims
+
+def get_auth_metrics() -> dict:
+    """
+    Auth cache counters and per-request auth latency percentiles (ms)
+    """
+    latencies = {}
+    for outcome, samples in _auth_latencies.items():
+        values = list(samples)
+        latencies[outcome] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "p99_ms": round(percentile(values, 0.99), 3),
+        }
+    return {
+        "claims_cache": _claims_cache.stats(),
+        "user_cache": _user_cache.stats(),
+        "latency": latencies,
+    }
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> models.User:
-    print("\n=== get_current_user started ===")
-    print(f"Token received (first 20 chars): {token[:20]}..." if token else "No token provided")
+    started = time.perf_counter()
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    def log_error(message: str):
-        print(f"❌ ERROR: {message}")
-        return credentials_exception
+    # Accept both a raw token and a "Bearer <token>" value
+    token = token.split(" ")[-1] if token else token
+    if not token:
+        raise credentials_exception
     
-    try:
-        # Ensure we have a valid token
-        if not token:
-            print("❌ No token provided")
-            raise credentials_exception
-            
-        print("🔑 Token format check...")
-        # Ensure the token starts with 'Bearer '
-        if not token.startswith('Bearer '):
-            print("ℹ️  Adding 'Bearer ' prefix to token")
-            token = f'Bearer {token}'
-        
-        # Extract the token part after 'Bearer '
-        token_parts = token.split(' ')
-        if len(token_parts) > 1:
-            token = token_parts[1]
-            print(f"ℹ️  Extracted token (first 10 chars): {token[:10]}...")
-        else:
-            token = token_parts[0]
-            print(f"ℹ️  Using token as-is (first 10 chars): {token[:10]}...")
-        
-        # Verify the token is not empty
-        if not token:
-            print("❌ Empty token after processing")
-            raise credentials_exception
-            
-        print("🔍 Decoding JWT token...")
-        # Decode the token
+    claims = _decode_token_claims(token)
+    if claims is None:
+        raise credentials_exception
+    
+    email = claims["sub"]
+    snapshot = _user_cache.get(email)
+    cache_hit = snapshot is not None
+    if snapshot is None:
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            print(f"✅ Token decoded successfully. Payload: {payload}")
-            
-            email: str = payload.get("sub")
-            if not email:
-                print("❌ No 'sub' (email) in token payload")
-                raise credentials_exception
-                
-            print(f"📧 Extracted email from token: {email}")
-                
-        except JWTError as e:
-            print(f"❌ JWT Error: {e}")
-            print(f"Token that caused error: {token}")
+            user = await get_user_async(db, email=email)
+        except Exception as e:
+            logger.error(f"Error loading user for token: {e}")
             raise credentials_exception
-        
-        print(f"🔍 Looking up user with email: {email}")
-        # Get the user from the database
-        user = get_user(db, email=email)
         if user is None:
-            print(f"❌ User not found with email: {email}")
+            logger.debug(f"User not found with email: {email}")
             raise credentials_exception
-            
-        print(f"✅ User found: ID={user.id}, Email={user.email}")
-        
-        # Convert SQLAlchemy model to dict for Pydantic
-        user_dict = {
-            "id": user.id,
-            "email": user.email,
-            "wallet_address": user.wallet_address,
-            "is_active": user.is_active,
-            "is_admin": user.is_admin,
-            "created_at": user.created_at,
-            "updated_at": user.updated_at
-        }
-        
-        print(f"📦 User data prepared: {user_dict}")
-        
-        # Create a new User instance from the dict to ensure Pydantic validation
-        user_model = models.User(**user_dict)
-        print("✅ User model created successfully")
-        return user_model
-        
-    except Exception as e:
-        print(f"Unexpected error in get_current_user: {e}")
-        raise credentials_exception
+        snapshot = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+        _user_cache.set(email, snapshot)
+    
+    _auth_latencies["hit" if cache_hit else "miss"].append((time.perf_counter() - started) * 1000)
+    
+    # Hand out a fresh detached instance so callers cannot mutate the cached snapshot
+    return models.User(**snapshot)
 
 async def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
@@ -141,3 +209,12 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+async def authenticate_token(token: Optional[str]) -> models.User:
+    """
+    Resolve the active user for a bearer token outside the HTTP dependencies
+    (WebSocket handshakes, EventSource clients that pass the token in the query)
+    """
+    async with AsyncSessionLocal() as db:
+        current_user = await get_current_user(token=token or "", db=db)
+    return await get_current_active_user(current_user)
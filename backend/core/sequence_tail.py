@@ -0,0 +1,72 @@
+import time
+from collections import OrderedDict
+from typing import Set
+
+from sqlalchemy import or_
+
+# Gaps listed in the tail query by id; beyond this it reads the whole range from the oldest gap
+_MAX_LISTED_GAPS = 500
+
+
+class SequenceTail:
+    """
+    Read position in a table tailed by an increasing id.
+
+    Databases hand out ids when a row is inserted, not when it commits, so a
+    transaction can commit an id lower than ones a reader has already seen.
+    The tail remembers the ids it skipped as gaps and keeps reading them for
+    `grace` seconds (rolled back ids never show up), so late commits are still
+    delivered, and every id is accepted at most once.
+
+    Args:
+        last_id: Highest id already handled.
+        grace: Seconds a skipped id is watched for a late commit.
+        max_gaps: Most ids watched at once; the oldest are given up first.
+    """
+
+    def __init__(self, last_id: int, grace: float = 30.0, max_gaps: int = 10000):
+        self.last_id = last_id
+        self.grace = grace
+        self.max_gaps = max_gaps
+        # Skipped id -> monotonic time it is given up at, oldest first
+        self._gaps: "OrderedDict[int, float]" = OrderedDict()
+        self.late = 0
+
+    def gaps(self) -> Set[int]:
+        """Ids below last_id that may still commit"""
+        return set(self._gaps)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._gaps:
+            row_id, give_up_at = next(iter(self._gaps.items()))
+            if give_up_at > now:
+                break
+            del self._gaps[row_id]
+
+    def condition(self, column):
+        """WHERE clause for the rows that may not have been handled yet"""
+        self._expire()
+        if not self._gaps:
+            return column > self.last_id
+        if len(self._gaps) <= _MAX_LISTED_GAPS:
+            return or_(column > self.last_id, column.in_(list(self._gaps)))
+        # accept() skips the handled rows in between
+        return column >= min(self._gaps)
+
+    def accept(self, row_id: int) -> bool:
+        """
+        Whether a row selected by condition() is new; pass rows in id order
+        """
+        if row_id > self.last_id:
+            give_up_at = time.monotonic() + self.grace
+            for missing in range(max(self.last_id + 1, row_id - self.max_gaps), row_id):
+                self._gaps[missing] = give_up_at
+            while len(self._gaps) > self.max_gaps:
+                self._gaps.popitem(last=False)
+            self.last_id = row_id
+            return True
+        if self._gaps.pop(row_id, None) is not None:
+            self.late += 1
+            return True
+        return False
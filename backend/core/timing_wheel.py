@@ -0,0 +1,88 @@
+import math
+import time
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel of keys with deadlines.
+
+    Each level is a ring of `slots` buckets, and a bucket of level L spans
+    slots**L ticks. A key is filed in the lowest level whose span reaches its
+    deadline; whenever a level wraps, the next bucket of the level above is
+    cascaded down. Scheduling, rescheduling and cancelling are O(1), and each
+    tick only touches the keys that fall due (plus the keys cascaded once per
+    lap), however many keys are waiting.
+
+    Not thread-safe; use it from one event loop.
+
+    Args:
+        tick: Resolution in seconds; keys expire on the first tick at or after their deadline.
+        slots: Buckets per level.
+        levels: Number of levels; deadlines up to tick * slots**levels ahead are filed exactly.
+        now: Current time in seconds (default: time.time()).
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 64, levels: int = 4, now: Optional[float] = None):
+        self.tick = tick
+        self.slots = slots
+        self._levels: List[List[Set[Hashable]]] = [[set() for _ in range(slots)] for _ in range(levels)]
+        self._units = [slots ** level for level in range(levels)]  # Ticks per bucket of each level
+        # key -> (level, slot, due tick)
+        self._entries: Dict[Hashable, Tuple[int, int, int]] = {}
+        self._current = math.floor((time.time() if now is None else now) / tick)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Expire `key` at `deadline` (seconds), replacing any earlier schedule"""
+        self.cancel(key)
+        self._file(key, max(math.ceil(deadline / self.tick), self._current + 1))
+
+    def cancel(self, key: Hashable) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        level, slot, _ = entry
+        self._levels[level][slot].discard(key)
+        return True
+
+    def _file(self, key: Hashable, due: int) -> None:
+        delta = due - self._current
+        level = 0
+        while level < len(self._units) - 1 and delta >= self._units[level] * self.slots:
+            level += 1
+        # Beyond the top level's reach a key is cascaded again until it is close enough
+        slot = (due // self._units[level]) % self.slots
+        self._levels[level][slot].add(key)
+        self._entries[key] = (level, slot, due)
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the clock to `now` and return the keys that fell due, oldest first"""
+        target = math.floor((time.time() if now is None else now) / self.tick)
+        expired: List[Hashable] = []
+        while self._current < target:
+            self._current += 1
+            # Top down, so keys cascaded from a level can cascade on through the next one
+            for level in range(len(self._units) - 1, 0, -1):
+                unit = self._units[level]
+                if self._current % unit:
+                    continue
+                slot = (self._current // unit) % self.slots
+                bucket = self._levels[level][slot]
+                if bucket:
+                    self._levels[level][slot] = set()
+                    for key in bucket:
+                        self._file(key, self._entries[key][2])
+            slot = self._current % self.slots
+            bucket = self._levels[0][slot]
+            if bucket:
+                self._levels[0][slot] = set()
+                for key in bucket:
+                    del self._entries[key]
+                expired.extend(bucket)
+        return expired
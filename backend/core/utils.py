@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from fastapi.encoders import jsonable_encoder
 
 
@@ -8,6 +8,14 @@ def get_utc_now() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted values; 0.0 when there are none"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
 def model_to_dict(model_instance, exclude: Optional[set] = None) -> Dict[str, Any]:
     """Convert SQLAlchemy model instance to dictionary"""
     if exclude is None:
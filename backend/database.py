@@ -1,17 +1,96 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+from typing import Dict
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .core.config import settings
 
 # Create SQLAlchemy engine
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+def get_async_database_url(url: str) -> str:
+    """
+    Map a sync database URL to the equivalent async driver URL
+    """
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith(("postgresql://", "postgresql+psycopg2://")):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    return url
+
+def get_engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    Build create_engine keyword arguments for the configured engine profile
+    """
+    options = {"echo": settings.DB_ECHO}
+    pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if not url.startswith("sqlite"):
+        # Server databases drop idle connections; validate and recycle them
+        pool_options["pool_pre_ping"] = settings.DB_POOL_PRE_PING
+        pool_options["pool_recycle"] = settings.DB_POOL_RECYCLE
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases live in a single connection and cannot be pooled
+        if ":memory:" in url or url.rstrip("/").endswith(":"):
+            return options
+        if is_async:
+            # aiosqlite defaults to NullPool; keep connections (and their pragmas) warm
+            options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(pool_options)
+    return options
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply the SQLite engine profile to every new DBAPI connection
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=True
+    **get_engine_options(SQLALCHEMY_DATABASE_URL)
 )
 
+# Create async SQLAlchemy engine for the async routers
+ASYNC_DATABASE_URL = get_async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **get_engine_options(ASYNC_DATABASE_URL, is_async=True)
+)
+
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
+# Create async read engines, one per configured replica
+read_engines = []
+for read_url in settings.database_read_urls:
+    async_read_url = get_async_database_url(read_url)
+    read_engine = create_async_engine(
+        async_read_url,
+        **get_engine_options(async_read_url, is_async=True)
+    )
+    if read_url.startswith("sqlite"):
+        event.listen(read_engine.sync_engine, "connect", set_sqlite_pragmas)
+    read_engines.append(read_engine)
+
 # Create a custom session class that filters out unexpected kwargs
 class CustomSession(Session):
     def __init__(self, **kwargs):
@@ -31,6 +110,80 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Sync session class behind primary async sessions, used to detect writes
+class PrimarySession(Session):
+    pass
+
+# Create async session factory; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=PrimarySession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Create one async session factory per read replica, used round-robin
+ReadSessionLocals = [
+    async_sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+    for read_engine in read_engines
+]
+_read_session_cycle = itertools.cycle(ReadSessionLocals) if ReadSessionLocals else None
+
+# Requests that wrote to the primary recently: pin key -> monotonic expiry time
+_primary_pins: Dict[str, float] = {}
+
+def get_pin_key(request: Request) -> str:
+    """
+    Identify the client a read-your-writes pin applies to
+    """
+    auth = request.headers.get("authorization")
+    if auth:
+        return auth
+    return request.client.host if request.client else ""
+
+def is_pinned_to_primary(pin_key: str) -> bool:
+    """
+    Check whether a client wrote recently enough that replicas may be stale
+    """
+    expires_at = _primary_pins.get(pin_key)
+    if expires_at is None:
+        return False
+    if expires_at < time.monotonic():
+        _primary_pins.pop(pin_key, None)
+        return False
+    return True
+
+@event.listens_for(PrimarySession, "after_flush")
+def _mark_session_writes(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info["has_writes"] = True
+
+@event.listens_for(PrimarySession, "after_bulk_update")
+@event.listens_for(PrimarySession, "after_bulk_delete")
+def _mark_bulk_writes(update_context):
+    update_context.session.info["has_writes"] = True
+
+@event.listens_for(PrimarySession, "after_commit")
+def _pin_after_commit(session):
+    pin_key = session.info.get("pin_key")
+    if not (pin_key and session.info.pop("has_writes", False)):
+        return
+    if not read_engines or settings.READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    now = time.monotonic()
+    if len(_primary_pins) > 10000:
+        # Drop expired pins so the map stays bounded
+        for key, expires_at in list(_primary_pins.items()):
+            if expires_at < now:
+                del _primary_pins[key]
+    _primary_pins[pin_key] = now + settings.READ_YOUR_WRITES_SECONDS
+
 # Create Base class
 Base = declarative_base()
 
@@ -43,3 +196,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db(request: Request):
+    """
+    Dependency function that yields async db sessions on the primary
+    """
+    async with AsyncSessionLocal() as db:
+        db.sync_session.info["pin_key"] = get_pin_key(request)
+        yield db
+
+async def get_async_read_db(request: Request):
+    """
+    Dependency function that yields async db sessions for read-only routes.
+    Uses the next read replica, or the primary when no replicas are configured
+    or the client wrote within READ_YOUR_WRITES_SECONDS.
+    """
+    if _read_session_cycle is None or is_pinned_to_primary(get_pin_key(request)):
+        session_factory = AsyncSessionLocal
+    else:
+        session_factory = next(_read_session_cycle)
+    async with session_factory() as db:
+        yield db
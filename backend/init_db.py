@@ -1,7 +1,10 @@
 import sys
 import os
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import inspect
 from sqlalchemy.exc import SQLAlchemyError
+from alembic import command
+from alembic.config import Config
 from datetime import datetime, timezone
 
 # Add the backend directory to the Python path
@@ -23,18 +26,31 @@ from backend.models.payment import Payment  # noqa: F401
 # Import the models module to ensure all models are registered
 from backend import models  # noqa: F401
 
+def run_migrations():
+    """Bring the database schema up to date with the Alembic migrations"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    alembic_cfg = Config(os.path.join(backend_dir, "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    
+    tables = set(inspect(engine).get_table_names())
+    if "users" in tables and "alembic_version" not in tables:
+        # Database was created by metadata.create_all before migrations existed
+        print("ℹ️  Existing schema without migration history, stamping head")
+        command.stamp(alembic_cfg, "head")
+    else:
+        command.upgrade(alembic_cfg, "head")
+
 def init_db():
     """Initialize the database with required tables and initial data"""
-    print("Creating database tables...")
+    print("Running database migrations...")
     
-    # First create all tables
+    # First bring the schema up to date
     try:
-        Base.metadata.create_all(bind=engine)
-        print("✅ Database tables created successfully")
-        print(f"Database URL: {engine.url}")
-        print(f"Tables in metadata: {Base.metadata.tables.keys()}")
+        run_migrations()
+        print("✅ Database schema is up to date")
+        print(f"Database URL: {engine.url.render_as_string(hide_password=True)}")
     except Exception as e:
-        print(f"❌ Error creating database tables: {e}")
+        print(f"❌ Error running database migrations: {e}")
         import traceback
         traceback.print_exc()
         return False
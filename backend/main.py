@@ -9,12 +9,10 @@ from typing import List
 from backend import models, schemas, services
 from backend.core import security
 from backend.core.config import settings
-from backend.database import SessionLocal, engine
+from backend.core.request_logging import RequestLoggingMiddleware
+from backend.database import SessionLocal, engine, async_engine, read_engines
 from backend.routers import auth, gpus, tasks, payments, workflows, crypto_wallet, fiat_wallet
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
 # Initialize FastAPI app
 app = FastAPI(
     title="Orbyte API",
@@ -35,44 +33,16 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print(f"\n=== New Request ===")
-    print(f"Method: {request.method}")
-    print(f"URL: {request.url}")
-    print("Headers:", request.headers)
-    
-    # Log request body for non-GET requests
-    if request.method not in ["GET", "HEAD"]:
-        try:
-            body = await request.body()
-            if body:
-                print("Request body:", body.decode())
-        except Exception as e:
-            print(f"Error reading request body: {e}")
-    
-    # Process the request
-    response = await call_next(request)
-    
-    print(f"Response status: {response.status_code}")
-    print("Response headers:", response.headers)
-    
-    # Log response body
-    response_body = b""
-    async for chunk in response.body_iterator:
-        response_body += chunk
-    
-    if response_body:
-        print("Response body:", response_body.decode())
-    
-    # Return a new response with the original body
-    from starlette.responses import Response
-    return Response(
-        content=response_body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=response.media_type
+# Request logging middleware (sampled, non-buffering, async queue)
+if settings.LOG_REQUESTS:
+    app.add_middleware(
+        RequestLoggingMiddleware,
+        sample_rate=settings.LOG_SAMPLE_RATE,
+        route_sample_rates=settings.LOG_ROUTE_SAMPLE_RATES,
+        max_body_bytes=settings.LOG_BODY_MAX_BYTES,
+        redact_headers=settings.LOG_REDACT_HEADERS,
+        redact_params=settings.LOG_REDACT_PARAMS,
+        queue_size=settings.LOG_QUEUE_SIZE,
     )
 
 # Database dependency
@@ -94,6 +64,57 @@ app.include_router(workflows.router, prefix="/api/gpus/{gpu_id}", tags=["workflo
 app.include_router(crypto_wallet.router, prefix="/api/crypto_wallet", tags=["crypto_wallet"])
 app.include_router(fiat_wallet.router, prefix="/api/fiat_wallet", tags=["fiat_wallet"])
 
+@app.on_event("startup")
+async def load_gpu_index():
+    # Build the marketplace index in the background; list_gpus uses the DB until it is ready
+    services.gpu_index.schedule_reload()
+    # Pick up GPU changes committed by worker processes and other API processes
+    services.gpu_feed.start()
+
+@app.on_event("startup")
+async def start_gpu_telemetry():
+    # Sample host GPUs in the background; /api/gpus/system-gpus serves the latest snapshot
+    if settings.GPU_TELEMETRY_ENABLED:
+        services.gpu_telemetry.start()
+    # Persist metric history recorded from telemetry samples
+    if settings.GPU_TELEMETRY_HISTORY_ENABLED:
+        services.gpu_history.start()
+
+task_workers = services.WorkerPool() if settings.TASK_WORKERS_EMBEDDED else None
+
+@app.on_event("startup")
+async def start_task_workers():
+    # Dedicated worker processes (`python -m backend.worker`) can run alongside or instead
+    if task_workers is not None:
+        task_workers.start()
+    # Tail task events for /api/tasks/stream subscribers
+    services.task_events.start()
+
+@app.on_event("startup")
+async def start_heartbeats():
+    # Provider reports are coalesced in memory and flushed in bulk
+    services.heartbeats.start()
+    # GPUs that stop reporting are taken offline after HEARTBEAT_TIMEOUT_SECONDS
+    services.liveness.start()
+
+@app.on_event("shutdown")
+async def dispose_engines():
+    if task_workers is not None:
+        await task_workers.stop()
+    await services.task_output.stop()
+    await services.task_events.stop()
+    await services.gpu_feed.stop()
+    await services.gpu_index.stop()
+    await services.liveness.stop()
+    await services.heartbeats.stop()
+    await services.gpu_telemetry.stop()
+    await services.gpu_history.stop()
+    # Close pooled connections so driver worker threads exit cleanly
+    await async_engine.dispose()
+    for read_engine in read_engines:
+        await read_engine.dispose()
+    engine.dispose()
+
 # Health check endpoint
 @app.get("/api/health")
 async def health_check():
@@ -1,7 +1,12 @@
 from ..database import Base
 from .user import User
 from .gpu import GPU, GPUStatus
+from .gpu_heartbeat import GPUHeartbeat
+from .gpu_change import GPUChange
+from . import gpu_search  # noqa: F401  (full-text search DDL for gpus)
 from .task import Task
+from .task_event import TaskEvent
+from .task_output_chunk import TaskOutputChunk
 from .payment import Payment
 from .gpu_workflow import GPUWorkflow, WorkflowType, WorkflowStatus
 from .llm_model import LLMModel
@@ -18,9 +23,13 @@ __all__ = [
     # GPU
     "GPU", 
     "GPUStatus",
+    "GPUHeartbeat",
+    "GPUChange",
     
     # Task
     "Task", 
+    "TaskEvent",
+    "TaskOutputChunk",
     
     # Payment
     "Payment",
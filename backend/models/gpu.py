@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum, JSON, DateTime, Table
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum, JSON, DateTime, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -35,6 +35,12 @@ class GPU(Base):
         network_speed_mbps: Network speed in Mbps
     """
     __tablename__ = "gpus"
+    __table_args__ = (
+        # Keyset pagination order (newest first)
+        Index("ix_gpus_created_at_id", "created_at", "id"),
+    )
+    # Fetch server-generated timestamps on flush so the in-memory GPU index sees them
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class GPUChange(Base):
+    """
+    A committed change to a GPU, appended in the transaction that made it.
+
+    Every API process tails this table (services.gpu_feed) to apply changes
+    made by other processes, such as standalone task workers, to its
+    in-memory GPU state. No foreign key: rows outlive deleted GPUs.
+    """
+    __tablename__ = "gpu_changes"
+    __table_args__ = (
+        # Retention pruning and the tail's starting point
+        Index("ix_gpu_changes_created_at", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    gpu_id = Column(Integer, nullable=True)  # NULL: GPUs changed in bulk, so all of them
+    scope = Column(String(16), nullable=False)  # "gpu" for the gpus row, "details" for its workflows and models
+    origin = Column(String(32), nullable=False)  # Process that made the change and has applied it already
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
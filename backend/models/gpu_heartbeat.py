@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, JSON, DateTime
+from ..database import Base
+
+class GPUHeartbeat(Base):
+    """
+    When a provider host last reported a GPU, and what it reported.
+
+    Kept apart from the gpus row so that liveness reports, which arrive every
+    few seconds, are written as one bulk upsert per flush instead of touching
+    the marketplace row (and its updated_at) each time.
+    """
+    __tablename__ = "gpu_heartbeats"
+    
+    gpu_id = Column(Integer, ForeignKey("gpus.id", ondelete="CASCADE"), primary_key=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=False)
+    expired_at = Column(DateTime(timezone=True), nullable=True)  # Set when the GPU was taken OFFLINE for missing heartbeats
+    # Latest utilization, memory, temperature and power reported (SQL NULL until a report carries them)
+    metrics = Column(JSON(none_as_null=True), nullable=True)
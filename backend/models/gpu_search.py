@@ -0,0 +1,66 @@
+"""
+Full-text search structures for the gpus table.
+
+SQLite uses an external-content FTS5 table over name, model and specs, kept in
+step with gpus by triggers. PostgreSQL uses pg_trgm GIN indexes over the same
+text, which the database maintains itself. These objects are not ORM tables;
+they are created alongside gpus by metadata.create_all and by migration 0003,
+and are excluded from Alembic autogenerate.
+"""
+from sqlalchemy import DDL, event
+
+from .gpu import GPU
+
+# Prefix shared by every search object so migrations can recognise them
+SEARCH_OBJECT_PREFIX = "gpu_search"
+
+# Text searched on PostgreSQL; must match the indexed expression exactly
+POSTGRES_SEARCH_DOCUMENT = "(name || ' ' || model || ' ' || coalesce(specs::text, ''))"
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS gpu_search USING fts5(
+        name, model, specs,
+        content='gpus', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gpu_search_after_insert AFTER INSERT ON gpus BEGIN
+        INSERT INTO gpu_search(rowid, name, model, specs)
+        VALUES (new.id, new.name, new.model, new.specs);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gpu_search_after_delete AFTER DELETE ON gpus BEGIN
+        INSERT INTO gpu_search(gpu_search, rowid, name, model, specs)
+        VALUES ('delete', old.id, old.name, old.model, old.specs);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS gpu_search_after_update AFTER UPDATE OF name, model, specs ON gpus BEGIN
+        INSERT INTO gpu_search(gpu_search, rowid, name, model, specs)
+        VALUES ('delete', old.id, old.name, old.model, old.specs);
+        INSERT INTO gpu_search(rowid, name, model, specs)
+        VALUES (new.id, new.name, new.model, new.specs);
+    END
+    """,
+]
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE INDEX IF NOT EXISTS gpu_search_document_trgm_idx
+    ON gpus USING gin ({POSTGRES_SEARCH_DOCUMENT} gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS gpu_search_model_trgm_idx
+    ON gpus USING gin (model gin_trgm_ops)
+    """,
+]
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(GPU.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(GPU.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
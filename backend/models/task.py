@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum, JSON, DateTime, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import expression, func
 import enum
 from ..database import Base
 
@@ -17,21 +17,46 @@ class TaskType(str, enum.Enum):
     MODEL_TRAINING = "model_training"
     OTHER = "other"
 
+class TaskPriority(str, enum.Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination order (newest first)
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        # Queue scans: pending tasks per fair-share flow, and expired leases for crash recovery
+        Index("ix_tasks_dispatch", "status", "task_type", "requester_id", "priority", "id"),
+        Index("ix_tasks_status_lease_expires_at", "status", "lease_expires_at"),
+        # Result cache lookups: the latest completed task with the same spec
+        Index("ix_tasks_cache_key_completed_at", "cache_key", "completed_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String)
     task_type = Column(Enum(TaskType), nullable=False)
     status = Column(Enum(TaskStatus), default=TaskStatus.PENDING)
+    priority = Column(Enum(TaskPriority), nullable=False, default=TaskPriority.NORMAL, server_default=TaskPriority.NORMAL.name)
     requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     gpu_id = Column(Integer, ForeignKey("gpus.id"), nullable=True)
-    input_data = Column(JSON)  # Input data for the task
-    output_data = Column(JSON)  # Output/result of the task
+    input_data = Column(JSON)  # Input data for the task, or a blob store reference when large
+    output_data = Column(JSON)  # Output/result of the task, or a blob store reference when large
     cost = Column(Float, default=0.0)  # Cost in mock tokens
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Queue lease: the worker currently running the task and until when it holds it
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # Times a worker has claimed the task
+    
+    # Result cache: hash of (task_type, input_data) when the result may be reused, and
+    # whether this task was answered from another task's result instead of running
+    cache_key = Column(String(64), nullable=True)
+    cache_hit = Column(Boolean, nullable=False, default=False, server_default=expression.false())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
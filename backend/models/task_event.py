@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+from .task import TaskStatus
+
+class TaskEvent(Base):
+    """
+    A task state transition, appended in the transaction that made it.
+
+    The id is a global, increasing event id: streams resume from it and the
+    broadcaster in every API process tails the table by it.
+    """
+    __tablename__ = "task_events"
+    __table_args__ = (
+        # Resume a requester's stream after a given event id
+        Index("ix_task_events_requester_id_id", "requester_id", "id"),
+        # Retention pruning
+        Index("ix_task_events_created_at", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), nullable=False)
+    requester_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(TaskStatus), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, ForeignKey, Text, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class TaskOutputChunk(Base):
+    """
+    A piece of a task's streamed output (e.g. generated tokens), in order.
+
+    Written in small batches while the task runs so that clients of any API
+    process can follow, or replay, the stream by sequence number.
+    """
+    __tablename__ = "task_output_chunks"
+    __table_args__ = (
+        # Retention pruning
+        Index("ix_task_output_chunks_created_at", "created_at"),
+    )
+    
+    task_id = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)  # 0-based position in the task's stream
+    attempt = Column(Integer, nullable=False)  # A retried task streams again after its earlier chunks
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,29 +1,32 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from http import HTTPStatus
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Optional
 from pydantic import BaseModel, EmailStr
 
 from .. import schemas, models
 from ..core.security import (
-    authenticate_user,
+    authenticate_user_async,
     create_access_token,
-    get_password_hash,
+    get_password_hash_async,
     get_current_user,
+    get_auth_metrics,
+    invalidate_user_cache,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
-from ..database import get_db
+from ..database import get_async_db
 
 router = APIRouter(tags=["auth"])
 
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> dict[str, str]:
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,13 +44,14 @@ async def login_for_access_token(
 @router.post("/register", response_model=schemas.UserResponse)
 async def register_user(
     user_in: schemas.UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check if user already exists
-    db_user = db.query(models.User).filter(
+    result = await db.execute(select(models.User).where(
         (models.User.email == user_in.email) | 
         (models.User.wallet_address == user_in.wallet_address)
-    ).first()
+    ))
+    db_user = result.scalars().first()
     
     if db_user:
         if db_user.email == user_in.email:
@@ -62,7 +66,7 @@ async def register_user(
             )
     
     # Create new user
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     db_user = models.User(
         email=user_in.email,
         wallet_address=user_in.wallet_address,
@@ -71,8 +75,8 @@ async def register_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return {
         "success": True,
@@ -84,7 +88,7 @@ async def register_user(
 async def read_users_me(
     request: Request,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Get the local_kw from query parameters if it exists
     local_kw = request.query_params.get("local_kw")
@@ -138,7 +142,7 @@ class UserUpdateRequest(BaseModel):
 async def update_current_user(
     user_update: UserUpdateRequest,
     current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         update_data = {}
@@ -146,9 +150,10 @@ async def update_current_user(
         # Check if email is being updated
         if user_update.email and user_update.email != current_user.email:
             # Check if new email is already taken
-            existing_user = db.query(models.User).filter(
+            result = await db.execute(select(models.User).where(
                 models.User.email == user_update.email
-            ).first()
+            ))
+            existing_user = result.scalars().first()
             if existing_user:
                 raise HTTPException(
                     status_code=HTTPStatus.BAD_REQUEST,
@@ -159,9 +164,10 @@ async def update_current_user(
         # Check if wallet address is being updated
         if user_update.wallet_address and user_update.wallet_address != current_user.wallet_address:
             # Check if new wallet address is already taken
-            existing_user = db.query(models.User).filter(
+            result = await db.execute(select(models.User).where(
                 models.User.wallet_address == user_update.wallet_address
-            ).first()
+            ))
+            existing_user = result.scalars().first()
             if existing_user:
                 raise HTTPException(
                     status_code=HTTPStatus.BAD_REQUEST,
@@ -178,23 +184,27 @@ async def update_current_user(
                 )
             
             # Verify current password
-            if not authenticate_user(db, current_user.email, user_update.current_password):
+            if not await authenticate_user_async(db, current_user.email, user_update.current_password):
                 raise HTTPException(
                     status_code=HTTPStatus.UNAUTHORIZED,
                     detail="Incorrect current password"
                 )
             
             # Update password
-            update_data["hashed_password"] = get_password_hash(user_update.new_password)
+            update_data["hashed_password"] = await get_password_hash_async(user_update.new_password)
         
-        # If there are updates, apply them
+        # If there are updates, apply them to the persistent row
+        # (current_user is a detached snapshot from the auth cache)
         if update_data:
+            db_user = await db.get(models.User, current_user.id)
             for key, value in update_data.items():
-                setattr(current_user, key, value)
+                setattr(db_user, key, value)
             
-            current_user.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(current_user)
+            db_user.updated_at = datetime.utcnow()
+            await db.commit()
+            await db.refresh(db_user)
+            invalidate_user_cache(current_user.email)
+            current_user = db_user
         
         # Return updated user data
         return {
@@ -206,7 +216,7 @@ async def update_current_user(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error updating user: {str(e)}")
         print(f"Error type: {type(e).__name__}")
         import traceback
@@ -215,3 +225,22 @@ async def update_current_user(
             status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
             detail="An error occurred while updating the user"
         )
+
+@router.get("/metrics")
+async def read_auth_metrics(
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Auth cache hit rates and per-request auth latency (admin only)
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return {
+        "success": True,
+        "message": "Auth metrics retrieved successfully",
+        "data": get_auth_metrics()
+    }
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from .. import models, schemas
 from ..core.security import get_current_user, get_current_active_user
-from ..database import get_db
+from ..database import get_async_db
 import logging
 
 # Set up logging
@@ -19,19 +20,20 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=schemas.FiatWalletResponse, status_code=status.HTTP_201_CREATED)
-def create_fiat_wallet(
+async def create_fiat_wallet(
     wallet: schemas.FiatWalletCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Create a new fiat wallet for the current user.
     """
     # Check if user already has a wallet with this currency
-    existing_wallet = db.query(models.FiatWallet).filter(
+    result = await db.execute(select(models.FiatWallet).where(
         models.FiatWallet.user_id == current_user.id,
         models.FiatWallet.currency == wallet.currency
-    ).first()
+    ))
+    existing_wallet = result.scalars().first()
     
     if existing_wallet:
         raise HTTPException(
@@ -40,49 +42,52 @@ def create_fiat_wallet(
         )
     
     # If this is the first wallet, set it as primary
-    is_first_wallet = not db.query(models.FiatWallet).filter(
+    result = await db.execute(select(models.FiatWallet).where(
         models.FiatWallet.user_id == current_user.id
-    ).first()
+    ))
+    is_first_wallet = not result.scalars().first()
     
     new_wallet = models.FiatWallet(
-        **wallet.dict(),
+        **wallet.dict(exclude={"is_primary"}),
         user_id=current_user.id,
         is_primary=is_first_wallet
     )
     
     db.add(new_wallet)
-    db.commit()
-    db.refresh(new_wallet)
+    await db.commit()
+    await db.refresh(new_wallet)
     
     return {"data": new_wallet}
 
 @router.get("/", response_model=schemas.FiatWalletListResponse)
-def get_user_fiat_wallets(
-    db: Session = Depends(get_db),
+async def get_user_fiat_wallets(
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get all fiat wallets for the current user.
     """
-    wallets = db.query(models.FiatWallet).filter(
+    result = await db.execute(select(models.FiatWallet).where(
         models.FiatWallet.user_id == current_user.id
-    ).all()
+    ))
+    wallets = result.scalars().all()
     
     return {"data": wallets}
 
 @router.get("/{wallet_id}", response_model=schemas.FiatWalletResponse)
-def get_fiat_wallet(
+async def get_fiat_wallet(
     wallet_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get a specific fiat wallet by ID.
     """
-    wallet = db.query(models.FiatWallet).filter(
+    result = await db.execute(select(models.FiatWallet).where(
         models.FiatWallet.id == wallet_id,
         models.FiatWallet.user_id == current_user.id
-    ).first()
+    ))
+    wallet = result.scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -93,21 +98,20 @@ def get_fiat_wallet(
     return {"data": wallet}
 
 @router.patch("/{wallet_id}", response_model=schemas.FiatWalletResponse)
-def update_fiat_wallet(
+async def update_fiat_wallet(
     wallet_id: int,
     wallet_updates: schemas.FiatWalletUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Update a fiat wallet's details.
     """
-    wallet_query = db.query(models.FiatWallet).filter(
+    result = await db.execute(select(models.FiatWallet).where(
         models.FiatWallet.id == wallet_id,
         models.FiatWallet.user_id == current_user.id
-    )
-    
-    wallet = wallet_query.first()
+    ))
+    wallet = result.scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -119,30 +123,41 @@ def update_fiat_wallet(
     
     # If setting as primary, unset primary status from other wallets
     if update_data.get('is_primary', False):
-        db.query(models.FiatWallet).filter(
-            models.FiatWallet.user_id == current_user.id,
-            models.FiatWallet.id != wallet_id
-        ).update({"is_primary": False})
+        await db.execute(
+            update(models.FiatWallet)
+            .where(
+                models.FiatWallet.user_id == current_user.id,
+                models.FiatWallet.id != wallet_id
+            )
+            .values(is_primary=False)
+        )
     
-    wallet_query.update(update_data, synchronize_session=False)
-    db.commit()
-    db.refresh(wallet)
+    if update_data:
+        await db.execute(
+            update(models.FiatWallet)
+            .where(models.FiatWallet.id == wallet_id)
+            .values(**update_data)
+            .execution_options(synchronize_session=False)
+        )
+    await db.commit()
+    await db.refresh(wallet)
     
     return {"data": wallet}
 
 @router.delete("/{wallet_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_fiat_wallet(
+async def delete_fiat_wallet(
     wallet_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Delete a fiat wallet.
     """
-    wallet = db.query(models.FiatWallet).filter(
+    result = await db.execute(select(models.FiatWallet).where(
         models.FiatWallet.id == wallet_id,
         models.FiatWallet.user_id == current_user.id
-    ).first()
+    ))
+    wallet = result.scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -151,9 +166,11 @@ def delete_fiat_wallet(
         )
     
     # Prevent deletion if it's the only wallet
-    wallet_count = db.query(models.FiatWallet).filter(
-        models.FiatWallet.user_id == current_user.id
-    ).count()
+    wallet_count = await db.scalar(
+        select(func.count()).select_from(models.FiatWallet).where(
+            models.FiatWallet.user_id == current_user.id
+        )
+    )
     
     if wallet_count <= 1:
         raise HTTPException(
@@ -161,7 +178,7 @@ def delete_fiat_wallet(
             detail="Cannot delete your only wallet"
         )
     
-    db.delete(wallet)
-    db.commit()
+    await db.delete(wallet)
+    await db.commit()
     
     return None
@@ -1,17 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Dict, Any, Union
 from datetime import datetime
+import asyncio
 import logging
 
 from .. import models
 from ..schemas import (
     GPUDetailResponse, GPUStatus, GPUResponse, GPUsResponse, 
-    GPU, GPUCreate, GPUUpdate
+    GPU, GPUCreate, GPUUpdate, GPUSearchResponse, ModelSuggestionsResponse,
+    GPUHeartbeatBatch, GPUHeartbeatResponse
 )
-from ..database import get_db
+from ..database import get_async_db, get_async_read_db
+from ..core.config import settings
+from ..core.pagination import clamp_page_size, fetch_page
+from ..core.responses import etag_matches
 from ..core.security import get_current_active_user
-from ..utils.gpu_detection import get_system_gpus
+from ..services.gpu_details import gpu_details
+from ..services.gpu_history import gpu_history
+from ..services.gpu_index import gpu_index
+from ..services.gpu_search import autocomplete_models, search_gpus
+from ..services.gpu_telemetry import gpu_telemetry
+from ..services.heartbeats import HeartbeatReport, heartbeats
+from ..utils.gpu_detection import get_gpu_by_uuid, get_system_gpus
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -23,24 +35,36 @@ router = APIRouter(
     redirect_slashes=False  # Handle both with and without trailing slashes
 )
 
+def _cache_headers(etag: Optional[str]) -> Dict[str, str]:
+    """Caching headers for public marketplace reads; without a validator nothing is cached"""
+    if etag is None:
+        return {"Cache-Control": "no-cache"}
+    return {"ETag": etag, "Cache-Control": f"public, max-age={settings.GPU_CACHE_MAX_AGE_SECONDS}"}
+
+def _not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """A 304 response if the client's copy is still current"""
+    if etag is None or not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+
 @router.post("/", response_model=GPUResponse, status_code=status.HTTP_201_CREATED)
 async def register_gpu(
     gpu: GPUCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Register a new GPU for rental
     """
     db_gpu = models.GPU(
-        **gpu.dict(),
+        **gpu.dict(exclude={"status"}),
         owner_id=current_user.id,
         status=GPUStatus.AVAILABLE
     )
     
     db.add(db_gpu)
-    db.commit()
-    db.refresh(db_gpu)
+    await db.commit()
+    await db.refresh(db_gpu)
     
     return {
         "success": True,
@@ -51,31 +75,30 @@ async def register_gpu(
 @router.get("", response_model=GPUsResponse)
 @router.get("/", response_model=GPUsResponse)
 async def list_gpus(
-    skip: int = 0,
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
     limit: int = 100,
     min_vram: Optional[int] = None,
     max_price: Optional[float] = None,
     model: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     List all GPUs with optional filters
+
+    Answers from the GPU index carry the catalog version as a strong ETag and
+    are revalidated with If-None-Match.
     """
-    query = db.query(models.GPU)
-    
-    # Apply filters
-    if min_vram is not None and min_vram > 0:
-        query = query.filter(models.GPU.vram_gb >= min_vram)
-    if max_price is not None and max_price > 0:
-        query = query.filter(models.GPU.price_per_hour <= max_price)
-    if model is not None and model.strip() != "":
-        query = query.filter(models.GPU.model.ilike(f"%{model}%"))
+    min_vram = min_vram if min_vram is not None and min_vram > 0 else None
+    max_price = max_price if max_price is not None and max_price > 0 else None
+    model = model if model is not None and model.strip() != "" else None
+    status_enum = None
     if status is not None and status.strip() != "":
         # Handle status filter
         try:
             status_enum = GPUStatus(status.lower())
-            query = query.filter(models.GPU.status == status_enum)
         except ValueError:
             # If status is not valid, return empty list
             return {
@@ -84,139 +107,332 @@ async def list_gpus(
                 "data": []
             }
     
-    gpus = query.offset(skip).limit(limit).all()
+    # Taken before the query; None while the index is not serving
+    etag = gpu_index.etag()
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    if etag is not None:
+        # Answer from the in-memory marketplace index without touching the database
+        gpus, next_cursor = gpu_index.query(
+            min_vram=min_vram,
+            max_price=max_price,
+            model=model,
+            status=status_enum.value if status_enum else None,
+            cursor=cursor,
+            limit=limit
+        )
+    else:
+        gpu_index.schedule_reload()
+        query = select(models.GPU)
+        
+        # Apply filters
+        if min_vram is not None:
+            query = query.where(models.GPU.vram_gb >= min_vram)
+        if max_price is not None:
+            query = query.where(models.GPU.price_per_hour <= max_price)
+        if model is not None:
+            query = query.where(models.GPU.model.ilike(f"%{model}%"))
+        if status_enum is not None:
+            query = query.where(models.GPU.status == status_enum)
+        
+        gpus, next_cursor = await fetch_page(db, query, models.GPU, cursor, limit)
     
+    response.headers.update(_cache_headers(etag))
     return {
         "success": True,
         "message": f"Found {len(gpus)} GPUs",
-        "data": gpus
+        "data": gpus,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/search", response_model=GPUSearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = 20,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Full-text search over GPU name, model and specs, best match first
+    """
+    status_enum = None
+    if status is not None and status.strip() != "":
+        try:
+            status_enum = GPUStatus(status.lower())
+        except ValueError:
+            return {
+                "success": True,
+                "message": "Invalid status filter",
+                "data": []
+            }
+    
+    matches = await search_gpus(db, q, clamp_page_size(limit), status_enum)
+    results = [
+        {**GPU.model_validate(gpu).model_dump(), "score": score}
+        for gpu, score in matches
+    ]
+    
+    return {
+        "success": True,
+        "message": f"Found {len(results)} GPUs",
+        "data": results
+    }
+
+@router.get("/search/autocomplete", response_model=ModelSuggestionsResponse)
+async def autocomplete(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = 10,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Suggest GPU model names as the user types (e.g. "RTX 40")
+    """
+    suggestions = await autocomplete_models(db, prefix, clamp_page_size(limit))
+    
+    return {
+        "success": True,
+        "message": f"Found {len(suggestions)} models",
+        "data": suggestions
     }
 
 @router.get("/my-gpus", response_model=GPUsResponse)
 async def list_my_gpus(
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     List all GPUs owned by the current user
     """
-    gpus = db.query(models.GPU).filter(
-        models.GPU.owner_id == current_user.id
-    ).all()
+    query = select(models.GPU).where(models.GPU.owner_id == current_user.id)
+    gpus, next_cursor = await fetch_page(db, query, models.GPU, cursor, limit)
     
     return {
         "success": True,
         "message": f"Found {len(gpus)} of your GPUs",
-        "data": gpus
+        "data": gpus,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/system-gpus", response_model=Dict[str, Any])
+async def list_system_gpus(
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    List all NVIDIA GPUs available on the system
+    
+    This endpoint returns a list of NVIDIA GPUs detected on the system
+    with their details including name, memory, and other specifications.
+    """
+    try:
+        if not settings.GPU_TELEMETRY_ENABLED:
+            # One-off NVML session, kept off the event loop
+            gpus = await asyncio.to_thread(get_system_gpus)
+            return {
+                "success": True,
+                "message": f"Found {len(gpus)} GPUs",
+                "data": gpus
+            }
+        snapshot = await gpu_telemetry.latest()
+        return {
+            "success": True,
+            "message": f"Found {len(snapshot.gpus)} GPUs",
+            "data": snapshot.gpus,
+            "sampled_at": snapshot.sampled_at
+        }
+    except Exception as e:
+        logger.error(f"Error getting system GPUs: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting system GPUs: {str(e)}"
+        )
+
+@router.get("/system-gpus/{uuid}", response_model=Dict[str, Any])
+async def get_system_gpu(
+    uuid: str,
+    fields: Optional[str] = Query(None, description="Comma-separated metric groups or fields, e.g. temperature,power"),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Get one NVIDIA GPU of the system by UUID, reading only the requested metrics
+    
+    Without `fields` every metric is read; `fields=` (empty) returns only the
+    fixed properties (name, UUID, total memory, driver version).
+    """
+    requested = None if fields is None else [field.strip() for field in fields.split(",") if field.strip()]
+    try:
+        if settings.GPU_TELEMETRY_ENABLED:
+            gpu = await gpu_telemetry.get_gpu_by_uuid(uuid, requested)
+        else:
+            gpu = await asyncio.to_thread(get_gpu_by_uuid, uuid, requested)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error getting system GPU {uuid}: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting system GPU: {str(e)}"
+        )
+    if gpu is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GPU not found")
+    return {
+        "success": True,
+        "message": "GPU retrieved successfully",
+        "data": gpu
+    }
+
+@router.post("/heartbeat", response_model=GPUHeartbeatResponse, status_code=status.HTTP_202_ACCEPTED)
+async def report_heartbeat(
+    batch: GPUHeartbeatBatch,
+    # Ownership is only read here; the reports are written by the heartbeat flush
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Report liveness, status and metrics for the GPUs of a provider host
+    
+    Send one request per host with a report for each of its GPUs. Reports are
+    coalesced in memory and written every HEARTBEAT_FLUSH_SECONDS, so a GPU's
+    last-seen time and status change at most that much later.
+    """
+    if len(batch.gpus) > settings.HEARTBEAT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A heartbeat can report at most {settings.HEARTBEAT_BATCH_MAX_SIZE} GPUs"
+        )
+    if any(report.status == GPUStatus.IN_USE for report in batch.gpus):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The in_use status is set by the scheduler"
+        )
+    gpu_ids = {report.gpu_id for report in batch.gpus}
+    owners = dict((await db.execute(
+        select(models.GPU.id, models.GPU.owner_id).where(models.GPU.id.in_(gpu_ids))
+    )).all())
+    missing = gpu_ids - owners.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"GPU not found: {', '.join(str(gpu_id) for gpu_id in sorted(missing))}"
+        )
+    if not current_user.is_admin and any(owner_id != current_user.id for owner_id in owners.values()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+
+    accepted = await heartbeats.submit(
+        HeartbeatReport(
+            report.gpu_id,
+            models.GPUStatus(report.status.value) if report.status is not None else None,
+            report.metrics.dict() if report.metrics is not None else None
+        )
+        for report in batch.gpus
+    )
+    return {
+        "success": True,
+        "message": f"Accepted {accepted} heartbeats",
+        "data": {
+            "accepted": accepted,
+            "flush_interval_seconds": settings.HEARTBEAT_FLUSH_SECONDS
+        }
     }
 
 @router.get("/{gpu_id}/details", response_model=GPUDetailResponse)
 async def get_gpu_details(
     gpu_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get detailed information about a specific GPU including workflows and models
     """
-    # Get the GPU with relationships loaded
-    gpu = db.query(models.GPU).filter(models.GPU.id == gpu_id).first()
+    # Cached per GPU as serialized JSON; only the permissions depend on the caller
+    detail = await gpu_details.get(db, gpu_id)
     
-    if not gpu:
+    if detail is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"GPU with ID {gpu_id} not found"
         )
     
     # Check if user is owner or admin (for future reference in the response)
-    is_owner = gpu.owner_id == current_user.id
+    is_owner = detail.owner_id == current_user.id
     is_admin = current_user.is_admin
     can_edit = is_owner or is_admin
     
-    # Get workflows for this GPU
-    workflows = db.query(models.GPUWorkflow).filter(
-        models.GPUWorkflow.gpu_id == gpu_id
-    ).all()
-    
-    # Get models for this GPU
-    gpu_models = db.query(models.LLMModel).filter(
-        models.LLMModel.gpu_id == gpu_id
-    ).all()
-    
-    # Convert SQLAlchemy objects to dictionaries
-    gpu_data = {
-        "id": gpu.id,
-        "name": gpu.name,
-        "model": gpu.model,
-        "vram_gb": gpu.vram_gb,
-        "price_per_hour": gpu.price_per_hour,
-        "status": gpu.status.value,
-        "os": gpu.os,
-        "cpu_model": gpu.cpu_model,
-        "cpu_cores": gpu.cpu_cores,
-        "ram_gb": gpu.ram_gb,
-        "storage_gb": gpu.storage_gb,
-        "network_speed_mbps": gpu.network_speed_mbps,
-        "specs": gpu.specs or {},
-        "created_at": gpu.created_at,
-        "updated_at": gpu.updated_at
-    }
-    
-    workflows_data = [
-        {
-            "id": wf.id,
-            "workflow_type": wf.workflow_type.value,
-            "status": wf.status.value,
-            "config": wf.config or {},
-            "created_at": wf.created_at,
-            "updated_at": wf.updated_at
-        }
-        for wf in workflows
-    ]
-    
-    models_data = [
-        {
-            "id": model.id,
-            "model_type": model.model_type,
-            "model_name": model.model_name,
-            "model_path": model.model_path,
-            "is_active": model.is_active,
-            "created_at": model.created_at,
-            "updated_at": model.updated_at
-        }
-        for model in gpu_models
-    ]
+    return Response(
+        content=gpu_details.render(detail, {
+            "can_edit": can_edit,
+            "is_owner": is_owner,
+            "is_admin": is_admin
+        }),
+        media_type="application/json"
+    )
+
+@router.get("/{gpu_id}/telemetry", response_model=Dict[str, Any])
+async def get_gpu_telemetry(
+    gpu_id: int,
+    from_: Optional[datetime] = Query(None, alias="from", description="Start of the range (default: an hour before `to`)"),
+    to: Optional[datetime] = Query(None, description="End of the range (default: now)"),
+    step: Optional[int] = Query(None, ge=1, description="Seconds per point (default: the finest resolution kept for the range)"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Get the utilization, memory, temperature and power history of a GPU
     
+    Metrics are averaged per `step` seconds and returned as columns aligned
+    with `timestamps` (epoch seconds); points without samples are null.
+    """
+    gpu_exists = (await db.execute(select(models.GPU.id).where(models.GPU.id == gpu_id))).scalar()
+    if gpu_exists is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="GPU not found"
+        )
+    try:
+        history = await gpu_history.query(gpu_id, from_, to, step)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return {
         "success": True,
-        "message": "GPU details retrieved successfully",
-        "data": {
-            "gpu": gpu_data,
-            "workflows": workflows_data,
-            "models": models_data,
-            "permissions": {
-                "can_edit": can_edit,
-                "is_owner": is_owner,
-                "is_admin": is_admin
-            }
-        }
+        "message": f"Retrieved {len(history['timestamps'])} points",
+        "data": history
     }
 
 @router.get("/{gpu_id}", response_model=GPUResponse)
 async def get_gpu(
     gpu_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get details of a specific GPU
+
+    Served from the GPU index with the GPU's version as a strong ETag when it is loaded.
     """
-    db_gpu = db.query(models.GPU).filter(models.GPU.id == gpu_id).first()
+    etag = gpu_index.etag(gpu_id)
+    not_modified = _not_modified(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    db_gpu = gpu_index.get(gpu_id) if etag is not None else None
+    if db_gpu is None:
+        # Not indexed (yet): read it, without a validator
+        etag = None
+        db_gpu = await db.get(models.GPU, gpu_id)
     if not db_gpu:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="GPU not found"
         )
     
+    response.headers.update(_cache_headers(etag))
     return {
         "success": True,
         "message": "GPU retrieved successfully",
@@ -227,13 +443,13 @@ async def get_gpu(
 async def update_gpu(
     gpu_id: int,
     gpu_in: GPUUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Update GPU details (only for owner)
     """
-    db_gpu = db.query(models.GPU).filter(models.GPU.id == gpu_id).first()
+    db_gpu = await db.get(models.GPU, gpu_id)
     if not db_gpu:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -252,8 +468,8 @@ async def update_gpu(
         setattr(db_gpu, field, value)
     
     db_gpu.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(db_gpu)
+    await db.commit()
+    await db.refresh(db_gpu)
     
     return {
         "success": True,
@@ -264,13 +480,13 @@ async def update_gpu(
 @router.delete("/{gpu_id}", response_model=GPUResponse)
 async def delete_gpu(
     gpu_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Delete a GPU (only for owner)
     """
-    db_gpu = db.query(models.GPU).filter(models.GPU.id == gpu_id).first()
+    db_gpu = await db.get(models.GPU, gpu_id)
     
     if not db_gpu:
         raise HTTPException(
@@ -291,35 +507,11 @@ async def delete_gpu(
             detail="Cannot delete a GPU that is currently in use"
         )
     
-    db.delete(db_gpu)
-    db.commit()
+    await db.delete(db_gpu)
+    await db.commit()
     
     return {
         "success": True,
         "message": "GPU deleted successfully",
         "data": db_gpu
     }
-
-@router.get("/system-gpus", response_model=Dict[str, Any])
-async def list_system_gpus(
-    current_user: models.User = Depends(get_current_active_user)
-):
-    """
-    List all NVIDIA GPUs available on the system
-    
-    This endpoint returns a list of NVIDIA GPUs detected on the system
-    with their details including name, memory, and other specifications.
-    """
-    try:
-        gpus = get_system_gpus()
-        return {
-            "success": True,
-            "message": f"Found {len(gpus)} GPUs",
-            "data": gpus
-        }
-    except Exception as e:
-        logger.error(f"Error getting system GPUs: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error getting system GPUs: {str(e)}"
-        )
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime
 import uuid
 
 from .. import models, schemas
-from ..database import get_db
+from ..database import get_async_db, get_async_read_db
+from ..core.pagination import fetch_page
 from ..core.security import get_current_active_user
 
 router = APIRouter(
@@ -17,57 +20,57 @@ router = APIRouter(
 
 @router.get("/", response_model=schemas.PaymentsResponse)
 async def list_payments(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
     status: Optional[schemas.PaymentStatus] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     List all payments for the current user (both sent and received)
     """
-    query = db.query(models.Payment).filter(
+    query = select(models.Payment).where(
         (models.Payment.payer_id == current_user.id) | 
         (models.Payment.recipient_id == current_user.id)
     )
     
     if status:
-        query = query.filter(models.Payment.status == status)
+        query = query.where(models.Payment.status == status)
     
-    payments = query.order_by(models.Payment.created_at.desc())\
-                    .offset(skip).limit(limit).all()
+    payments, next_cursor = await fetch_page(db, query, models.Payment, cursor, limit)
     
     return {
         "success": True,
         "message": f"Found {len(payments)} payments",
-        "data": payments
+        "data": payments,
+        "next_cursor": next_cursor
     }
 
 @router.get("/sent", response_model=schemas.PaymentsResponse)
 async def list_sent_payments(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
     status: Optional[schemas.PaymentStatus] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     List all payments sent by the current user
     """
-    query = db.query(models.Payment).filter(
+    query = select(models.Payment).where(
         models.Payment.payer_id == current_user.id
     )
     
     if status:
-        query = query.filter(models.Payment.status == status)
+        query = query.where(models.Payment.status == status)
     
-    payments = query.order_by(models.Payment.created_at.desc())\
-                    .offset(skip).limit(limit).all()
+    payments, next_cursor = await fetch_page(db, query, models.Payment, cursor, limit)
     
     return {
         "success": True,
         "message": f"Found {len(payments)} sent payments",
-        "data": payments
+        "data": payments,
+        "next_cursor": next_cursor
     }
 
 @router.get("/received", response_model=schemas.PaymentsResponse)
@@ -75,23 +78,23 @@ async def list_sent_payments(
 @router.get("/api/payments/received", response_model=schemas.PaymentsResponse)
 @router.get("/api/payments/received/", response_model=schemas.PaymentsResponse)
 async def list_received_payments(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     List all payments received by the current user
     """
-    query = db.query(models.Payment)
+    query = select(models.Payment)
 
     
     # Apply status filter if provided
     if status is not None:
         try:
             status_enum = schemas.PaymentStatus(status.lower())
-            query = query.filter(models.Payment.status == status_enum)
+            query = query.where(models.Payment.status == status_enum)
         except ValueError:
             # If status is not valid, return empty list
             return {
@@ -100,30 +103,31 @@ async def list_received_payments(
                 "data": []
             }
     
-    payments = query.order_by(models.Payment.created_at.desc())\
-                    .offset(skip).limit(limit).all()
+    payments, next_cursor = await fetch_page(db, query, models.Payment, cursor, limit)
     
     return {
         "success": True,
         "message": f"Found {len(payments)} received payments",
-        "data": payments
+        "data": payments,
+        "next_cursor": next_cursor
     }
 
 
 @router.get("/{payment_id}", response_model=schemas.PaymentResponse)
 async def get_payment(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get details of a specific payment
     """
-    payment = db.query(models.Payment).filter(
+    result = await db.execute(select(models.Payment).where(
         models.Payment.id == payment_id,
         ((models.Payment.payer_id == current_user.id) | 
          (models.Payment.recipient_id == current_user.id))
-    ).first()
+    ))
+    payment = result.scalars().first()
     
     if not payment:
         raise HTTPException(
@@ -141,18 +145,23 @@ async def get_payment(
 async def create_payment(
     task_id: int,
     payment_in: schemas.PaymentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Create a payment for a completed task
     """
     # Get the task
-    task = db.query(models.Task).filter(
-        models.Task.id == task_id,
-        models.Task.requester_id == current_user.id,
-        models.Task.status == schemas.TaskStatus.COMPLETED
-    ).first()
+    result = await db.execute(
+        select(models.Task)
+        .options(selectinload(models.Task.gpu))
+        .where(
+            models.Task.id == task_id,
+            models.Task.requester_id == current_user.id,
+            models.Task.status == schemas.TaskStatus.COMPLETED
+        )
+    )
+    task = result.scalars().first()
     
     if not task:
         raise HTTPException(
@@ -161,9 +170,10 @@ async def create_payment(
         )
     
     # Check if payment already exists for this task
-    existing_payment = db.query(models.Payment).filter(
-        models.Payment.task_id == task_id
-    ).first()
+    result = await db.execute(
+        select(models.Payment).where(models.Payment.task_id == task_id)
+    )
+    existing_payment = result.scalars().first()
     
     if existing_payment:
         raise HTTPException(
@@ -193,8 +203,8 @@ async def create_payment(
     db_payment.status = schemas.PaymentStatus.COMPLETED
     
     db.add(db_payment)
-    db.commit()
-    db.refresh(db_payment)
+    await db.commit()
+    await db.refresh(db_payment)
     
     return {
         "success": True,
@@ -1,14 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, WebSocket
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import asyncio
+import json
 import uuid
 import time
 
 from .. import models, schemas
-from ..database import get_db
-from ..core.security import get_current_active_user
-from ..services.task_processor import process_task
+from ..database import AsyncSessionLocal, get_async_db, get_async_read_db
+from ..core.pagination import fetch_page
+from ..core.responses import RangeFileResponse
+from ..core.security import authenticate_token, get_current_active_user
+from ..core.config import settings
+from ..services.blob_store import BLOB_REF_KEY, accel_redirect_path, blob_store, is_blob_ref, load_payload, spill_payload, spill_payloads
+from ..services.result_cache import result_cache
+from ..services.scheduler import PLACEMENT_POLICIES, scheduler
+from ..services.task_events import record_task_events, task_events
+from ..services.task_output import STREAMING_TASK_TYPES, task_output
+from ..services.task_processor import streamed_text
+from ..services.task_queue import task_queue
+
+# TaskCreate fields that steer placement and are not stored on the task
+TASK_PLACEMENT_FIELDS = {"gpu_id", "min_vram_gb", "max_price_per_hour", "placement_policy"}
+
+# All TaskCreate fields that are not Task columns
+TASK_SUBMISSION_FIELDS = TASK_PLACEMENT_FIELDS | {"cache"}
 
 router = APIRouter(
     prefix="",
@@ -20,49 +39,85 @@ router = APIRouter(
 @router.post("/", response_model=schemas.TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: schemas.TaskCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Submit a new task for processing on the network
     """
-    # Find an available GPU if not specified
-    gpu = None
-    if task.gpu_id:
-        gpu = db.query(models.GPU).filter(
-            models.GPU.id == task.gpu_id,
-            models.GPU.status == schemas.GPUStatus.AVAILABLE
-        ).first()
-    else:
-        # Find the first available GPU that meets the requirements
-        gpu = db.query(models.GPU).filter(
-            models.GPU.status == schemas.GPUStatus.AVAILABLE
-        ).first()
+    policy = PLACEMENT_POLICIES.get(task.placement_policy or settings.SCHEDULER_DEFAULT_POLICY)
+    if policy is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown placement policy. Choose one of: {', '.join(PLACEMENT_POLICIES)}"
+        )
     
-    if not gpu:
+    # An identical task completed recently: answer with its result at no cost
+    cache_key = result_cache.key_for(task.task_type, task.input_data, task.cache)
+    if cache_key is not None:
+        cached = (await result_cache.lookup(db, [cache_key])).get(cache_key)
+        if cached is not None:
+            now = datetime.utcnow()
+            db_task = models.Task(
+                **task.dict(exclude=TASK_SUBMISSION_FIELDS | {"input_data"}),
+                input_data=await spill_payload(task.input_data),
+                requester_id=current_user.id,
+                status=schemas.TaskStatus.COMPLETED,
+                output_data=cached,
+                cost=0.0,
+                started_at=now,
+                completed_at=now,
+                cache_key=cache_key,
+                cache_hit=True
+            )
+            db.add(db_task)
+            await db.flush()
+            # Output stream readers get the cached text in one chunk
+            if task.task_type in STREAMING_TASK_TYPES:
+                await task_output.record_whole(db, [(db_task.id, streamed_text(await load_payload(cached)))])
+            await record_task_events(db, [(db_task.id, current_user.id, schemas.TaskStatus.COMPLETED)])
+            await db.commit()
+            await db.refresh(db_task)
+            return {
+                "success": True,
+                "message": "Task completed from cache",
+                "data": db_task
+            }
+    
+    # Claim the requested GPU, or place the task with the policy
+    gpu_id = await scheduler.allocate(
+        db,
+        policy,
+        min_vram=task.min_vram_gb,
+        max_price=task.max_price_per_hour,
+        gpu_id=task.gpu_id
+    )
+    
+    if gpu_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="No available GPUs found to process this task"
         )
     
-    # Create the task
+    # Create the task; a large input is kept in the blob store, not the row
+    values = task.dict(exclude=TASK_SUBMISSION_FIELDS)
+    values["input_data"] = await spill_payload(values["input_data"])
     db_task = models.Task(
-        **task.dict(exclude={"gpu_id"}),
+        **values,
         requester_id=current_user.id,
-        gpu_id=gpu.id,
-        status=schemas.TaskStatus.PENDING
+        gpu_id=gpu_id,
+        status=schemas.TaskStatus.PENDING,
+        cache_key=cache_key
     )
     
-    # Mark GPU as in use
-    gpu.status = schemas.GPUStatus.IN_USE
-    
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.flush()
+    await record_task_events(db, [(db_task.id, current_user.id, schemas.TaskStatus.PENDING)])
+    await db.commit()
+    await db.refresh(db_task)
     
-    # Start processing the task in the background
-    background_tasks.add_task(process_task, db=db, task_id=db_task.id)
+    # The committed row is the queue entry; wake any idle local workers
+    task_queue.notify()
     
     return {
         "success": True,
@@ -70,22 +125,144 @@ async def create_task(
         "data": db_task
     }
 
+@router.post("/batch", response_model=schemas.TaskBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_tasks_batch(
+    batch: schemas.TaskBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Submit many tasks in one request; all of them are placed and queued, or none are
+    """
+    if len(batch.tasks) > settings.TASK_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can contain at most {settings.TASK_BATCH_MAX_SIZE} tasks"
+        )
+    
+    # Tasks with a cached result complete immediately and are not placed
+    cache_keys = [result_cache.key_for(task.task_type, task.input_data, task.cache) for task in batch.tasks]
+    cached = await result_cache.lookup(db, cache_keys)
+    
+    # Validate once and group tasks that share placement requirements
+    placements: Dict[Tuple[str, Optional[int], Optional[float]], List[int]] = {}
+    pinned: Dict[Tuple[Optional[int], Optional[float]], Dict[int, int]] = {}
+    pinned_gpus = set()
+    for position, task in enumerate(batch.tasks):
+        policy_name = task.placement_policy or settings.SCHEDULER_DEFAULT_POLICY
+        if policy_name not in PLACEMENT_POLICIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown placement policy. Choose one of: {', '.join(PLACEMENT_POLICIES)}"
+            )
+        if cache_keys[position] in cached:
+            continue
+        if task.gpu_id is None:
+            key = (policy_name, task.min_vram_gb, task.max_price_per_hour)
+            placements.setdefault(key, []).append(position)
+            continue
+        if task.gpu_id in pinned_gpus:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"GPU {task.gpu_id} is requested by more than one task in the batch"
+            )
+        pinned_gpus.add(task.gpu_id)
+        pinned.setdefault((task.min_vram_gb, task.max_price_per_hour), {})[task.gpu_id] = position
+    
+    # Place each group with one scheduling decision and bulk claims
+    gpu_ids: List[Optional[int]] = [None] * len(batch.tasks)
+    for (min_vram, max_price), group in pinned.items():
+        claimed = set(await scheduler.claim_many(db, list(group), min_vram, max_price))
+        unavailable = [gpu_id for gpu_id in group if gpu_id not in claimed]
+        if unavailable:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Requested GPUs are not available: {', '.join(map(str, unavailable[:20]))}"
+            )
+        for gpu_id, position in group.items():
+            gpu_ids[position] = gpu_id
+    for (policy_name, min_vram, max_price), positions in placements.items():
+        placed = await scheduler.allocate_many(
+            db,
+            PLACEMENT_POLICIES[policy_name],
+            len(positions),
+            min_vram=min_vram,
+            max_price=max_price
+        )
+        if len(placed) < len(positions):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Only {len(placed)} of {len(positions)} tasks could be placed on available GPUs"
+            )
+        for position, gpu_id in zip(positions, placed):
+            gpu_ids[position] = gpu_id
+    
+    # One bulk INSERT; ids come back in submission order
+    now = datetime.utcnow()
+    rows = []
+    for task, gpu_id, cache_key in zip(batch.tasks, gpu_ids, cache_keys):
+        output_data = cached.get(cache_key)
+        hit = output_data is not None
+        rows.append({
+            **task.dict(exclude=TASK_SUBMISSION_FIELDS),
+            "requester_id": current_user.id,
+            "gpu_id": gpu_id,
+            "status": schemas.TaskStatus.COMPLETED if hit else schemas.TaskStatus.PENDING,
+            "output_data": output_data,
+            "cost": 0.0,
+            "started_at": now if hit else None,
+            "completed_at": now if hit else None,
+            "cache_key": cache_key,
+            "cache_hit": hit
+        })
+    inputs = await spill_payloads([row["input_data"] for row in rows])
+    for row, input_data in zip(rows, inputs):
+        row["input_data"] = input_data
+    tasks_table = models.Task.__table__
+    result = await db.execute(
+        insert(tasks_table).returning(tasks_table.c.id, sort_by_parameter_order=True),
+        rows
+    )
+    task_ids = result.scalars().all()
+    await task_output.record_whole(db, [
+        (task_id, streamed_text(await load_payload(row["output_data"])))
+        for task_id, task, row in zip(task_ids, batch.tasks, rows)
+        if row["cache_hit"] and task.task_type in STREAMING_TASK_TYPES
+    ])
+    await record_task_events(
+        db, [(task_id, current_user.id, row["status"]) for task_id, row in zip(task_ids, rows)]
+    )
+    await db.commit()
+    
+    hits = sum(1 for row in rows if row["cache_hit"])
+    if hits < len(rows):
+        task_queue.notify()
+    
+    message = f"Submitted {len(task_ids)} tasks"
+    if hits:
+        message += f" ({hits} completed from cache)"
+    return {
+        "success": True,
+        "message": message,
+        "data": {"task_ids": task_ids}
+    }
+
 @router.get("", response_model=schemas.TasksResponse)
 @router.get("/", response_model=schemas.TasksResponse)
 @router.get("/api/tasks", response_model=schemas.TasksResponse)
 @router.get("/api/tasks/", response_model=schemas.TasksResponse)
 async def list_tasks(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 100,
     status: Optional[str] = None,
     task_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     List all tasks for the current user with optional filters
     """
-    query = db.query(models.Task).filter(
+    query = select(models.Task).where(
         (models.Task.requester_id == current_user.id) |
         (models.Task.gpu.has(owner_id=current_user.id))
     )
@@ -94,7 +271,7 @@ async def list_tasks(
     if status is not None:
         try:
             status_enum = schemas.TaskStatus(status.lower())
-            query = query.filter(models.Task.status == status_enum)
+            query = query.where(models.Task.status == status_enum)
         except ValueError:
             # If status is not valid, return empty list
             return {
@@ -107,7 +284,7 @@ async def list_tasks(
     if task_type is not None:
         try:
             task_type_enum = schemas.TaskType(task_type.lower())
-            query = query.filter(models.Task.task_type == task_type_enum)
+            query = query.where(models.Task.task_type == task_type_enum)
         except ValueError:
             # If task type is not valid, return empty list
             return {
@@ -116,28 +293,142 @@ async def list_tasks(
                 "data": []
             }
     
-    tasks = query.order_by(models.Task.created_at.desc())\
-                 .offset(skip).limit(limit).all()
+    tasks, next_cursor = await fetch_page(db, query, models.Task, cursor, limit)
     
     return {
         "success": True,
         "message": f"Found {len(tasks)} tasks",
-        "data": tasks
+        "data": tasks,
+        "next_cursor": next_cursor
+    }
+
+def _resume_after(header_value: Optional[str], query_value: Optional[int]) -> Optional[int]:
+    # EventSource resends the last id it saw in Last-Event-ID when it reconnects
+    if header_value and header_value.strip().isdigit():
+        return int(header_value)
+    return query_value
+
+@router.get("/stream")
+async def stream_task_events(
+    request: Request,
+    task_id: Optional[int] = None,
+    last_event_id: Optional[int] = None,
+    token: Optional[str] = None
+):
+    """
+    Server-sent events with the current user's task state changes
+    
+    Authenticate with the Authorization header, or `token` for EventSource clients.
+    Resume with the Last-Event-ID header or `last_event_id`; filter with `task_id`.
+    """
+    current_user = await authenticate_token(token or request.headers.get("authorization"))
+    subscription = await task_events.subscribe(
+        current_user.id,
+        task_id=task_id,
+        last_event_id=_resume_after(request.headers.get("last-event-id"), last_event_id)
+    )
+    
+    async def event_stream():
+        last_id = 0
+        try:
+            yield "retry: 2000\n\n"
+            async for payload in subscription.events(heartbeat=settings.TASK_STREAM_HEARTBEAT_SECONDS):
+                if payload is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload["id"] < last_id:
+                    # A late commit; keep Last-Event-ID at the highest id so a resume does not repeat events
+                    yield f"event: task\ndata: {json.dumps(payload)}\n\n"
+                    continue
+                last_id = payload["id"]
+                yield f"id: {last_id}\nevent: task\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            task_events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/stream")
+async def stream_task_events_ws(
+    websocket: WebSocket,
+    task_id: Optional[int] = None,
+    last_event_id: Optional[int] = None,
+    token: Optional[str] = None
+):
+    """
+    WebSocket variant of /stream: one JSON message per task state change
+    """
+    try:
+        current_user = await authenticate_token(token or websocket.headers.get("authorization"))
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    subscription = await task_events.subscribe(current_user.id, task_id=task_id, last_event_id=last_event_id)
+    
+    async def watch_disconnect():
+        # Clients only listen; a receive returns when they go away
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+        task_events.unsubscribe(subscription)
+    
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        async for payload in subscription.events():
+            await websocket.send_json(payload)
+        if not watcher.done():
+            # Fell too far behind; the client reconnects with its last event id
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+    except Exception:
+        # The socket went away mid-send
+        pass
+    finally:
+        watcher.cancel()
+        task_events.unsubscribe(subscription)
+
+@router.get("/queue/metrics")
+async def read_queue_metrics(
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Task queue counters, fair-share lanes, queue-wait and time-to-first-chunk percentiles,
+    and result cache hit rates (admin only)
+    """
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return {
+        "success": True,
+        "message": "Queue metrics retrieved successfully",
+        "data": {
+            **task_queue.metrics(),
+            "stream": task_events.stats(),
+            "output_streams": task_output.stats(),
+            "result_cache": result_cache.stats()
+        }
     }
 
 @router.get("/{task_id}", response_model=schemas.TaskResponse)
 async def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get details of a specific task
     """
-    db_task = db.query(models.Task).filter(
+    result = await db.execute(select(models.Task).where(
         models.Task.id == task_id,
         models.Task.requester_id == current_user.id
-    ).first()
+    ))
+    db_task = result.scalars().first()
     
     if not db_task:
         raise HTTPException(
@@ -151,19 +442,150 @@ async def get_task(
         "data": db_task
     }
 
+async def _payload_response(request: Request, task_id: int, name: str, payload) -> Response:
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task has no {name} data"
+        )
+    if not is_blob_ref(payload):
+        # Small payloads live in the row
+        return JSONResponse(payload)
+    key = payload[BLOB_REF_KEY]
+    info = await asyncio.to_thread(blob_store.head_object, key)
+    if info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Task {name} data is no longer stored"
+        )
+    return RangeFileResponse(
+        lambda: blob_store.open_object(key),
+        info.size,
+        key,
+        request.headers,
+        media_type=payload.get("content_type") or "application/octet-stream",
+        filename=f"task-{task_id}-{name}.json",
+        accel_redirect=accel_redirect_path(key)
+    )
+
+@router.get("/{task_id}/input")
+async def download_task_input(
+    task_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Download a task's input data; large inputs stream from the blob store with Range support
+    """
+    input_data = (await db.execute(select(models.Task.input_data).where(
+        models.Task.id == task_id,
+        models.Task.requester_id == current_user.id
+    ))).first()
+    if input_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found or access denied"
+        )
+    return await _payload_response(request, task_id, "input", input_data[0])
+
+@router.get("/{task_id}/output")
+async def download_task_output(
+    task_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: models.User = Depends(get_current_active_user)
+):
+    """
+    Download a task's output data; large outputs stream from the blob store with Range support
+    """
+    output_data = (await db.execute(select(models.Task.output_data).where(
+        models.Task.id == task_id,
+        models.Task.requester_id == current_user.id
+    ))).first()
+    if output_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found or access denied"
+        )
+    return await _payload_response(request, task_id, "output", output_data[0])
+
+@router.get("/{task_id}/output/stream")
+async def stream_task_output(
+    task_id: int,
+    request: Request,
+    after: Optional[int] = None,
+    token: Optional[str] = None
+):
+    """
+    Follow a task's output while it runs (text generation streams token by token)
+    
+    With `Accept: text/event-stream` each chunk is a server-sent event whose id is
+    its sequence number; resume with Last-Event-ID or `after`. A `reset` event
+    means the task was retried and its output restarts, and `end` closes the
+    stream. Otherwise the text is sent as a plain chunked response.
+    """
+    current_user = await authenticate_token(token or request.headers.get("authorization"))
+    async with AsyncSessionLocal() as db:
+        owned = (await db.execute(select(models.Task.id).where(
+            models.Task.id == task_id,
+            models.Task.requester_id == current_user.id
+        ))).first()
+    if owned is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found or access denied"
+        )
+    after = _resume_after(request.headers.get("last-event-id"), after)
+    start = -1 if after is None else after
+    
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        async def text_stream():
+            async for chunk in task_output.read(task_id, start):
+                yield chunk.text
+        
+        return StreamingResponse(
+            text_stream(),
+            media_type="text/plain",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    async def event_stream():
+        yield "retry: 2000\n\n"
+        attempt = None
+        async for chunk in task_output.read(task_id, start, heartbeat=settings.TASK_STREAM_HEARTBEAT_SECONDS):
+            if chunk is None:
+                yield ": keep-alive\n\n"
+                continue
+            if attempt is not None and chunk.attempt != attempt:
+                yield f"event: reset\ndata: {json.dumps({'attempt': chunk.attempt})}\n\n"
+            attempt = chunk.attempt
+            yield f"id: {chunk.seq}\nevent: chunk\ndata: {json.dumps(chunk._asdict())}\n\n"
+        # The task's final status follows on /api/tasks/stream
+        yield "event: end\ndata: {}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/{task_id}/cancel", response_model=schemas.TaskResponse)
 async def cancel_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Cancel a pending or running task
     """
-    db_task = db.query(models.Task).filter(
-        models.Task.id == task_id,
-        models.Task.requester_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(models.Task).where(
+            models.Task.id == task_id,
+            models.Task.requester_id == current_user.id
+        )
+    )
+    db_task = result.scalars().first()
     
     if not db_task:
         raise HTTPException(
@@ -171,22 +593,18 @@ async def cancel_task(
             detail="Task not found or access denied"
         )
     
-    if db_task.status not in [schemas.TaskStatus.PENDING, schemas.TaskStatus.RUNNING]:
+    # Conditional on the task still being queued or running; a running task's
+    # GPU stays in use until its worker has stopped
+    if not await task_queue.cancel(db, db_task.id, current_user.id):
+        await db.rollback()
+        await db.refresh(db_task)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot cancel task with status {db_task.status}"
         )
     
-    # Update task status
-    db_task.status = schemas.TaskStatus.CANCELLED
-    db_task.updated_at = datetime.utcnow()
-    
-    # Mark GPU as available again
-    if db_task.gpu:
-        db_task.gpu.status = schemas.GPUStatus.AVAILABLE
-    
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
     
     return {
         "success": True,
@@ -197,17 +615,20 @@ async def cancel_task(
 @router.get("/gpu/{gpu_id}", response_model=schemas.TasksResponse)
 async def get_gpu_tasks(
     gpu_id: int,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: models.User = Depends(get_current_active_user)
 ):
     """
     Get all tasks for a specific GPU (only for GPU owner)
     """
     # Verify the GPU belongs to the current user
-    gpu = db.query(models.GPU).filter(
+    result = await db.execute(select(models.GPU).where(
         models.GPU.id == gpu_id,
         models.GPU.owner_id == current_user.id
-    ).first()
+    ))
+    gpu = result.scalars().first()
     
     if not gpu:
         raise HTTPException(
@@ -215,12 +636,12 @@ async def get_gpu_tasks(
             detail="GPU not found or access denied"
         )
     
-    tasks = db.query(models.Task).filter(
-        models.Task.gpu_id == gpu_id
-    ).order_by(models.Task.created_at.desc()).all()
+    query = select(models.Task).where(models.Task.gpu_id == gpu_id)
+    tasks, next_cursor = await fetch_page(db, query, models.Task, cursor, limit)
     
     return {
         "success": True,
         "message": f"Found {len(tasks)} tasks for GPU {gpu_id}",
-        "data": tasks
+        "data": tasks,
+        "next_cursor": next_cursor
     }
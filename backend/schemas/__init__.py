@@ -3,8 +3,15 @@ from .base import Token, TokenData, Message, ResponseModel, SortOrder
 
 # Import all schema modules
 from .user import User, UserCreate, UserInDB, UserUpdate, UserResponse, UsersResponse
-from .gpu import GPU, GPUCreate, GPUUpdate, GPUInDB, GPUResponse, GPUsResponse, GPUStatus, GPUDetailResponse
-from .task import Task, TaskCreate, TaskUpdate, TaskInDB, TaskResponse, TasksResponse, TaskStatus, TaskType
+from .gpu import (
+    GPU, GPUCreate, GPUUpdate, GPUInDB, GPUResponse, GPUsResponse, GPUStatus, GPUDetailResponse,
+    GPUSearchResult, GPUSearchResponse, ModelSuggestion, ModelSuggestionsResponse,
+    GPUHeartbeat, GPUHeartbeatMetrics, GPUHeartbeatBatch, GPUHeartbeatResult, GPUHeartbeatResponse
+)
+from .task import (
+    Task, TaskCreate, TaskUpdate, TaskInDB, TaskResponse, TasksResponse, TaskStatus, TaskType, TaskPriority, TaskCacheMode,
+    TaskBatchCreate, TaskBatchResult, TaskBatchResponse
+)
 from .payment import Payment, PaymentCreate, PaymentUpdate, PaymentInDB, PaymentResponse, PaymentsResponse, PaymentStatus
 from .llm_model import (
     LLMModelType, LLMModelBase, LLMModelCreate, LLMModelUpdate, 
@@ -28,7 +35,8 @@ __all__ = [
     
     # GPU
     'GPU', 'GPUCreate', 'GPUUpdate', 'GPUInDB', 'GPUResponse', 'GPUsResponse', 'GPUDetailResponse',
-    'GPUStatus',
+    'GPUStatus', 'GPUSearchResult', 'GPUSearchResponse', 'ModelSuggestion', 'ModelSuggestionsResponse',
+    'GPUHeartbeat', 'GPUHeartbeatMetrics', 'GPUHeartbeatBatch', 'GPUHeartbeatResult', 'GPUHeartbeatResponse',
     
     # LLM Models
     'LLMModelType', 'LLMModelBase', 'LLMModelCreate', 'LLMModelUpdate',
@@ -36,7 +44,7 @@ __all__ = [
     
     # Task
     'Task', 'TaskCreate', 'TaskUpdate', 'TaskInDB', 'TaskResponse', 'TasksResponse',
-    'TaskStatus', 'TaskType',
+    'TaskStatus', 'TaskType', 'TaskPriority', 'TaskCacheMode', 'TaskBatchCreate', 'TaskBatchResult', 'TaskBatchResponse',
     
     # Payment
     'Payment', 'PaymentCreate', 'PaymentUpdate', 'PaymentInDB', 'PaymentResponse', 
@@ -19,6 +19,7 @@ class ResponseModel(BaseModel):
     success: bool
     message: str
     data: Optional[Dict[str, Any]] = None
+    next_cursor: Optional[str] = None  # Opaque token for the next page of list endpoints
 
 class SortOrder(str, Enum):
     ASC = "asc"
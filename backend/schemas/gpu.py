@@ -80,6 +80,25 @@ class GPUCreate(GPUBase):
 class GPUUpdate(GPUBase):
     pass
 
+# Liveness and metrics reported by a provider host for one of its GPUs
+class GPUHeartbeatMetrics(BaseModel):
+    utilization_gpu: Optional[float] = Field(None, ge=0, le=100, description="GPU utilization in percent")
+    memory_used_gb: Optional[float] = Field(None, ge=0, description="VRAM in use in GB")
+    temperature_c: Optional[float] = Field(None, description="GPU temperature in degrees Celsius")
+    power_usage_w: Optional[float] = Field(None, ge=0, description="Power draw in Watts")
+
+class GPUHeartbeat(BaseModel):
+    gpu_id: int
+    status: Optional[GPUStatus] = Field(
+        None,
+        description="New status set by the provider (in_use is managed by the scheduler)"
+    )
+    metrics: Optional[GPUHeartbeatMetrics] = None
+
+# Reports for all GPUs of a host in one request
+class GPUHeartbeatBatch(BaseModel):
+    gpus: List[GPUHeartbeat] = Field(..., min_length=1)
+
 # Properties shared by models stored in DB
 class GPUInDBBase(GPUBase):
     id: int
@@ -105,6 +124,26 @@ class GPUResponse(ResponseModel):
 class GPUsResponse(ResponseModel):
     data: List[GPU]
 
+class GPUHeartbeatResult(BaseModel):
+    accepted: int  # Reports queued for the next flush
+    flush_interval_seconds: float
+
+class GPUHeartbeatResponse(ResponseModel):
+    data: GPUHeartbeatResult
+
+class GPUSearchResult(GPU):
+    score: float = Field(..., description="Relevance score; higher is a better match")
+
+class GPUSearchResponse(ResponseModel):
+    data: List[GPUSearchResult]
+
+class ModelSuggestion(BaseModel):
+    model: str
+    count: int = Field(..., description="Number of GPUs with this model")
+
+class ModelSuggestionsResponse(ResponseModel):
+    data: List[ModelSuggestion]
+
 class GPUWorkflowResponse(BaseModel):
     id: int
     workflow_type: str
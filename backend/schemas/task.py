@@ -17,6 +17,15 @@ class TaskType(str, Enum):
     MODEL_TRAINING = "model_training"
     OTHER = "other"
 
+class TaskPriority(str, Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
+class TaskCacheMode(str, Enum):
+    DEFAULT = "default"  # Reuse a cached result when the task type is cacheable
+    BYPASS = "bypass"  # Always run, and do not offer the result to the cache
+
 # Shared properties
 class TaskBase(BaseModel):
     title: Optional[str] = None
@@ -29,7 +38,20 @@ class TaskCreate(TaskBase):
     title: str
     task_type: TaskType
     input_data: Dict[str, Any]
+    priority: TaskPriority = TaskPriority.NORMAL  # Weight in the fair-share dispatcher
+    cache: TaskCacheMode = TaskCacheMode.DEFAULT  # Result cache behaviour for this submission
     gpu_id: Optional[int] = None  # If not provided, system will assign
+    # Placement requirements used by the scheduler
+    min_vram_gb: Optional[int] = Field(None, gt=0, description="Minimum GPU VRAM in GB")
+    max_price_per_hour: Optional[float] = Field(None, gt=0, description="Highest acceptable GPU price per hour")
+    placement_policy: Optional[str] = Field(
+        None,
+        description="best_fit_vram, cheapest or least_loaded (defaults to the server setting)"
+    )
+
+# Several tasks submitted in one request
+class TaskBatchCreate(BaseModel):
+    tasks: List[TaskCreate] = Field(..., min_length=1)
 
 # Properties to receive on task update
 class TaskUpdate(TaskBase):
@@ -43,7 +65,9 @@ class TaskInDBBase(TaskBase):
     requester_id: int
     gpu_id: Optional[int] = None
     status: TaskStatus = TaskStatus.PENDING
+    priority: TaskPriority = TaskPriority.NORMAL
     cost: float = 0.0
+    cache_hit: bool = False  # Completed from a cached result without running
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     created_at: datetime
@@ -66,3 +90,9 @@ class TaskResponse(ResponseModel):
 
 class TasksResponse(ResponseModel):
     data: List[Task]
+
+class TaskBatchResult(BaseModel):
+    task_ids: List[int]  # In the order the tasks were submitted
+
+class TaskBatchResponse(ResponseModel):
+    data: TaskBatchResult
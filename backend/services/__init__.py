@@ -1,3 +1,15 @@
-from .task_processor import process_task, process_payment
+from .task_processor import execute_task, process_payment
+from .gpu_details import gpu_details
+from .gpu_feed import gpu_feed
+from .gpu_history import gpu_history
+from .gpu_index import gpu_index
+from .gpu_telemetry import gpu_telemetry
+from .heartbeats import heartbeats
+from .liveness import liveness
+from .scheduler import scheduler
+from .task_queue import task_queue, WorkerPool
+from .task_events import task_events
+from .task_output import task_output
+from .blob_store import blob_store
 
-__all__ = ["process_task", "process_payment"]
+__all__ = ["execute_task", "process_payment", "gpu_details", "gpu_feed", "gpu_history", "gpu_index", "gpu_telemetry", "heartbeats", "liveness", "scheduler", "task_queue", "WorkerPool", "task_events", "task_output", "blob_store"]
@@ -0,0 +1,176 @@
+"""
+Content-addressed blob store for large task payloads.
+
+Task.input_data and Task.output_data stay small: a payload whose JSON encoding
+exceeds BLOB_SPILL_THRESHOLD_BYTES is written to the store under the SHA-256
+of its bytes, and the row keeps only a reference:
+
+    {"$blob": "<sha256 hex>", "size": 1048576, "content_type": "application/json"}
+
+Identical payloads are stored once. Blobs are immutable, so the key doubles
+as a strong ETag and downloads can be cached forever.
+
+The interface follows S3's object vocabulary (put/head/get/delete object) so
+an S3-compatible backend can replace the local filesystem one without
+touching callers; only LocalBlobStore exists today.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional
+
+from ..core.config import settings
+
+BLOB_REF_KEY = "$blob"
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+class BlobInfo(NamedTuple):
+    key: str  # SHA-256 hex digest of the content
+    size: int
+    content_type: str
+
+
+class BlobStore:
+    """Immutable, content-addressed object storage"""
+
+    def put_object(self, body: bytes, content_type: str = "application/octet-stream") -> BlobInfo:
+        """Store `body` under its digest; storing existing content is a no-op"""
+        raise NotImplementedError
+
+    def head_object(self, key: str) -> Optional[BlobInfo]:
+        """Size and type of a stored object, or None if it does not exist"""
+        raise NotImplementedError
+
+    def open_object(self, key: str) -> BinaryIO:
+        """Open a stored object for reading; raises FileNotFoundError if missing"""
+        raise NotImplementedError
+
+    def get_object(self, key: str) -> bytes:
+        with self.open_object(key) as stream:
+            return stream.read()
+
+    def delete_object(self, key: str) -> None:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of the object when the store is local, else None"""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blobs as files under `root`, fanned out as ab/cd/abcd...
+
+    Writes go to a temporary file in the target directory and are renamed into
+    place, so readers never observe a partial blob.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @staticmethod
+    def relative_path(key: str) -> str:
+        if len(key) != 64 or any(c not in "0123456789abcdef" for c in key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return f"{key[:2]}/{key[2:4]}/{key}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *self.relative_path(key).split("/"))
+
+    def put_object(self, body: bytes, content_type: str = "application/octet-stream") -> BlobInfo:
+        key = hashlib.sha256(body).hexdigest()
+        path = self._path(key)
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as tmp:
+                    tmp.write(body)
+                    tmp.flush()
+                    os.fsync(tmp.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return BlobInfo(key, len(body), content_type)
+
+    def head_object(self, key: str) -> Optional[BlobInfo]:
+        try:
+            size = os.path.getsize(self._path(key))
+        except (OSError, ValueError):
+            return None
+        # Only JSON payloads are spilled today; the row reference carries the type
+        return BlobInfo(key, size, "application/octet-stream")
+
+    def open_object(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete_object(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(BLOB_REF_KEY), str)
+
+
+def spill(payload: Optional[Dict[str, Any]], store: Optional[BlobStore] = None) -> Optional[Dict[str, Any]]:
+    """
+    Replace a payload too large for the row with a reference to a stored blob.
+
+    Small payloads, and payloads that are already references, are returned unchanged.
+    """
+    if payload is None or is_blob_ref(payload):
+        return payload
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(body) <= settings.BLOB_SPILL_THRESHOLD_BYTES:
+        return payload
+    info = (store or blob_store).put_object(body, JSON_CONTENT_TYPE)
+    return {BLOB_REF_KEY: info.key, "size": info.size, "content_type": info.content_type}
+
+
+def load(payload: Optional[Dict[str, Any]], store: Optional[BlobStore] = None) -> Optional[Dict[str, Any]]:
+    """Inverse of spill(): the full payload behind a reference"""
+    if not is_blob_ref(payload):
+        return payload
+    return json.loads((store or blob_store).get_object(payload[BLOB_REF_KEY]))
+
+
+def accel_redirect_path(key: str, store: Optional[BlobStore] = None) -> Optional[str]:
+    """nginx internal location serving the blob, when BLOB_ACCEL_REDIRECT_PREFIX is set"""
+    store = store or blob_store
+    if not settings.BLOB_ACCEL_REDIRECT_PREFIX or not isinstance(store, LocalBlobStore):
+        return None
+    return settings.BLOB_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + store.relative_path(key)
+
+
+async def spill_payload(payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """spill() off the event loop (hashing and writes block)"""
+    if payload is None:
+        return payload
+    return await asyncio.to_thread(spill, payload)
+
+
+async def spill_payloads(payloads: List[Optional[Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+    """spill() many payloads with a single hop off the event loop"""
+    return await asyncio.to_thread(lambda: [spill(payload) for payload in payloads])
+
+
+async def load_payload(payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not is_blob_ref(payload):
+        return payload
+    return await asyncio.to_thread(load, payload)
+
+
+blob_store: BlobStore = LocalBlobStore(settings.BLOB_STORE_PATH)
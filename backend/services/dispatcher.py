@@ -0,0 +1,91 @@
+"""
+Weighted fair-share dispatch order for the task queue.
+
+Each task type has its own lane, so short inference jobs never wait behind
+training runs. Within a lane, pending tasks form one flow per
+(requester, priority), and flows are served by deficit round robin: every
+round a flow earns its priority's weight in credit, and each dispatched task
+costs one credit. A requester with thousands of queued tasks therefore gets
+the same share as one with a single task at the same priority, and a HIGH
+flow gets four times the share of a LOW one.
+
+The state is per process; several worker processes each run the same
+schedule over the shared queue, which keeps the overall share approximately fair.
+"""
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Tuple
+
+from ..models.task import TaskPriority, TaskType
+
+# Credit a flow earns per round, relative to other priorities
+PRIORITY_WEIGHTS: Dict[TaskPriority, int] = {
+    TaskPriority.HIGH: 4,
+    TaskPriority.NORMAL: 2,
+    TaskPriority.LOW: 1,
+}
+
+FlowKey = Tuple[int, TaskPriority]  # (requester_id, priority)
+
+
+class FairShareLane:
+    """Deficit round robin over the pending flows of one task type"""
+
+    def __init__(self, task_type: TaskType):
+        self.task_type = task_type
+        self._ring: Deque[FlowKey] = deque()
+        self._deficits: Dict[FlowKey, float] = {}
+        self.refreshed_at = 0.0
+        # Set when a claim found nothing; idle workers skip the database until notified
+        self.drained_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def sync(self, active: Iterable[FlowKey]) -> None:
+        """Replace the flow set with the flows that currently have pending tasks"""
+        active = list(dict.fromkeys(active))
+        current = set(active)
+        for flow in list(self._ring):
+            if flow not in current:
+                self.drop(flow)
+        for flow in active:
+            if flow not in self._deficits:
+                # Newcomers join at the back with no credit, like any DRR arrival
+                self._ring.append(flow)
+                self._deficits[flow] = 0.0
+        self.refreshed_at = time.monotonic()
+
+    def order(self) -> List[FlowKey]:
+        """
+        Flows in the order to try for the next dispatch.
+
+        The first flow is the one DRR entitles to the next task; the rest are
+        fallbacks in round order in case it turns out to have nothing left.
+        """
+        if not self._ring:
+            return []
+        # Hand out credit round by round until the head flow can afford a task
+        head = self._ring[0]
+        if self._deficits[head] < 1:
+            while True:
+                self._ring.rotate(-1)
+                head = self._ring[0]
+                self._deficits[head] += PRIORITY_WEIGHTS.get(head[1], 1)
+                if self._deficits[head] >= 1:
+                    break
+        return list(self._ring)
+
+    def charge(self, flow: FlowKey) -> None:
+        """Spend one credit for a task dispatched from `flow`"""
+        if flow in self._deficits:
+            self._deficits[flow] -= 1
+
+    def drop(self, flow: FlowKey) -> None:
+        """Forget a flow with no pending tasks; it forfeits unused credit"""
+        if flow in self._deficits:
+            del self._deficits[flow]
+            self._ring.remove(flow)
+
+    def stats(self) -> Dict[str, int]:
+        return {"flows": len(self._ring)}
@@ -0,0 +1,230 @@
+"""
+Pre-serialized GPU detail documents for GET /api/gpus/{gpu_id}/details.
+
+A miss loads the GPU together with its workflows and models in one round trip
+(both collections are joined eagerly; a GPU has only a handful of each) and
+serializes them to JSON once. Hits reuse those bytes and only add the
+caller's permissions. An entry is used while:
+
+- the GPU's version in services.gpu_index is unchanged; every committed write
+  to the gpus row bumps it, including the Core UPDATEs of the scheduler,
+  heartbeats and liveness, and
+- no workflow or model of the GPU has been committed since it was built
+  (collected by the ORM session hooks below).
+
+Changes committed by other processes reach both through services.gpu_feed,
+within about GPU_FEED_POLL_SECONDS. Versions are read before the load, so a
+change racing with it only makes the entry look older than it is. Nothing is
+cached while the index is not serving. Entries also expire after
+GPU_DETAIL_CACHE_TTL_SECONDS, which bounds how long a load from a lagging
+replica can go unnoticed.
+"""
+import itertools
+import threading
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from pydantic_core import to_json
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from .. import models
+from ..core.cache import TTLCache
+from ..core.config import settings
+from .gpu_feed import DETAILS_SCOPE, gpu_feed, record_gpu_feed
+from .gpu_index import gpu_index
+
+_CHANGED_KEY = "gpu_detail_changes"
+_BULK_KEY = "gpu_detail_bulk_change"
+
+_RESPONSE_PREFIX = b'{"success":true,"message":"GPU details retrieved successfully","data":'
+
+
+class GPUDetail(NamedTuple):
+    owner_id: int
+    # Serialized {"gpu", "workflows", "models"} object, left open for the permissions
+    body: bytes
+
+
+def _document(gpu: models.GPU) -> Dict[str, Any]:
+    return {
+        "gpu": {
+            "id": gpu.id,
+            "name": gpu.name,
+            "model": gpu.model,
+            "vram_gb": gpu.vram_gb,
+            "price_per_hour": gpu.price_per_hour,
+            "status": gpu.status.value,
+            "os": gpu.os,
+            "cpu_model": gpu.cpu_model,
+            "cpu_cores": gpu.cpu_cores,
+            "ram_gb": gpu.ram_gb,
+            "storage_gb": gpu.storage_gb,
+            "network_speed_mbps": gpu.network_speed_mbps,
+            "specs": gpu.specs or {},
+            "created_at": gpu.created_at,
+            "updated_at": gpu.updated_at
+        },
+        "workflows": [
+            {
+                "id": wf.id,
+                "workflow_type": wf.workflow_type.value,
+                "status": wf.status.value,
+                "config": wf.config or {},
+                "created_at": wf.created_at,
+                "updated_at": wf.updated_at
+            }
+            for wf in sorted(gpu.supported_workflows, key=lambda wf: wf.id)
+        ],
+        "models": [
+            {
+                "id": model.id,
+                "model_type": model.model_type,
+                "model_name": model.model_name,
+                "model_path": model.model_path,
+                "is_active": model.is_active,
+                "created_at": model.created_at,
+                "updated_at": model.updated_at
+            }
+            for model in sorted(gpu.installed_models, key=lambda model: model.id)
+        ]
+    }
+
+
+class GPUDetailCache:
+    """Detail documents per GPU, serialized once and invalidated on change"""
+
+    def __init__(self):
+        self._documents = TTLCache(
+            maxsize=settings.GPU_DETAIL_CACHE_MAX_ENTRIES,
+            ttl=settings.GPU_DETAIL_CACHE_TTL_SECONDS
+        )
+        self._lock = threading.Lock()
+        self._changes = 0
+        # gpu_id -> self._changes when its workflows or models last changed
+        self._related: Dict[int, int] = {}
+        # Bumped by bulk changes, which cannot be attributed to GPUs
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, gpu_id: int) -> Optional[Tuple[str, int, int]]:
+        gpu_version = gpu_index.etag(gpu_id)
+        if gpu_version is None:
+            return None
+        with self._lock:
+            return gpu_version, self._generation, self._related.get(gpu_id, 0)
+
+    async def get(self, db: AsyncSession, gpu_id: int) -> Optional[GPUDetail]:
+        """The GPU's detail document, or None if there is no such GPU"""
+        version = self._version(gpu_id)
+        if version is not None:
+            entry = self._documents.get(gpu_id)
+            if entry is not None and entry[0] == version:
+                with self._lock:
+                    self.hits += 1
+                return entry[1]
+        with self._lock:
+            self.misses += 1
+
+        result = await db.execute(
+            select(models.GPU)
+            .options(
+                joinedload(models.GPU.supported_workflows),
+                joinedload(models.GPU.installed_models)
+            )
+            .where(models.GPU.id == gpu_id)
+        )
+        gpu = result.unique().scalar_one_or_none()
+        if gpu is None:
+            return None
+        detail = GPUDetail(gpu.owner_id, to_json(_document(gpu))[:-1])
+        if version is not None:
+            self._documents.set(gpu_id, (version, detail))
+        return detail
+
+    @staticmethod
+    def render(detail: GPUDetail, permissions: Dict[str, bool]) -> bytes:
+        """The complete response body for one caller"""
+        return b"".join((_RESPONSE_PREFIX, detail.body, b',"permissions":', to_json(permissions), b"}}"))
+
+    def invalidate(self, gpu_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._changes += 1
+            for gpu_id in gpu_ids:
+                self._related[gpu_id] = self._changes
+        for gpu_id in gpu_ids:
+            self._documents.pop(gpu_id)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._generation += 1
+        self._documents.clear()
+
+    async def apply_remote(self, gpu_ids: Optional[Set[int]]) -> None:
+        """Drop the documents of GPUs changed by other processes; None drops all"""
+        if gpu_ids is None:
+            self.invalidate_all()
+        else:
+            self.invalidate(gpu_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "size": len(self._documents),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+gpu_details = GPUDetailCache()
+gpu_feed.subscribe(DETAILS_SCOPE, gpu_details.apply_remote)
+
+
+# ORM hooks: collect the GPUs whose workflows or models changed on flush, invalidate on commit
+
+@event.listens_for(Session, "after_flush")
+def _collect_detail_changes(session, flush_context):
+    flushed = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (models.GPUWorkflow, models.LLMModel)):
+            gpu_id = inspect(obj).dict.get("gpu_id")
+            if gpu_id is None:
+                session.info[_BULK_KEY] = True
+                record_gpu_feed(session, DETAILS_SCOPE, None)
+            else:
+                session.info.setdefault(_CHANGED_KEY, set()).add(gpu_id)
+                flushed.add(gpu_id)
+    if flushed:
+        record_gpu_feed(session, DETAILS_SCOPE, flushed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_detail_changes(orm_execute_state):
+    # ORM-enabled INSERT/UPDATE/DELETE statements (including Query.update/delete) bypass the flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (models.GPUWorkflow, models.LLMModel):
+        orm_execute_state.session.info[_BULK_KEY] = True
+        record_gpu_feed(orm_execute_state.session, DETAILS_SCOPE, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_detail_changes(session):
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if session.info.pop(_BULK_KEY, False):
+        gpu_details.invalidate_all()
+    elif changed:
+        gpu_details.invalidate(changed)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_detail_changes(session, transaction):
+    # Anything still queued when the outermost transaction ends was rolled back
+    if transaction.parent is None:
+        session.info.pop(_CHANGED_KEY, None)
+        session.info.pop(_BULK_KEY, None)
@@ -0,0 +1,197 @@
+"""
+Cross-process feed of GPU changes.
+
+GPUs are written by every API process and by standalone task workers
+(`python -m backend.worker`), whose claims and releases change GPU status.
+Each process applies its own commits to its in-memory GPU state from ORM
+session hooks. To see everyone else's, every transaction that changes a GPU
+also appends one gpu_changes row per GPU, and each API process tails that
+table every GPU_FEED_POLL_SECONDS and passes the GPUs changed elsewhere to
+the consumers of their scope:
+
+- "gpu": the gpus row; services.gpu_index reloads those rows.
+- "details": the GPU's workflows and models; services.gpu_details drops
+  their documents.
+
+Writers call `record_gpu_feed` within their transaction and the rows are
+written in that transaction, so rolled back work never shows up. Rows
+that commit out of id order are still picked up (core.sequence_tail).
+"""
+import asyncio
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from ..core.sequence_tail import SequenceTail
+from ..database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+_changes = models.GPUChange.__table__
+
+_FEED_KEY = "gpu_feed"
+
+GPU_SCOPE = "gpu"
+DETAILS_SCOPE = "details"
+
+# Identifies this process's rows, which its own session hooks have applied already
+ORIGIN = secrets.token_hex(8)
+
+# Rows read per tail query
+_PAGE_SIZE = 1000
+
+# How long an id skipped by the tail is watched for a late commit
+_LATE_COMMIT_SECONDS = 30
+
+# How often old rows are pruned
+_PRUNE_INTERVAL_SECONDS = 600
+
+# Called with the ids of the GPUs changed elsewhere, or None if all of them may have
+Consumer = Callable[[Optional[Set[int]]], Awaitable[None]]
+
+
+def record_gpu_feed(session: Session, scope: str, gpu_ids: Optional[Iterable[int]]) -> None:
+    """
+    Queue feed rows for GPUs changed in the session's transaction; None means all GPUs
+    """
+    pending = session.info.setdefault(_FEED_KEY, {})
+    if gpu_ids is None:
+        pending[scope] = None
+        return
+    ids = pending.setdefault(scope, set())
+    if ids is not None:
+        ids.update(gpu_ids)
+
+
+class GPUChangeFeed:
+    """Tails gpu_changes and hands other processes' changes to subscribed consumers"""
+
+    def __init__(self):
+        self._consumers: Dict[str, List[Consumer]] = {}
+        self._tail: Optional[SequenceTail] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pruned_at = 0.0
+        self.received = 0
+
+    def subscribe(self, scope: str, consumer: Consumer) -> None:
+        self._consumers.setdefault(scope, []).append(consumer)
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _start_position(self, db) -> int:
+        # Recent transactions may still be committing rows below the highest id; start before them
+        since = datetime.utcnow() - timedelta(seconds=_LATE_COMMIT_SECONDS)
+        first_recent = (await db.execute(
+            select(func.min(_changes.c.id)).where(_changes.c.created_at >= since)
+        )).scalar()
+        if first_recent is not None:
+            return first_recent - 1
+        return (await db.execute(select(func.max(_changes.c.id)))).scalar() or 0
+
+    async def poll(self) -> None:
+        """Deliver the changes other processes committed since the last poll"""
+        changed: Dict[str, Optional[Set[int]]] = {}
+        async with AsyncSessionLocal() as db:
+            if self._tail is None:
+                self._tail = SequenceTail(await self._start_position(db), grace=_LATE_COMMIT_SECONDS)
+            after = None
+            while True:
+                query = select(_changes.c.id, _changes.c.gpu_id, _changes.c.scope, _changes.c.origin).where(
+                    self._tail.condition(_changes.c.id)
+                )
+                if after is not None:
+                    query = query.where(_changes.c.id > after)
+                rows = (await db.execute(query.order_by(_changes.c.id).limit(_PAGE_SIZE))).all()
+                for row in rows:
+                    if not self._tail.accept(row.id) or row.origin == ORIGIN:
+                        continue
+                    self.received += 1
+                    if row.gpu_id is None:
+                        changed[row.scope] = None
+                    elif changed.get(row.scope, ()) is not None:
+                        changed.setdefault(row.scope, set()).add(row.gpu_id)
+                if len(rows) < _PAGE_SIZE:
+                    break
+                after = rows[-1].id
+
+        for scope, gpu_ids in changed.items():
+            for consumer in self._consumers.get(scope, ()):
+                try:
+                    await consumer(gpu_ids)
+                except Exception:
+                    logger.exception("Could not apply %s changes from other processes", scope)
+
+    async def _prune(self) -> None:
+        self._pruned_at = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.GPU_FEED_RETENTION_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(_changes).where(_changes.c.created_at < cutoff))
+            await db.commit()
+
+    async def _poll_loop(self) -> None:
+        while True:
+            try:
+                await self.poll()
+                if time.monotonic() - self._pruned_at >= _PRUNE_INTERVAL_SECONDS:
+                    await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("GPU change feed poll failed")
+            await asyncio.sleep(settings.GPU_FEED_POLL_SECONDS)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "last_change_id": self._tail.last_id if self._tail else 0,
+            "received": self.received,
+            "late": self._tail.late if self._tail else 0,
+        }
+
+
+gpu_feed = GPUChangeFeed()
+
+
+# Rows queued by Core UPDATEs are written just before commit; those queued by
+# the after_flush hooks of ORM changes, after the flush (including the one
+# commit performs)
+
+@event.listens_for(Session, "after_flush_postexec")
+@event.listens_for(Session, "before_commit")
+def _write_gpu_feed(session, flush_context=None):
+    pending = session.info.pop(_FEED_KEY, None)
+    if not pending:
+        return
+    rows = []
+    for scope, gpu_ids in pending.items():
+        if gpu_ids is None:
+            rows.append({"gpu_id": None, "scope": scope, "origin": ORIGIN})
+        else:
+            rows.extend({"gpu_id": gpu_id, "scope": scope, "origin": ORIGIN} for gpu_id in gpu_ids)
+    if rows:
+        session.execute(insert(_changes), rows)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_gpu_feed(session, transaction):
+    # Anything still queued when the outermost transaction ends was rolled back
+    if transaction.parent is None:
+        session.info.pop(_FEED_KEY, None)
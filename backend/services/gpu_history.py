@@ -0,0 +1,403 @@
+"""
+Rolled-up time series of GPU telemetry.
+
+Every GPU gets one fixed-size ring per rollup tier (GPU_TELEMETRY_HISTORY_TIERS;
+by default 1-second buckets for an hour, 1-minute buckets for a day and
+1-hour buckets for 30 days). A bucket holds the sum and the count of the
+samples of each metric that fell into it. A sample is added to its bucket in
+every tier as it arrives, so the coarse tiers are exact rollups of the fine
+ones without a compaction pass, and a query at any step is a mean of sums.
+Slots are reused as a ring wraps, so a series takes the same memory after an
+hour of uptime as after a year.
+
+Rings are plain `array` columns: the bucket numbers of a tier, then a sum and
+a count column per metric. Series are written to GPU_TELEMETRY_HISTORY_PATH
+in that columnar layout every GPU_TELEMETRY_HISTORY_FLUSH_SECONDS. At most
+GPU_TELEMETRY_HISTORY_MAX_SERIES series are held in memory; the least recently
+used one is written out and dropped, and read back when it is needed again.
+
+Host GPUs sampled by services.gpu_telemetry are recorded under the marketplace
+GPU whose specs carry their NVML UUID (`specs["uuid"]`); the links are looked
+up again every minute, so a newly registered GPU starts recording within one.
+"""
+import asyncio
+import logging
+import math
+import os
+import struct
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from .. import models
+from ..core.config import settings
+from ..database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+_gpus = models.GPU.__table__
+
+# Metrics kept for every GPU, in column order
+METRICS = ("utilization_gpu", "memory_used_gb", "temperature_c", "power_usage_w")
+
+# File header: magic, format version, metric count, tier count; then (step, buckets) per tier.
+# The columns follow in native byte order, tier by tier.
+_MAGIC = b"OGTS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHH")
+_TIER = struct.Struct("<II")
+
+_MAX_COUNT = 0xFFFF  # Samples a bucket can count ('H' columns)
+
+# Points returned by one query
+_MAX_POINTS = 10000
+
+# Window queried when `from` is not given
+_DEFAULT_SPAN_SECONDS = 3600
+
+# How long the UUID -> GPU id links of host devices are reused
+_LINK_REFRESH_SECONDS = 60
+
+
+def _epoch(value: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _covers(step: int, slots: int, start: float, now: float) -> bool:
+    """Whether a ring of `slots` buckets of `step` seconds reaches back to `start`"""
+    return now - start <= step * slots
+
+
+class _Tier:
+    """Ring of `slots` buckets of `step` seconds"""
+
+    __slots__ = ("step", "slots", "buckets", "sums", "counts")
+
+    def __init__(self, step: int, slots: int):
+        self.step = step
+        self.slots = slots
+        # Bucket number (timestamp // step) each slot holds; 0 = never used
+        self.buckets = array("I", [0]) * slots
+        self.sums = [array("f", [0.0]) * slots for _ in METRICS]
+        self.counts = [array("H", [0]) * slots for _ in METRICS]
+
+    def columns(self) -> List[array]:
+        return [self.buckets, *self.sums, *self.counts]
+
+    def add(self, timestamp: int, values: Sequence[Optional[float]]) -> None:
+        bucket = timestamp // self.step
+        slot = bucket % self.slots
+        held = self.buckets[slot]
+        if held != bucket:
+            if held > bucket:
+                # Older than the ring reaches
+                return
+            # The slot held a bucket one lap ago: start it over
+            self.buckets[slot] = bucket
+            for column in self.sums:
+                column[slot] = 0.0
+            for column in self.counts:
+                column[slot] = 0
+        for index, value in enumerate(values):
+            if value is not None and self.counts[index][slot] < _MAX_COUNT:
+                self.sums[index][slot] += value
+                self.counts[index][slot] += 1
+
+
+class _Series:
+    """History of one GPU across all tiers"""
+
+    __slots__ = ("tiers", "dirty")
+
+    def __init__(self, tiers: Iterable[Tuple[int, int]]):
+        self.tiers = [_Tier(step, slots) for step, slots in tiers]
+        self.dirty = False
+
+    def add(self, timestamp: int, metrics: Dict[str, Any]) -> None:
+        values = [metrics.get(name) for name in METRICS]
+        for tier in self.tiers:
+            tier.add(timestamp, values)
+        self.dirty = True
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_MAGIC, _VERSION, len(METRICS), len(self.tiers))]
+        parts.extend(_TIER.pack(tier.step, tier.slots) for tier in self.tiers)
+        parts.extend(column.tobytes() for tier in self.tiers for column in tier.columns())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, tiers: List[Tuple[int, int]]) -> Optional["_Series"]:
+        """Decode a series; None if it was written with other tiers or metrics"""
+        magic, version, metric_count, tier_count = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION or metric_count != len(METRICS) or tier_count != len(tiers):
+            return None
+        offset = _HEADER.size
+        for step, slots in tiers:
+            if _TIER.unpack_from(data, offset) != (step, slots):
+                return None
+            offset += _TIER.size
+        series = cls(tiers)
+        view = memoryview(data)
+        for tier in series.tiers:
+            for column in tier.columns():
+                size = column.itemsize * tier.slots
+                if offset + size > len(data):
+                    return None
+                column[:] = array(column.typecode)
+                column.frombytes(view[offset:offset + size])
+                offset += size
+        return series
+
+
+class GPUHistory:
+    """Telemetry history of every GPU, bounded in memory and persisted to disk"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.GPU_TELEMETRY_HISTORY_PATH
+        self._tiers = settings.gpu_telemetry_history_tiers
+        self._series: "OrderedDict[int, _Series]" = OrderedDict()
+        # Series evicted from memory but not written yet
+        self._unwritten: Dict[int, bytes] = {}
+        self._links: Dict[str, List[int]] = {}
+        self._linked_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.evicted = 0
+        self.loaded = 0
+        self.written = 0
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def _file(self, gpu_id: int) -> str:
+        return os.path.join(self.path, f"{gpu_id}.series")
+
+    def _read(self, gpu_id: int) -> Optional[bytes]:
+        try:
+            with open(self._file(gpu_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, series: Dict[int, bytes]) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        for gpu_id, data in series.items():
+            target = self._file(gpu_id)
+            temp = f"{target}.{os.getpid()}.tmp"
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, target)
+
+    async def _get(self, gpu_id: int, create: bool) -> Optional[_Series]:
+        series = self._series.get(gpu_id)
+        if series is None:
+            data = self._unwritten.pop(gpu_id, None)
+            unwritten = data is not None
+            if not unwritten:
+                data = await asyncio.to_thread(self._read, gpu_id)
+                if data is not None:
+                    self.loaded += 1
+            # Another caller may have loaded it meanwhile
+            series = self._series.get(gpu_id)
+            if series is None:
+                if data is not None:
+                    try:
+                        series = _Series.from_bytes(data, self._tiers)
+                    except (struct.error, ValueError):
+                        series = None
+                    if series is None:
+                        logger.warning("Discarding unreadable telemetry history of GPU %s", gpu_id)
+                    else:
+                        series.dirty = unwritten
+                if series is None:
+                    if not create:
+                        return None
+                    series = _Series(self._tiers)
+                self._series[gpu_id] = series
+                self._evict()
+        self._series.move_to_end(gpu_id)
+        return series
+
+    def _evict(self) -> None:
+        while len(self._series) > settings.GPU_TELEMETRY_HISTORY_MAX_SERIES:
+            gpu_id, series = self._series.popitem(last=False)
+            if series.dirty:
+                self._unwritten[gpu_id] = series.to_bytes()
+            self.evicted += 1
+
+    async def record(self, gpu_id: int, metrics: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        """Add one sample of a GPU's metrics (see METRICS; missing ones are skipped)"""
+        series = await self._get(gpu_id, create=True)
+        series.add(int(time.time() if timestamp is None else timestamp), metrics)
+        self.recorded += 1
+
+    async def _linked_gpus(self, uuids: List[str]) -> Dict[str, List[int]]:
+        if time.monotonic() - self._linked_at >= _LINK_REFRESH_SECONDS or not set(uuids) <= self._links.keys():
+            uuid = _gpus.c.specs["uuid"].as_string()
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(select(_gpus.c.id, uuid).where(uuid.in_(uuids)))).all()
+            links: Dict[str, List[int]] = {device: [] for device in uuids}
+            for gpu_id, device in rows:
+                links[device].append(gpu_id)
+            self._links = links
+            self._linked_at = time.monotonic()
+        return self._links
+
+    async def record_snapshot(self, snapshot) -> None:
+        """Record a services.gpu_telemetry snapshot under the marketplace GPUs it belongs to"""
+        if not snapshot.gpus or snapshot.sampled_at is None:
+            return
+        links = await self._linked_gpus([gpu["uuid"] for gpu in snapshot.gpus])
+        timestamp = _epoch(snapshot.sampled_at)
+        for gpu in snapshot.gpus:
+            for gpu_id in links.get(gpu["uuid"], ()):
+                await self.record(gpu_id, gpu, timestamp)
+
+    async def flush(self) -> None:
+        """Write every series changed since the last flush"""
+        pending = self._unwritten
+        self._unwritten = {}
+        for gpu_id, series in self._series.items():
+            if series.dirty:
+                pending[gpu_id] = series.to_bytes()
+                series.dirty = False
+        if not pending:
+            return
+        try:
+            await asyncio.to_thread(self._write, pending)
+        except Exception:
+            # Retried with the next flush, unless the series changed again meanwhile
+            for gpu_id, data in pending.items():
+                if gpu_id in self._series:
+                    self._series[gpu_id].dirty = True
+                else:
+                    self._unwritten.setdefault(gpu_id, data)
+            raise
+        self.written += len(pending)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.GPU_TELEMETRY_HISTORY_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not persist GPU telemetry history")
+
+    def _pick_tier(self, start: float, step: Optional[int], now: float) -> int:
+        """Index of the tier a query reads"""
+        covering = [
+            index for index, (tier_step, slots) in enumerate(self._tiers)
+            if _covers(tier_step, slots, start, now)
+        ] or [len(self._tiers) - 1]
+        if step is not None:
+            # The coarsest tier that still resolves the step has the fewest buckets to read
+            fitting = [index for index in covering if self._tiers[index][0] <= step]
+            if fitting:
+                return fitting[-1]
+        return covering[0]
+
+    async def query(
+        self,
+        gpu_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        step: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Mean of each metric per `step` seconds between `start` and `end`.
+
+        Reads the coarsest tier that still covers `start` at the requested
+        step. Without a step, the resolution of the finest such tier is used,
+        coarsened if needed to stay within the point limit. Buckets without
+        samples are None.
+
+        Raises:
+            ValueError: The range is empty or needs too many points.
+        """
+        now = time.time()
+        end_ts = _epoch(end) if end is not None else now
+        start_ts = _epoch(start) if start is not None else end_ts - _DEFAULT_SPAN_SECONDS
+        if start_ts >= end_ts:
+            raise ValueError("'from' must be before 'to'")
+        span = end_ts - start_ts
+        tier = self._pick_tier(start_ts, step, now)
+        resolution = self._tiers[tier][0]
+        if step is None:
+            step = resolution * max(1, math.ceil(span / _MAX_POINTS / resolution))
+        else:
+            # Whole buckets of the tier read
+            step = resolution * math.ceil(step / resolution)
+            if span / step > _MAX_POINTS:
+                raise ValueError(f"Too many points; use a step of at least {math.ceil(span / _MAX_POINTS)} seconds")
+
+        first = int(start_ts) // step
+        last = int(end_ts) // step
+        points = last - first + 1
+        sums = [[0.0] * points for _ in METRICS]
+        counts = [[0] * points for _ in METRICS]
+        series = await self._get(gpu_id, create=False)
+        if series is not None:
+            ring = series.tiers[tier]
+            newest = int(now) // ring.step
+            low = max(first * step // ring.step, newest - ring.slots + 1)
+            high = min(((last + 1) * step - 1) // ring.step, newest)
+            for bucket in range(low, high + 1):
+                slot = bucket % ring.slots
+                if ring.buckets[slot] != bucket:
+                    continue
+                point = bucket * ring.step // step - first
+                for index in range(len(METRICS)):
+                    count = ring.counts[index][slot]
+                    if count:
+                        sums[index][point] += ring.sums[index][slot]
+                        counts[index][point] += count
+
+        return {
+            "gpu_id": gpu_id,
+            "from": datetime.fromtimestamp(first * step, timezone.utc),
+            "to": datetime.fromtimestamp((last + 1) * step, timezone.utc),
+            "step": step,
+            "resolution": resolution,
+            "timestamps": [(first + point) * step for point in range(points)],
+            "metrics": {
+                name: [
+                    round(total / count, 2) if count else None
+                    for total, count in zip(sums[index], counts[index])
+                ]
+                for index, name in enumerate(METRICS)
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "series_in_memory": len(self._series),
+            "series_unwritten": len(self._unwritten),
+            "samples_recorded": self.recorded,
+            "series_evicted": self.evicted,
+            "series_loaded": self.loaded,
+            "series_written": self.written,
+        }
+
+
+gpu_history = GPUHistory()
@@ -0,0 +1,710 @@
+"""
+In-process GPU marketplace index.
+
+Answers the `list_gpus` filters (min VRAM, max price, model substring, status)
+and its newest-first keyset ordering from memory instead of scanning the gpus
+table on every browse:
+
+- VRAM, price and created_at are kept in sorted (key, id) arrays, so range
+  filters are a bisect and the newest-first walk is a reverse slice.
+- Each status has a bitmap over GPU ids with a running population count.
+- Model names are grouped by distinct value and indexed by trigram, so a
+  substring filter only compares the handful of distinct names.
+
+The index is loaded from the primary at startup and kept current by ORM session
+events: changes to GPU rows are collected on flush and applied on commit, so
+rolled back work never becomes visible. Bulk UPDATE/DELETE statements on the
+gpus table cannot be replayed row by row and mark the index stale instead;
+`list_gpus` then falls back to the database until a reload finishes.
+Each process keeps its own index. Changes committed by other processes
+(standalone task workers, other API processes) arrive through
+services.gpu_feed: their GPU rows are reloaded and applied like local
+changes, and their bulk changes trigger a full reload.
+
+Every committed change also bumps a version counter for the catalog and for the
+GPUs it touched, and every reload bumps all of them. `etag` turns these into the
+HTTP validators of GET /api/gpus/ and /api/gpus/{gpu_id}, so a client holding a
+current copy is answered 304 without a query or serialization. Changes made by
+other processes bump them when the feed delivers them, i.e. within about
+GPU_FEED_POLL_SECONDS.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import secrets
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from ..core.pagination import clamp_page_size, decode_cursor, encode_cursor
+from ..database import AsyncSessionLocal
+from .gpu_feed import GPU_SCOPE, gpu_feed, record_gpu_feed
+
+logger = logging.getLogger(__name__)
+
+COLUMNS: Tuple[str, ...] = tuple(column.key for column in models.GPU.__table__.columns)
+_ID = COLUMNS.index("id")
+_MODEL = COLUMNS.index("model")
+_VRAM = COLUMNS.index("vram_gb")
+_PRICE = COLUMNS.index("price_per_hour")
+_STATUS = COLUMNS.index("status")
+_CREATED_AT = COLUMNS.index("created_at")
+# GPUs reloaded per query when other processes changed them
+_RELOAD_CHUNK_SIZE = 500
+# Rows are stored as tuples of COLUMNS followed by the created_at sort key
+_TS = len(COLUMNS)
+
+# Columns that must be known before a GPU can be placed in the index
+_REQUIRED = ("id", "model", "vram_gb", "price_per_hour", "status", "created_at")
+# Repeated hardware strings are interned so a large catalog shares them
+_INTERNED = ("model", "os", "cpu_model")
+
+_CHANGES_KEY = "gpu_index_changes"
+_STALE_KEY = "gpu_index_stale"
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    """Sort key for created_at; naive datetimes are stored as UTC"""
+    if value is None:
+        return 0.0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _status_key(value: Any) -> str:
+    return getattr(value, "value", value)
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _SortedKeys:
+    """Parallel arrays of (key, id) pairs kept in ascending order"""
+
+    def __init__(self, typecode: str):
+        self.typecode = typecode
+        self.keys = array(typecode)
+        self.ids = array("q")
+
+    def build(self, pairs: List[Tuple[Any, int]]) -> None:
+        pairs.sort()
+        self.keys = array(self.typecode, [key for key, _ in pairs])
+        self.ids = array("q", [item_id for _, item_id in pairs])
+
+    def position(self, key: Any, item_id: int) -> int:
+        """Index of the first pair >= (key, item_id)"""
+        lo = bisect_left(self.keys, key)
+        hi = bisect_right(self.keys, key, lo)
+        return bisect_left(self.ids, item_id, lo, hi)
+
+    def add(self, key: Any, item_id: int) -> None:
+        pos = self.position(key, item_id)
+        self.keys.insert(pos, key)
+        self.ids.insert(pos, item_id)
+
+    def remove(self, key: Any, item_id: int) -> None:
+        pos = self.position(key, item_id)
+        if pos < len(self.ids) and self.ids[pos] == item_id and self.keys[pos] == key:
+            del self.keys[pos]
+            del self.ids[pos]
+
+    def count_at_least(self, key: Any) -> int:
+        return len(self.keys) - bisect_left(self.keys, key)
+
+    def count_at_most(self, key: Any) -> int:
+        return bisect_right(self.keys, key)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class _Bitmap:
+    """Set of non-negative ids stored one bit per id"""
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.count = 0
+
+    def add(self, item_id: int) -> None:
+        byte, bit = divmod(item_id, 8)
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte - len(self.bits) + 1))
+        if not self.bits[byte] >> bit & 1:
+            self.bits[byte] |= 1 << bit
+            self.count += 1
+
+    def discard(self, item_id: int) -> None:
+        byte, bit = divmod(item_id, 8)
+        if byte < len(self.bits) and self.bits[byte] >> bit & 1:
+            self.bits[byte] &= ~(1 << bit) & 0xFF
+            self.count -= 1
+
+    def __contains__(self, item_id: int) -> bool:
+        byte, bit = divmod(item_id, 8)
+        return byte < len(self.bits) and bool(self.bits[byte] >> bit & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        byte = 0
+        size = len(bits)
+        while byte < size:
+            value = bits[byte]
+            if value:
+                for bit in range(8):
+                    if value >> bit & 1:
+                        yield byte * 8 + bit
+            byte += 1
+
+
+class GPUCatalogIndex:
+    """
+    Memory-resident index over the gpus table for marketplace browsing.
+
+    All reads and writes take a single lock; queries never touch the database.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._lock = threading.RLock()
+        self._loading = False
+        self._pending: List[Optional[Dict[int, Optional[Dict[str, Any]]]]] = []
+        self._reload_task: Optional[asyncio.Task] = None
+        # Validators from another process or an earlier run never match this one's
+        self._instance = secrets.token_hex(4)
+        self._version = 0
+        self._base_version = 0  # Version of every GPU unchanged since the last load
+        self._row_versions: Dict[int, int] = {}
+        self._reset()
+
+    def _reset(self) -> None:
+        self._rows: Dict[int, tuple] = {}
+        self._vram = _SortedKeys("q")
+        self._price = _SortedKeys("d")
+        self._recent = _SortedKeys("d")
+        self._status: Dict[str, _Bitmap] = {}
+        self._models: Dict[str, Set[int]] = {}
+        self._trigram_models: Dict[str, Set[str]] = {}
+
+    # Maintenance
+
+    def _make_row(self, values: Dict[str, Any], old: Optional[tuple] = None) -> Optional[tuple]:
+        if old is None and any(name not in values for name in _REQUIRED):
+            return None
+        row = []
+        for i, name in enumerate(COLUMNS):
+            if name in values:
+                value = values[name]
+                if name in _INTERNED and isinstance(value, str):
+                    value = sys.intern(value)
+                row.append(value)
+            else:
+                row.append(old[i] if old is not None else None)
+        row.append(_timestamp(row[_CREATED_AT]))
+        return tuple(row)
+
+    def _link_model(self, gpu_id: int, model: str) -> None:
+        ids = self._models.get(model)
+        if ids is None:
+            ids = self._models[model] = set()
+            for trigram in _trigrams(model.lower()):
+                self._trigram_models.setdefault(trigram, set()).add(model)
+        ids.add(gpu_id)
+
+    def _unlink_model(self, gpu_id: int, model: str) -> None:
+        ids = self._models.get(model)
+        if ids is None:
+            return
+        ids.discard(gpu_id)
+        if not ids:
+            del self._models[model]
+            for trigram in _trigrams(model.lower()):
+                names = self._trigram_models.get(trigram)
+                if names is not None:
+                    names.discard(model)
+                    if not names:
+                        del self._trigram_models[trigram]
+
+    def _status_bitmap(self, status: str) -> _Bitmap:
+        bitmap = self._status.get(status)
+        if bitmap is None:
+            bitmap = self._status[status] = _Bitmap()
+        return bitmap
+
+    def _link(self, row: tuple) -> None:
+        gpu_id = row[_ID]
+        self._rows[gpu_id] = row
+        self._vram.add(row[_VRAM], gpu_id)
+        self._price.add(row[_PRICE], gpu_id)
+        self._recent.add(row[_TS], gpu_id)
+        self._status_bitmap(_status_key(row[_STATUS])).add(gpu_id)
+        self._link_model(gpu_id, row[_MODEL])
+
+    def _unlink(self, row: tuple) -> None:
+        gpu_id = row[_ID]
+        del self._rows[gpu_id]
+        self._vram.remove(row[_VRAM], gpu_id)
+        self._price.remove(row[_PRICE], gpu_id)
+        self._recent.remove(row[_TS], gpu_id)
+        self._status_bitmap(_status_key(row[_STATUS])).discard(gpu_id)
+        self._unlink_model(gpu_id, row[_MODEL])
+
+    def _update(self, old: tuple, new: tuple) -> None:
+        # Only touch the structures whose key actually changed
+        gpu_id = new[_ID]
+        self._rows[gpu_id] = new
+        if old[_VRAM] != new[_VRAM]:
+            self._vram.remove(old[_VRAM], gpu_id)
+            self._vram.add(new[_VRAM], gpu_id)
+        if old[_PRICE] != new[_PRICE]:
+            self._price.remove(old[_PRICE], gpu_id)
+            self._price.add(new[_PRICE], gpu_id)
+        if old[_TS] != new[_TS]:
+            self._recent.remove(old[_TS], gpu_id)
+            self._recent.add(new[_TS], gpu_id)
+        old_status, new_status = _status_key(old[_STATUS]), _status_key(new[_STATUS])
+        if old_status != new_status:
+            self._status_bitmap(old_status).discard(gpu_id)
+            self._status_bitmap(new_status).add(gpu_id)
+        if old[_MODEL] != new[_MODEL]:
+            self._unlink_model(gpu_id, old[_MODEL])
+            self._link_model(gpu_id, new[_MODEL])
+
+    def _apply_change(self, gpu_id: int, values: Optional[Dict[str, Any]]) -> None:
+        old = self._rows.get(gpu_id)
+        if values is None:
+            if old is not None:
+                self._unlink(old)
+            return
+        new = self._make_row(values, old)
+        if new is None:
+            # A GPU we cannot place without a reload (e.g. unloaded server defaults)
+            logger.warning("GPU %s changed with incomplete data; marking index stale", gpu_id)
+            self.ready = False
+            return
+        if old is None:
+            self._link(new)
+        else:
+            self._update(old, new)
+
+    def apply(self, changes: Dict[int, Optional[Dict[str, Any]]]) -> None:
+        """
+        Apply committed GPU changes: id -> changed column values, or None if deleted
+        """
+        with self._lock:
+            if self._loading:
+                self._pending.append(changes)
+                return
+            if not self.ready:
+                # Never loaded here (e.g. a worker process) or stale; the next load reads everything
+                return
+            self._version += 1
+            for gpu_id, values in changes.items():
+                self._apply_change(gpu_id, values)
+                if values is None:
+                    self._row_versions.pop(gpu_id, None)
+                else:
+                    self._row_versions[gpu_id] = self._version
+
+    def mark_stale(self) -> None:
+        """Stop serving queries until the next reload"""
+        with self._lock:
+            if self._loading:
+                # The snapshot being read may predate the bulk change
+                self._pending.append(None)
+            self.ready = False
+
+    # Loading
+
+    def _build(self, rows: Iterable[tuple]) -> None:
+        interned = [COLUMNS.index(name) for name in _INTERNED]
+        with self._lock:
+            self._reset()
+            vram, price, recent = [], [], []
+            for values in rows:
+                row = list(values)
+                for i in interned:
+                    if isinstance(row[i], str):
+                        row[i] = sys.intern(row[i])
+                row.append(_timestamp(row[_CREATED_AT]))
+                row = tuple(row)
+                gpu_id = row[_ID]
+                self._rows[gpu_id] = row
+                vram.append((row[_VRAM], gpu_id))
+                price.append((row[_PRICE], gpu_id))
+                recent.append((row[_TS], gpu_id))
+                self._status_bitmap(_status_key(row[_STATUS])).add(gpu_id)
+                self._link_model(gpu_id, row[_MODEL])
+            self._vram.build(vram)
+            self._price.build(price)
+            self._recent.build(recent)
+            self._version += 1
+            self._base_version = self._version
+            self._row_versions = {}
+
+            # Replay commits that landed while the snapshot was being read
+            stale = False
+            for changes in self._pending:
+                if changes is None:
+                    stale = True
+                    continue
+                for gpu_id, values in changes.items():
+                    self._apply_change(gpu_id, values)
+            self._pending = []
+            self._loading = False
+            self.ready = not stale
+
+    async def load(self) -> None:
+        """Rebuild the index from the primary database"""
+        with self._lock:
+            self._loading = True
+            self._pending = []
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(*models.GPU.__table__.columns))
+                rows = result.all()
+            await asyncio.to_thread(self._build, rows)
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._pending = []
+                self.ready = False
+            raise
+        logger.info("GPU index loaded with %d GPUs", len(self._rows))
+
+    async def apply_remote(self, gpu_ids: Optional[Set[int]]) -> None:
+        """
+        Apply GPU changes committed by other processes; None reloads everything
+        """
+        if gpu_ids is None:
+            self.mark_stale()
+            self.schedule_reload()
+            return
+        with self._lock:
+            if not self.ready and not self._loading:
+                return
+        ids = sorted(gpu_ids)
+        changes: Dict[int, Optional[Dict[str, Any]]] = dict.fromkeys(ids)
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(ids), _RELOAD_CHUNK_SIZE):
+                chunk = ids[start:start + _RELOAD_CHUNK_SIZE]
+                result = await db.execute(
+                    select(*models.GPU.__table__.columns).where(models.GPU.id.in_(chunk))
+                )
+                for row in result.mappings():
+                    changes[row["id"]] = dict(row)
+        self.apply(changes)
+
+    async def _reload_loop(self) -> None:
+        while True:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Error loading GPU index: {str(e)}", exc_info=True)
+            if settings.GPU_INDEX_RESYNC_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.GPU_INDEX_RESYNC_SECONDS)
+
+    def schedule_reload(self) -> None:
+        """Start a background reload unless one is already running"""
+        if not settings.GPU_INDEX_ENABLED:
+            return
+        if self._reload_task is not None and not self._reload_task.done():
+            if self._loading:
+                return
+            # Waiting for the next resync; reload now instead
+            self._reload_task.cancel()
+        self._reload_task = asyncio.get_running_loop().create_task(self._reload_loop())
+
+    async def stop(self) -> None:
+        if self._reload_task is not None and not self._reload_task.done():
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+
+    # Queries
+
+    def _matching_models(self, needle: str) -> Set[str]:
+        needle = needle.lower()
+        names: Optional[Iterable[str]] = None
+        if len(needle) >= 3:
+            candidates = None
+            for trigram in _trigrams(needle):
+                found = self._trigram_models.get(trigram)
+                if not found:
+                    return set()
+                candidates = set(found) if candidates is None else candidates & found
+            names = candidates
+        if names is None:
+            names = self._models.keys()
+        return {name for name in names if needle in name.lower()}
+
+    def query(
+        self,
+        min_vram: Optional[int] = None,
+        max_price: Optional[float] = None,
+        model: Optional[str] = None,
+        status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Filter GPUs newest first with the same cursor format as fetch_page.
+
+        Returns:
+            The GPUs of this page as column dicts and the next page cursor.
+        """
+        limit = clamp_page_size(limit)
+        bound = None
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            bound = (_timestamp(created_at), row_id)
+
+        with self._lock:
+            total = len(self._rows)
+            # Estimate how many GPUs each filter admits and drive from the smallest
+            drivers = []
+            models_matched = None
+            if min_vram is not None:
+                drivers.append((self._vram.count_at_least(min_vram), "vram"))
+            if max_price is not None:
+                drivers.append((self._price.count_at_most(max_price), "price"))
+            if status is not None:
+                bitmap = self._status.get(status)
+                drivers.append((bitmap.count if bitmap else 0, "status"))
+            if model is not None:
+                models_matched = self._matching_models(model)
+                drivers.append((sum(len(self._models[name]) for name in models_matched), "model"))
+
+            rows = self._rows
+            status_bitmap = self._status.get(status) if status is not None else None
+
+            def matches(row: tuple) -> bool:
+                if min_vram is not None and row[_VRAM] < min_vram:
+                    return False
+                if max_price is not None and row[_PRICE] > max_price:
+                    return False
+                if status is not None and (status_bitmap is None or row[_ID] not in status_bitmap):
+                    return False
+                if models_matched is not None and row[_MODEL] not in models_matched:
+                    return False
+                return True
+
+            wanted = limit + 1
+            page: List[tuple] = []
+            count, driver = min(drivers) if drivers else (total, None)
+            # Walking newest first inspects about wanted / selectivity rows (filters
+            # assumed independent); collecting the driver's candidates costs about count
+            selectivity = 1.0
+            for admitted, _ in drivers:
+                selectivity *= admitted / total if total else 0.0
+            walk_cost = wanted / selectivity if selectivity > 0 else total
+            if driver is None or walk_cost < count:
+                recent_ids = self._recent.ids
+                start = self._recent.position(*bound) if bound else len(recent_ids)
+                for i in range(start - 1, -1, -1):
+                    row = rows[recent_ids[i]]
+                    if matches(row):
+                        page.append(row)
+                        if len(page) == wanted:
+                            break
+            else:
+                if driver == "vram":
+                    start = len(self._vram) - count
+                    candidates: Iterable[int] = self._vram.ids[start:]
+                elif driver == "price":
+                    candidates = self._price.ids[:count]
+                elif driver == "status":
+                    candidates = iter(status_bitmap) if status_bitmap else ()
+                else:
+                    candidates = (gpu_id for name in models_matched for gpu_id in self._models[name])
+                selected = (rows[gpu_id] for gpu_id in candidates)
+                selected = (
+                    row for row in selected
+                    if matches(row) and (bound is None or (row[_TS], row[_ID]) < bound)
+                )
+                page = heapq.nlargest(wanted, selected, key=lambda row: (row[_TS], row[_ID]))
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            last = page[-1]
+            next_cursor = encode_cursor(last[_CREATED_AT], last[_ID])
+        return [dict(zip(COLUMNS, row[:_TS])) for row in page], next_cursor
+
+    def get(self, gpu_id: int) -> Optional[Dict[str, Any]]:
+        """Column values of one GPU, or None if it is not indexed"""
+        with self._lock:
+            row = self._rows.get(gpu_id)
+        return None if row is None else dict(zip(COLUMNS, row[:_TS]))
+
+    def etag(self, gpu_id: Optional[int] = None) -> Optional[str]:
+        """
+        Strong validator of the indexed catalog, or of one GPU.
+
+        Taken before reading, so a concurrent change can only make the tag
+        older than the data, never newer. None while the index is not
+        serving queries, or if the GPU is not indexed.
+        """
+        with self._lock:
+            if not self.ready:
+                return None
+            if gpu_id is None:
+                version = self._version
+            elif gpu_id in self._rows:
+                version = self._row_versions.get(gpu_id, self._base_version)
+            else:
+                return None
+        return f'"{self._instance}-{version}"'
+
+    def available_candidates(
+        self,
+        order: str,
+        min_vram: Optional[int] = None,
+        max_price: Optional[float] = None,
+        limit: int = 32,
+        exclude: Iterable[int] = ()
+    ) -> List[Tuple[int, int, float]]:
+        """
+        Collect up to `limit` AVAILABLE GPUs meeting the requirements.
+
+        Args:
+            order: "vram" scans smallest sufficient VRAM first, "price" cheapest
+                first, and "random" starts at a random point among GPUs with
+                enough VRAM.
+
+        Returns:
+            (gpu_id, vram_gb, price_per_hour) tuples in scan order.
+        """
+        exclude = set(exclude)
+        with self._lock:
+            available = self._status.get(models.GPUStatus.AVAILABLE.value)
+            if available is None or available.count == 0:
+                return []
+            rows = self._rows
+            if order == "price":
+                ids = self._price.ids
+                end = self._price.count_at_most(max_price) if max_price is not None else len(ids)
+                positions: Iterable[int] = range(end)
+            else:
+                ids = self._vram.ids
+                start = len(ids) - self._vram.count_at_least(min_vram) if min_vram is not None else 0
+                if order == "random" and start < len(ids):
+                    pivot = random.randrange(start, len(ids))
+                    positions = itertools.chain(range(pivot, len(ids)), range(start, pivot))
+                else:
+                    positions = range(start, len(ids))
+
+            found = []
+            for pos in positions:
+                gpu_id = ids[pos]
+                if gpu_id not in available or gpu_id in exclude:
+                    continue
+                row = rows[gpu_id]
+                if min_vram is not None and row[_VRAM] < min_vram:
+                    continue
+                if max_price is not None and row[_PRICE] > max_price:
+                    continue
+                found.append((gpu_id, row[_VRAM], row[_PRICE]))
+                if len(found) == limit:
+                    break
+            return found
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "gpus": len(self._rows),
+                "version": self._version,
+                "models": len(self._models),
+                "status_counts": {name: bitmap.count for name, bitmap in self._status.items()},
+            }
+
+
+gpu_index = GPUCatalogIndex()
+gpu_feed.subscribe(GPU_SCOPE, gpu_index.apply_remote)
+
+
+# ORM hooks: collect GPU changes per session on flush, publish them on commit
+
+def record_gpu_change(session: Session, gpu_id: int, values: Dict[str, Any]) -> None:
+    """
+    Queue a change made to a GPU row with a Core UPDATE so the index applies it on commit
+    """
+    changes = session.info.setdefault(_CHANGES_KEY, {})
+    pending = changes.get(gpu_id)
+    if pending is None:
+        changes[gpu_id] = dict(values)
+    else:
+        pending.update(values)
+    record_gpu_feed(session, GPU_SCOPE, [gpu_id])
+
+
+def _column_values(obj: models.GPU) -> Dict[str, Any]:
+    loaded = inspect(obj).dict
+    return {name: loaded[name] for name in COLUMNS if name in loaded}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_gpu_changes(session, flush_context):
+    changes = None
+    flushed = []
+    for obj in session.new.union(session.dirty):
+        if isinstance(obj, models.GPU):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            pending = changes.get(obj.id)
+            if pending is None:
+                changes[obj.id] = _column_values(obj)
+            else:
+                pending.update(_column_values(obj))
+            flushed.append(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, models.GPU):
+            if changes is None:
+                changes = session.info.setdefault(_CHANGES_KEY, {})
+            changes[obj.id] = None
+            flushed.append(obj.id)
+    if flushed:
+        record_gpu_feed(session, GPU_SCOPE, flushed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_gpu_bulk_changes(orm_execute_state):
+    # ORM-enabled INSERT/UPDATE/DELETE statements (including Query.update/delete) bypass the flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is models.GPU:
+        orm_execute_state.session.info[_STALE_KEY] = True
+        record_gpu_feed(orm_execute_state.session, GPU_SCOPE, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_gpu_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if session.info.pop(_STALE_KEY, False):
+        gpu_index.mark_stale()
+    elif changes:
+        gpu_index.apply(changes)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_gpu_changes(session, transaction):
+    # Anything still queued when the outermost transaction ends was rolled back
+    if transaction.parent is None:
+        session.info.pop(_CHANGES_KEY, None)
+        session.info.pop(_STALE_KEY, None)
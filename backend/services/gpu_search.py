@@ -0,0 +1,117 @@
+"""
+Ranked GPU search and model-name autocomplete.
+
+Backed by the FTS5 table on SQLite and by pg_trgm indexes on PostgreSQL (see
+models.gpu_search). Other databases fall back to unranked ILIKE matching.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import column, func, literal, literal_column, or_, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..models.gpu_search import POSTGRES_SEARCH_DOCUMENT
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# bm25 weights for the name, model and specs columns
+_BM25_WEIGHTS = (4.0, 8.0, 1.0)
+
+_fts = table("gpu_search", column("rowid"))
+_fts_match = literal_column("gpu_search").op("MATCH")
+
+
+def search_terms(text: str) -> List[str]:
+    """Split user input into plain word tokens (no search syntax survives)"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _phrase_prefix(terms: List[str]) -> str:
+    # A quoted phrase whose last token matches as a prefix, e.g. "rtx 40"*
+    return '"' + " ".join(terms) + '"*'
+
+
+def _all_terms_prefix(terms: List[str]) -> str:
+    # Every term must match; the last one may still be being typed
+    return " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+
+def _like_pattern(terms: List[str]) -> str:
+    return "%" + " ".join(terms) + "%"
+
+
+async def search_gpus(
+    db: AsyncSession,
+    q: str,
+    limit: int,
+    status: Optional[models.GPUStatus] = None
+) -> List[Tuple[models.GPU, float]]:
+    """
+    Search GPUs by name, model and specs.
+
+    Returns:
+        (GPU, score) pairs, best match first; higher scores are better matches.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        # bm25() is lower-is-better; negate it so every backend ranks descending
+        score = -func.bm25(literal_column("gpu_search"), *_BM25_WEIGHTS)
+        query = (
+            select(models.GPU, score.label("score"))
+            .join(_fts, _fts.c.rowid == models.GPU.id)
+            .where(_fts_match(_all_terms_prefix(terms)))
+        )
+    elif dialect == "postgresql":
+        document = literal_column(POSTGRES_SEARCH_DOCUMENT)
+        needle = " ".join(terms)
+        score = func.word_similarity(needle, document)
+        query = (
+            select(models.GPU, score.label("score"))
+            .where(or_(literal(needle).op("<%")(document), document.ilike(_like_pattern(terms))))
+        )
+    else:
+        score = literal(1.0)
+        pattern = _like_pattern(terms)
+        query = (
+            select(models.GPU, score.label("score"))
+            .where(or_(models.GPU.name.ilike(pattern), models.GPU.model.ilike(pattern)))
+        )
+
+    if status is not None:
+        query = query.where(models.GPU.status == status)
+    query = query.order_by(score.desc(), models.GPU.id.desc()).limit(limit)
+
+    result = await db.execute(query)
+    return [(gpu, float(match_score)) for gpu, match_score in result.all()]
+
+
+async def autocomplete_models(db: AsyncSession, prefix: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Suggest distinct model names containing a phrase that starts with `prefix`.
+
+    Returns:
+        {"model", "count"} dicts, most common model first.
+    """
+    terms = search_terms(prefix)
+    if not terms:
+        return []
+
+    count = func.count(models.GPU.id)
+    query = select(models.GPU.model, count.label("count"))
+    if db.bind.dialect.name == "sqlite":
+        query = (
+            query.join(_fts, _fts.c.rowid == models.GPU.id)
+            .where(_fts_match("model : " + _phrase_prefix(terms)))
+        )
+    else:
+        # Served by the model trigram index on PostgreSQL
+        query = query.where(models.GPU.model.ilike(_like_pattern(terms)))
+
+    query = query.group_by(models.GPU.model).order_by(count.desc(), models.GPU.model).limit(limit)
+    result = await db.execute(query)
+    return [{"model": model, "count": model_count} for model, model_count in result.all()]
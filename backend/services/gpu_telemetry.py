@@ -0,0 +1,284 @@
+"""
+Long-lived NVML telemetry for the GPUs of this host.
+
+One NVML session is opened when the service starts and kept until it stops.
+Device handles, and properties that cannot change while a device is attached
+(name, UUID, total memory, driver version), are read once. A background task
+then samples every device in parallel on a small thread pool (NVML calls
+block and release the GIL) each GPU_TELEMETRY_INTERVAL_SECONDS, and the API
+serves the latest snapshot from memory without touching NVML. Snapshots are
+also recorded into services.gpu_history.
+
+Devices are also indexed by UUID, so a single-GPU lookup is a dict hit plus
+the NVML calls for just the metrics asked for. NVML only enumerates devices
+when it is initialised, so the session is reopened every
+GPU_TELEMETRY_REFRESH_SECONDS, after a device stops answering, and when a
+lookup names a UUID that is not known yet, to pick up hot-plugged GPUs.
+
+The binding is injected: pass a module with pynvml's interface, or set
+GPU_TELEMETRY_NVML_MODULE, to run against a fake NVML on machines without GPUs.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from ..core.config import settings
+from ..utils.gpu_detection import (
+    load_nvml, read_device_info, read_device_metrics, read_device_sample, read_driver_version,
+    resolve_metric_groups
+)
+from .gpu_history import gpu_history
+
+logger = logging.getLogger(__name__)
+
+# Least time between re-enumerations triggered by lookups of unknown UUIDs
+_MISS_REFRESH_SECONDS = 5.0
+
+
+class Device(NamedTuple):
+    index: int
+    handle: Any
+    info: Dict[str, Any]  # read_device_info()
+
+
+class TelemetrySnapshot(NamedTuple):
+    gpus: List[Dict[str, Any]]
+    sampled_at: Optional[datetime]
+    duration_ms: float  # Time the sampling round took
+
+
+class GPUTelemetry:
+    """Background NVML sampler with the latest snapshot in memory"""
+
+    def __init__(
+        self,
+        nvml: Optional[ModuleType] = None,
+        interval: Optional[float] = None,
+        workers: Optional[int] = None
+    ):
+        self._nvml = nvml
+        self.interval = interval or settings.GPU_TELEMETRY_INTERVAL_SECONDS
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or settings.GPU_TELEMETRY_WORKERS,
+            thread_name_prefix="nvml"
+        )
+        self._initialized = False
+        self._devices: List[Device] = []
+        self._by_uuid: Dict[str, Device] = {}
+        self._opened_at = 0.0
+        self._stale = False  # A device stopped answering; re-enumerate before the next sample
+        # Serializes NVML session changes with sampling and lookups
+        self._session_lock = asyncio.Lock()
+        self._driver_version = "Unknown"
+        self._snapshot = TelemetrySnapshot([], None, 0.0)
+        self._sampled: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.error: Optional[str] = None  # Why NVML is unavailable, if it is
+        self.samples = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start sampling on the running event loop"""
+        if self.running:
+            return
+        self._sampled = asyncio.Event()
+        self._task = asyncio.create_task(self._sample_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._initialized:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._close)
+
+    async def latest(self, timeout: float = 5.0) -> TelemetrySnapshot:
+        """
+        The most recent snapshot; waits up to `timeout` for the first one after startup.
+
+        Raises:
+            RuntimeError: NVML is unavailable on this host.
+        """
+        if not self.running:
+            self.start()
+        if not self._sampled.is_set():
+            try:
+                await asyncio.wait_for(self._sampled.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self.error is not None and not self._initialized:
+            raise RuntimeError(self.error)
+        return self._snapshot
+
+    def _open(self) -> None:
+        # NVML calls block, so this runs on the sampler's thread pool
+        if self._nvml is None:
+            self._nvml = load_nvml(settings.GPU_TELEMETRY_NVML_MODULE)
+        nvml = self._nvml
+        nvml.nvmlInit()
+        try:
+            self._driver_version = read_driver_version(nvml)
+            devices = []
+            for index in range(nvml.nvmlDeviceGetCount()):
+                try:
+                    handle = nvml.nvmlDeviceGetHandleByIndex(index)
+                    devices.append(Device(index, handle, read_device_info(nvml, handle)))
+                except nvml.NVMLError as e:
+                    logger.error(f"Error getting info for GPU {index}: {str(e)}")
+        except Exception:
+            nvml.nvmlShutdown()
+            raise
+        self._devices = devices
+        self._by_uuid = {device.info['uuid']: device for device in devices}
+        self._initialized = True
+        self._opened_at = time.monotonic()
+        self._stale = False
+        self.error = None
+        logger.info("NVML telemetry attached to %s GPU(s)", len(devices))
+
+    def _close(self) -> None:
+        try:
+            self._nvml.nvmlShutdown()
+        except Exception:
+            pass
+        self._initialized = False
+        self._devices = []
+        self._by_uuid = {}
+
+    def _reopen(self) -> None:
+        if self._initialized:
+            self._close()
+        self._open()
+
+    async def _call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    def _sample_device(self, device: Device) -> Optional[Dict[str, Any]]:
+        try:
+            sample = read_device_sample(self._nvml, device.handle)
+        except self._nvml.NVMLError as e:
+            self.errors += 1
+            # Possibly unplugged or fallen off the bus
+            self._stale = True
+            logger.warning(f"Error sampling GPU {device.index}: {str(e)}")
+            return None
+        return {
+            'index': device.index,
+            **device.info,
+            **sample,
+            'driver_version': self._driver_version,
+            'status': 'available'
+        }
+
+    def _due_for_refresh(self) -> bool:
+        if self._stale:
+            return True
+        refresh = settings.GPU_TELEMETRY_REFRESH_SECONDS
+        return refresh > 0 and time.monotonic() - self._opened_at >= refresh
+
+    async def sample(self) -> TelemetrySnapshot:
+        """Take one sample of every device now and publish it"""
+        async with self._session_lock:
+            if not self._initialized:
+                await self._call(self._open)
+            elif self._due_for_refresh():
+                await self._call(self._reopen)
+            started = time.perf_counter()
+            results = await asyncio.gather(*(
+                self._call(self._sample_device, device)
+                for device in self._devices
+            ))
+        self._snapshot = TelemetrySnapshot(
+            [gpu for gpu in results if gpu is not None],
+            datetime.utcnow(),
+            round((time.perf_counter() - started) * 1000, 3)
+        )
+        self.samples += 1
+        return self._snapshot
+
+    async def get_gpu_by_uuid(self, uuid: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Read one GPU by UUID, fetching only the requested metrics.
+
+        Args:
+            fields: Metric groups or field names (see utils.gpu_detection.METRIC_GROUPS);
+                None reads all of them, an empty list only the cached properties.
+
+        Returns:
+            The GPU's properties and metrics, or None if no attached GPU has the UUID.
+
+        Raises:
+            ValueError: An unknown metric was requested.
+            RuntimeError: NVML is unavailable on this host.
+        """
+        groups = resolve_metric_groups(fields)
+        async with self._session_lock:
+            try:
+                if not self._initialized:
+                    await self._call(self._open)
+            except Exception as e:
+                raise RuntimeError(f"Failed to initialize NVML: {str(e)}")
+            device = self._by_uuid.get(uuid)
+            if device is None and time.monotonic() - self._opened_at >= _MISS_REFRESH_SECONDS:
+                # Maybe plugged in since the devices were enumerated
+                await self._call(self._reopen)
+                device = self._by_uuid.get(uuid)
+            if device is None:
+                return None
+            try:
+                metrics = await self._call(read_device_metrics, self._nvml, device.handle, groups)
+            except self._nvml.NVMLError as e:
+                logger.warning(f"Error reading GPU {uuid}: {str(e)}")
+                self._stale = True
+                return None
+        return {
+            'index': device.index,
+            **device.info,
+            **metrics,
+            'driver_version': self._driver_version,
+            'status': 'available'
+        }
+
+    async def _sample_loop(self) -> None:
+        while True:
+            try:
+                snapshot = await self.sample()
+                if settings.GPU_TELEMETRY_HISTORY_ENABLED:
+                    await gpu_history.record_snapshot(snapshot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._initialized:
+                    self.errors += 1
+                    logger.exception("GPU telemetry sample failed")
+                else:
+                    # No driver or GPUs on this host; retried next interval in case one appears
+                    if self.error is None:
+                        logger.warning(f"NVML telemetry unavailable: {str(e)}")
+                    self.error = f"Failed to initialize NVML: {str(e)}"
+            self._sampled.set()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "devices": len(self._devices),
+            "samples": self.samples,
+            "errors": self.errors,
+            "last_sample_ms": self._snapshot.duration_ms,
+            "sampled_at": self._snapshot.sampled_at.isoformat() if self._snapshot.sampled_at else None,
+            "error": self.error,
+        }
+
+
+gpu_telemetry = GPUTelemetry()
@@ -0,0 +1,226 @@
+"""
+Batched liveness, status and metric reports from provider hosts.
+
+A host reports all of its GPUs in one POST /api/gpus/heartbeat. Nothing is
+written per request: reports are coalesced per GPU in memory (the latest one
+wins; a reported status is kept until a later report replaces it) and
+flushed every HEARTBEAT_FLUSH_SECONDS in a single transaction:
+
+- gpu_heartbeats gets one bulk upsert per chunk of GPUs with their last-seen
+  time and latest metrics. The upsert never moves last_seen_at backwards, so
+  several API processes can flush reports for the same GPUs.
+- gpus gets one conditional UPDATE per reported status, which skips GPUs
+  already in that status and GPUs the scheduler has IN_USE. A GPU that
+  services.liveness took OFFLINE for missing heartbeats is made AVAILABLE
+  again unless its report says otherwise.
+
+Metrics are also recorded into services.gpu_history as they arrive, and
+every report pushes back the GPU's expiry in services.liveness.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .. import models
+from ..core.config import settings
+from ..database import AsyncSessionLocal
+from .gpu_history import gpu_history
+from .gpu_index import record_gpu_change
+from .liveness import liveness
+
+logger = logging.getLogger(__name__)
+
+_gpus = models.GPU.__table__
+_heartbeats = models.GPUHeartbeat.__table__
+
+# GPUs per upsert / UPDATE statement
+_FLUSH_CHUNK_SIZE = 500
+
+
+class HeartbeatReport(NamedTuple):
+    gpu_id: int
+    status: Optional[models.GPUStatus]
+    metrics: Optional[Dict[str, Any]]
+
+
+def _upsert(dialect: str, rows: List[Dict[str, Any]]):
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    statement = insert(_heartbeats).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[_heartbeats.c.gpu_id],
+        set_={
+            "last_seen_at": statement.excluded.last_seen_at,
+            # A report without metrics keeps the previous ones
+            "metrics": func.coalesce(statement.excluded.metrics, _heartbeats.c.metrics),
+            "expired_at": None,
+        },
+        where=_heartbeats.c.last_seen_at < statement.excluded.last_seen_at
+    )
+
+
+class Heartbeats:
+    """Coalescing buffer of provider reports with a periodic bulk flush"""
+
+    def __init__(self):
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.received = 0
+        self.flushed = 0
+        self.status_changes = 0
+        self.last_flush_ms = 0.0
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_lock is not None:
+            await self.flush()
+
+    async def submit(self, reports: Iterable[HeartbeatReport]) -> int:
+        """Queue reports for the next flush; returns how many were accepted"""
+        self.start()
+        now = datetime.utcnow()
+        seen = []
+        for report in reports:
+            pending = self._pending.get(report.gpu_id)
+            if pending is None:
+                pending = self._pending[report.gpu_id] = {"status": None, "metrics": None}
+            pending["last_seen_at"] = now
+            if report.status is not None:
+                pending["status"] = report.status
+            if report.metrics is not None:
+                pending["metrics"] = report.metrics
+                if settings.GPU_TELEMETRY_HISTORY_ENABLED:
+                    await gpu_history.record(report.gpu_id, report.metrics)
+            seen.append(report.gpu_id)
+        liveness.seen(seen)
+        self.received += len(seen)
+        return len(seen)
+
+    async def flush(self) -> None:
+        """Write every report queued since the last flush"""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            started = time.perf_counter()
+            try:
+                changed = await self._write(pending)
+            except Exception:
+                self._requeue(pending)
+                raise
+            self.flushed += len(pending)
+            self.status_changes += changed
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def _requeue(self, pending: Dict[int, Dict[str, Any]]) -> None:
+        # Reports that arrived during the failed flush are newer and win
+        for gpu_id, report in pending.items():
+            newer = self._pending.get(gpu_id)
+            if newer is None:
+                self._pending[gpu_id] = report
+                continue
+            for key in ("status", "metrics"):
+                if newer[key] is None:
+                    newer[key] = report[key]
+
+    async def _write(self, pending: Dict[int, Dict[str, Any]]) -> int:
+        gpu_ids = list(pending)
+        now = datetime.utcnow()
+        changed = 0
+        async with AsyncSessionLocal() as db:
+            dialect = db.bind.dialect.name
+            session = db.sync_session
+            for start in range(0, len(gpu_ids), _FLUSH_CHUNK_SIZE):
+                chunk = gpu_ids[start:start + _FLUSH_CHUNK_SIZE]
+                # GPUs deleted since they were reported are dropped
+                existing = (await db.execute(select(_gpus.c.id).where(_gpus.c.id.in_(chunk)))).scalars().all()
+                if not existing:
+                    continue
+                # Taken OFFLINE by services.liveness; the upsert clears expired_at
+                revived = (await db.execute(
+                    select(_heartbeats.c.gpu_id)
+                    .where(_heartbeats.c.gpu_id.in_(existing), _heartbeats.c.expired_at.is_not(None))
+                )).scalars().all()
+                await db.execute(_upsert(dialect, [
+                    {
+                        "gpu_id": gpu_id,
+                        "last_seen_at": pending[gpu_id]["last_seen_at"],
+                        "metrics": pending[gpu_id]["metrics"],
+                    }
+                    for gpu_id in existing
+                ]))
+
+                by_status = defaultdict(list)
+                for gpu_id in existing:
+                    if pending[gpu_id]["status"] is not None:
+                        by_status[pending[gpu_id]["status"]].append(gpu_id)
+                for new_status, ids in by_status.items():
+                    result = await db.execute(
+                        update(_gpus)
+                        .where(
+                            _gpus.c.id.in_(ids),
+                            _gpus.c.status.notin_([new_status, models.GPUStatus.IN_USE])
+                        )
+                        .values(status=new_status, updated_at=now)
+                        .returning(_gpus.c.id)
+                    )
+                    for gpu_id in result.scalars().all():
+                        record_gpu_change(session, gpu_id, {"status": new_status, "updated_at": now})
+                        changed += 1
+
+                back_online = [gpu_id for gpu_id in revived if pending[gpu_id]["status"] is None]
+                if back_online:
+                    # Unless its status was changed while it was gone
+                    result = await db.execute(
+                        update(_gpus)
+                        .where(_gpus.c.id.in_(back_online), _gpus.c.status == models.GPUStatus.OFFLINE)
+                        .values(status=models.GPUStatus.AVAILABLE, updated_at=now)
+                        .returning(_gpus.c.id)
+                    )
+                    for gpu_id in result.scalars().all():
+                        record_gpu_change(session, gpu_id, {"status": models.GPUStatus.AVAILABLE, "updated_at": now})
+                        changed += 1
+            await db.commit()
+        return changed
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.HEARTBEAT_FLUSH_SECONDS)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Kept in memory and retried with the next flush
+                logger.exception("Could not persist GPU heartbeats")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "flushed": self.flushed,
+            "status_changes": self.status_changes,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+heartbeats = Heartbeats()
@@ -0,0 +1,201 @@
+"""
+Heartbeat expiry for provider GPUs.
+
+Every heartbeat (re)schedules its GPU in a hierarchical timing wheel to
+expire HEARTBEAT_TIMEOUT_SECONDS later, so liveness costs O(1) per report and
+each tick only looks at the GPUs that fell due; the gpu_heartbeats table is
+read in full once, at startup, to pick up the GPUs reported before it.
+
+GPUs that fall due are confirmed against gpu_heartbeats with one conditional
+UPDATE per chunk, because another API process may have received (and
+flushed) their heartbeats; those are rescheduled from the stored last-seen
+time. The rest are set OFFLINE in bulk and their queued and running tasks
+are moved to other GPUs. The conditional UPDATE also makes sure that only
+one process acts on an expiry. A GPU comes back when it reports again.
+
+Only GPUs that have sent a heartbeat are tracked; GPUs listed without a
+heartbeat agent keep their status as before.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, update
+
+from .. import models
+from ..core.config import settings
+from ..core.timing_wheel import TimingWheel
+from ..database import AsyncSessionLocal
+from .gpu_index import record_gpu_change
+from .task_queue import task_queue
+
+logger = logging.getLogger(__name__)
+
+_gpus = models.GPU.__table__
+_heartbeats = models.GPUHeartbeat.__table__
+
+# GPUs per confirmation / status UPDATE
+_EXPIRE_CHUNK_SIZE = 500
+
+# Rows read per batch when the wheel is restored at startup
+_RESTORE_BATCH_SIZE = 5000
+
+
+def _epoch(value: datetime) -> float:
+    """Seconds since the epoch; naive datetimes are UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class LivenessMonitor:
+    """Marks GPUs OFFLINE when their heartbeats stop"""
+
+    def __init__(self):
+        self._wheel = TimingWheel(tick=settings.LIVENESS_TICK_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+        self.expired = 0
+        self.rescheduled = 0
+        self.requeued_tasks = 0
+        self.failed_tasks = 0
+        self.last_sweep_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.HEARTBEAT_TIMEOUT_SECONDS > 0
+
+    def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def seen(self, gpu_ids: Iterable[int], at: Optional[float] = None) -> None:
+        """Record heartbeats received at `at` (default: now)"""
+        if not self.enabled:
+            return
+        deadline = (time.time() if at is None else at) + settings.HEARTBEAT_TIMEOUT_SECONDS
+        for gpu_id in gpu_ids:
+            self._wheel.schedule(gpu_id, deadline)
+
+    async def _restore(self) -> None:
+        restored = 0
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(
+                select(_heartbeats.c.gpu_id, _heartbeats.c.last_seen_at)
+                .where(_heartbeats.c.expired_at.is_(None))
+            )
+            async for rows in result.partitions(_RESTORE_BATCH_SIZE):
+                for gpu_id, last_seen_at in rows:
+                    # Heartbeats received since startup are newer
+                    if gpu_id not in self._wheel:
+                        self._wheel.schedule(gpu_id, _epoch(last_seen_at) + settings.HEARTBEAT_TIMEOUT_SECONDS)
+                        restored += 1
+        logger.info("Liveness monitor tracking %d GPUs", restored)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._restore()
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Could not load GPU heartbeats; retrying")
+                await asyncio.sleep(settings.HEARTBEAT_TIMEOUT_SECONDS)
+        while True:
+            await asyncio.sleep(settings.LIVENESS_TICK_SECONDS)
+            due = self._wheel.advance()
+            if not due:
+                continue
+            started = time.perf_counter()
+            for start in range(0, len(due), _EXPIRE_CHUNK_SIZE):
+                chunk = due[start:start + _EXPIRE_CHUNK_SIZE]
+                try:
+                    await self._expire(chunk)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    # Looked at again on the next tick
+                    logger.exception("Could not expire GPU heartbeats")
+                    retry_at = time.time() + settings.LIVENESS_TICK_SECONDS
+                    for gpu_id in chunk:
+                        if gpu_id not in self._wheel:
+                            self._wheel.schedule(gpu_id, retry_at)
+            self.last_sweep_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    async def _expire(self, gpu_ids: List[int]) -> None:
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.HEARTBEAT_TIMEOUT_SECONDS)
+        async with AsyncSessionLocal() as db:
+            expired = (await db.execute(
+                update(_heartbeats)
+                .where(
+                    _heartbeats.c.gpu_id.in_(gpu_ids),
+                    _heartbeats.c.expired_at.is_(None),
+                    _heartbeats.c.last_seen_at < cutoff
+                )
+                .values(expired_at=now)
+                .returning(_heartbeats.c.gpu_id)
+            )).scalars().all()
+
+            # Reported through another process; GPUs already expired there (or deleted) are dropped
+            alive = set(gpu_ids).difference(expired)
+            if alive:
+                rows = (await db.execute(
+                    select(_heartbeats.c.gpu_id, _heartbeats.c.last_seen_at)
+                    .where(_heartbeats.c.gpu_id.in_(alive), _heartbeats.c.expired_at.is_(None))
+                )).all()
+                for gpu_id, last_seen_at in rows:
+                    # Unless this process has seen it again in the meantime
+                    if gpu_id not in self._wheel:
+                        self._wheel.schedule(gpu_id, _epoch(last_seen_at) + settings.HEARTBEAT_TIMEOUT_SECONDS)
+                        self.rescheduled += 1
+
+            requeued = failed = 0
+            if expired:
+                offline = (await db.execute(
+                    update(_gpus)
+                    .where(_gpus.c.id.in_(expired), _gpus.c.status != models.GPUStatus.OFFLINE)
+                    .values(status=models.GPUStatus.OFFLINE, updated_at=now)
+                    .returning(_gpus.c.id)
+                )).scalars().all()
+                session = db.sync_session
+                for gpu_id in offline:
+                    record_gpu_change(session, gpu_id, {"status": models.GPUStatus.OFFLINE, "updated_at": now})
+                requeued, failed = await task_queue.requeue_from_gpus(db, expired)
+            await db.commit()
+
+        if expired:
+            self.expired += len(expired)
+            self.requeued_tasks += requeued
+            self.failed_tasks += failed
+            logger.warning(
+                "%d GPUs missed their heartbeats and went offline; %d tasks requeued, %d failed",
+                len(expired), requeued, failed
+            )
+            if requeued:
+                task_queue.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tracked": len(self._wheel),
+            "expired": self.expired,
+            "rescheduled": self.rescheduled,
+            "requeued_tasks": self.requeued_tasks,
+            "failed_tasks": self.failed_tasks,
+            "last_sweep_ms": self.last_sweep_ms,
+        }
+
+
+liveness = LivenessMonitor()
@@ -0,0 +1,134 @@
+"""
+Result cache for deterministic tasks.
+
+Submissions of an opted-in task type (RESULT_CACHE_TASK_TYPES) are keyed by
+a SHA-256 over their canonical spec: the task type and the input_data, whose
+keys are sorted so that field order does not matter (the model to run is part
+of input_data). A submission whose key matches a task that completed within
+RESULT_CACHE_TTL_SECONDS is completed immediately with that task's output,
+at zero cost and without renting a GPU.
+
+The completed tasks themselves are the durable cache, found through
+ix_tasks_cache_key_completed_at, so results are shared by every API process
+and survive restarts. A bounded in-memory LRU in front of that lookup serves
+repeated keys without a query. Submissions with `cache: "bypass"` neither
+read the cache nor feed it.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..models.task import TaskStatus, TaskType
+
+_tasks = models.Task.__table__
+
+# Keys per IN (...) lookup
+_LOOKUP_CHUNK_SIZE = 500
+
+CACHE_BYPASS = "bypass"
+
+
+class ResultCache:
+    """Reuse of completed results for identical task specs"""
+
+    def __init__(self):
+        self._memory = TTLCache(maxsize=settings.RESULT_CACHE_MAX_ENTRIES, ttl=settings.RESULT_CACHE_TTL_SECONDS)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def key_for(self, task_type: TaskType, input_data: Optional[Dict[str, Any]], cache: Optional[str] = None) -> Optional[str]:
+        """
+        Cache key of a submission, or None if its result must not be reused.
+
+        Call with the input as submitted, before it is spilled to the blob store.
+        """
+        task_type = TaskType(task_type)
+        if task_type.value not in settings.result_cache_task_types:
+            return None
+        if cache == CACHE_BYPASS:
+            with self._lock:
+                self.bypassed += 1
+            return None
+        spec = json.dumps(
+            {"task_type": task_type.value, "input_data": input_data},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(spec.encode("utf-8")).hexdigest()
+
+    async def lookup(self, db: AsyncSession, keys: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Cached output_data for each key that has a fresh result.
+
+        Every non-None key counts as one hit or one miss.
+        """
+        keys = [key for key in keys if key is not None]
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            output_data = self._memory.get(key)
+            if output_data is None:
+                missing.append(key)
+            else:
+                found[key] = output_data
+
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.RESULT_CACHE_TTL_SECONDS)
+        for start in range(0, len(missing), _LOOKUP_CHUNK_SIZE):
+            chunk = missing[start:start + _LOOKUP_CHUNK_SIZE]
+            rows = (await db.execute(
+                select(_tasks.c.cache_key, _tasks.c.output_data, _tasks.c.completed_at)
+                .where(
+                    _tasks.c.cache_key.in_(chunk),
+                    _tasks.c.status == TaskStatus.COMPLETED,
+                    _tasks.c.completed_at >= cutoff,
+                    # Answers served from the cache do not extend the original's lifetime
+                    _tasks.c.cache_hit.is_(False)
+                )
+                .order_by(_tasks.c.completed_at)
+            )).all()
+            # Oldest first, so the newest result for a key wins
+            latest = {row.cache_key: row for row in rows}
+            for key, row in latest.items():
+                found[key] = row.output_data
+                self._memory.set(key, row.output_data, ttl=self._remaining_ttl(row.completed_at, now))
+
+        hits = sum(1 for key in keys if key in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    @staticmethod
+    def _remaining_ttl(completed_at: datetime, now: datetime) -> float:
+        if completed_at.tzinfo is not None:
+            now = now.replace(tzinfo=timezone.utc)
+        return settings.RESULT_CACHE_TTL_SECONDS - (now - completed_at).total_seconds()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, misses, bypassed = self.hits, self.misses, self.bypassed
+        lookups = hits + misses
+        return {
+            "task_types": settings.result_cache_task_types,
+            "hits": hits,
+            "misses": misses,
+            "bypassed": bypassed,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory": self._memory.stats(),
+        }
+
+
+result_cache = ResultCache()
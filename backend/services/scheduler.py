@@ -0,0 +1,440 @@
+"""
+GPU allocation scheduler.
+
+Candidate GPUs come from the in-memory availability index (services.gpu_index).
+An indexed SQL query is used instead while the index is loading, after a lost
+claim, and when the index has no match (it may not have seen GPUs freed by
+other processes yet). A placement policy ranks them, and the scheduler claims
+one with a conditional UPDATE:
+
+    UPDATE gpus SET status = 'IN_USE' WHERE id = :id AND status = 'AVAILABLE'
+
+Only one transaction can match that row, so concurrent submissions can never be
+placed on the same GPU. A submission that loses the race moves on to its next
+candidate. The claim is part of the caller's transaction and is undone if that
+transaction rolls back.
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from .gpu_index import gpu_index, record_gpu_change
+
+logger = logging.getLogger(__name__)
+
+_gpus = models.GPU.__table__
+
+_CLAIMS_KEY = "scheduler_claims"
+
+# GPU ids per bulk claim statement (keeps IN lists under driver parameter limits)
+_CLAIM_CHUNK_SIZE = 500
+
+
+class Candidate(NamedTuple):
+    gpu_id: int
+    vram_gb: int
+    price_per_hour: float
+
+
+class PlacementPolicy:
+    """
+    Decides which available GPU a task should run on.
+
+    Subclasses set `name`, pick how candidates are gathered with `scan_order`
+    ("vram", "price" or "random"), and order the gathered pool in `rank`.
+    """
+    name = ""
+    scan_order = "vram"
+    uses_load = False
+
+    def rank(self, candidates: List[Candidate], loads: Dict[int, int]) -> List[Candidate]:
+        return candidates
+
+
+class BestFitVRAM(PlacementPolicy):
+    """Smallest GPU that satisfies the VRAM requirement, keeping large cards free"""
+    name = "best_fit_vram"
+    scan_order = "vram"
+
+    def rank(self, candidates, loads):
+        return sorted(candidates, key=lambda c: (c.vram_gb, c.price_per_hour, c.gpu_id))
+
+
+class Cheapest(PlacementPolicy):
+    """Lowest price per hour"""
+    name = "cheapest"
+    scan_order = "price"
+
+    def rank(self, candidates, loads):
+        return sorted(candidates, key=lambda c: (c.price_per_hour, c.vram_gb, c.gpu_id))
+
+
+class LeastLoaded(PlacementPolicy):
+    """Fewest tasks assigned so far, spreading work across providers"""
+    name = "least_loaded"
+    scan_order = "random"
+    uses_load = True
+
+    def rank(self, candidates, loads):
+        return sorted(candidates, key=lambda c: (loads.get(c.gpu_id, 0), c.price_per_hour, c.gpu_id))
+
+
+PLACEMENT_POLICIES: Dict[str, PlacementPolicy] = {}
+
+
+def register_policy(policy: PlacementPolicy) -> None:
+    """Make a placement policy selectable by name"""
+    PLACEMENT_POLICIES[policy.name] = policy
+
+
+for _policy in (BestFitVRAM(), Cheapest(), LeastLoaded()):
+    register_policy(_policy)
+
+
+class GPUScheduler:
+    """
+    Places tasks on GPUs with race-free claims.
+
+    GPUs claimed by transactions that have not committed yet are remembered as
+    reserved, so concurrent submissions in this process skip them instead of
+    queueing behind the same row lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reserved: Set[int] = set()
+        self._loads: Dict[int, int] = {}
+        self._loads_seeded = False
+        self._seed_lock = asyncio.Lock()
+        self.claims = 0
+        self.conflicts = 0
+        self.no_capacity = 0
+
+    async def _seed_loads(self, db: AsyncSession) -> None:
+        # One placement counts existing assignments; concurrent ones wait for it
+        async with self._seed_lock:
+            if self._loads_seeded:
+                return
+            result = await db.execute(
+                select(models.Task.gpu_id, func.count(models.Task.id))
+                .where(models.Task.gpu_id.is_not(None))
+                .group_by(models.Task.gpu_id)
+            )
+            with self._lock:
+                for gpu_id, count in result.all():
+                    self._loads[gpu_id] = self._loads.get(gpu_id, 0) + count
+                self._loads_seeded = True
+
+    async def _candidates(
+        self,
+        db: AsyncSession,
+        policy: PlacementPolicy,
+        min_vram: Optional[int],
+        max_price: Optional[float],
+        exclude: Iterable[int],
+        use_index: bool = True,
+        pool: Optional[int] = None
+    ) -> List[Candidate]:
+        exclude = set(exclude)
+        with self._lock:
+            exclude |= self._reserved
+        pool = pool or settings.SCHEDULER_CANDIDATE_POOL
+
+        if use_index and gpu_index.ready:
+            found = gpu_index.available_candidates(
+                policy.scan_order, min_vram=min_vram, max_price=max_price,
+                limit=pool, exclude=exclude
+            )
+            if found:
+                return [Candidate(*values) for values in found]
+            # The index can miss GPUs freed by other processes; confirm with the database before giving up
+
+        query = select(_gpus.c.id, _gpus.c.vram_gb, _gpus.c.price_per_hour).where(
+            _gpus.c.status == models.GPUStatus.AVAILABLE
+        )
+        if min_vram is not None:
+            query = query.where(_gpus.c.vram_gb >= min_vram)
+        if max_price is not None:
+            query = query.where(_gpus.c.price_per_hour <= max_price)
+        if exclude:
+            query = query.where(_gpus.c.id.not_in(exclude))
+        if policy.scan_order == "price":
+            query = query.order_by(_gpus.c.price_per_hour, _gpus.c.vram_gb, _gpus.c.id)
+        elif policy.scan_order == "random":
+            query = query.order_by(func.random())
+        else:
+            query = query.order_by(_gpus.c.vram_gb, _gpus.c.price_per_hour, _gpus.c.id)
+        result = await db.execute(query.limit(pool))
+        candidates = [Candidate(*row) for row in result.all()]
+        if use_index and candidates:
+            # The index had none of these; catch it up so later placements find them in memory
+            await self._refresh_index(db, [candidate.gpu_id for candidate in candidates])
+        return candidates
+
+    async def claim(
+        self,
+        db: AsyncSession,
+        gpu_id: int,
+        min_vram: Optional[int] = None,
+        max_price: Optional[float] = None
+    ) -> bool:
+        """
+        Atomically move one GPU from AVAILABLE to IN_USE within the session's transaction.
+
+        Returns:
+            True if this transaction now owns the GPU.
+        """
+        # Reserve first so concurrent placements here skip this GPU while the UPDATE runs
+        with self._lock:
+            if gpu_id in self._reserved:
+                self.conflicts += 1
+                return False
+            self._reserved.add(gpu_id)
+        now = datetime.utcnow()
+        statement = update(_gpus).where(
+            _gpus.c.id == gpu_id,
+            _gpus.c.status == models.GPUStatus.AVAILABLE
+        )
+        if min_vram is not None:
+            statement = statement.where(_gpus.c.vram_gb >= min_vram)
+        if max_price is not None:
+            statement = statement.where(_gpus.c.price_per_hour <= max_price)
+        claimed = False
+        try:
+            result = await db.execute(
+                statement.values(status=models.GPUStatus.IN_USE, updated_at=now)
+            )
+            claimed = result.rowcount == 1
+        finally:
+            if not claimed:
+                with self._lock:
+                    self._reserved.discard(gpu_id)
+                    self.conflicts += 1
+        if not claimed:
+            await self._refresh_index(db, [gpu_id])
+            return False
+
+        session = db.sync_session
+        record_gpu_change(session, gpu_id, {"status": models.GPUStatus.IN_USE, "updated_at": now})
+        session.info.setdefault(_CLAIMS_KEY, set()).add(gpu_id)
+        with self._lock:
+            self.claims += 1
+        return True
+
+    async def release(self, db: AsyncSession, gpu_id: int) -> bool:
+        """
+        Move a GPU from IN_USE back to AVAILABLE within the session's transaction.
+
+        Returns:
+            True if the GPU was in use and is now available.
+        """
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(_gpus)
+            .where(_gpus.c.id == gpu_id, _gpus.c.status == models.GPUStatus.IN_USE)
+            .values(status=models.GPUStatus.AVAILABLE, updated_at=now)
+        )
+        if result.rowcount != 1:
+            return False
+        record_gpu_change(db.sync_session, gpu_id, {"status": models.GPUStatus.AVAILABLE, "updated_at": now})
+        return True
+
+    async def claim_many(
+        self,
+        db: AsyncSession,
+        gpu_ids: List[int],
+        min_vram: Optional[int] = None,
+        max_price: Optional[float] = None
+    ) -> List[int]:
+        """
+        Claim several GPUs with bulk conditional UPDATEs within the session's transaction.
+
+        Returns:
+            The ids this transaction now owns, in the order they were given.
+        """
+        with self._lock:
+            fresh = [gpu_id for gpu_id in dict.fromkeys(gpu_ids) if gpu_id not in self._reserved]
+            self._reserved.update(fresh)
+            self.conflicts += len(gpu_ids) - len(fresh)
+        now = datetime.utcnow()
+        session = db.sync_session
+        claimed: Set[int] = set()
+        try:
+            for start in range(0, len(fresh), _CLAIM_CHUNK_SIZE):
+                statement = update(_gpus).where(
+                    _gpus.c.id.in_(fresh[start:start + _CLAIM_CHUNK_SIZE]),
+                    _gpus.c.status == models.GPUStatus.AVAILABLE
+                )
+                if min_vram is not None:
+                    statement = statement.where(_gpus.c.vram_gb >= min_vram)
+                if max_price is not None:
+                    statement = statement.where(_gpus.c.price_per_hour <= max_price)
+                result = await db.execute(
+                    statement.values(status=models.GPUStatus.IN_USE, updated_at=now).returning(_gpus.c.id)
+                )
+                chunk_claimed = result.scalars().all()
+                # Track each chunk at once so a later failure still releases it with the transaction
+                session.info.setdefault(_CLAIMS_KEY, set()).update(chunk_claimed)
+                for gpu_id in chunk_claimed:
+                    record_gpu_change(session, gpu_id, {"status": models.GPUStatus.IN_USE, "updated_at": now})
+                claimed.update(chunk_claimed)
+        finally:
+            lost = [gpu_id for gpu_id in fresh if gpu_id not in claimed]
+            with self._lock:
+                self._reserved.difference_update(lost)
+                self.conflicts += len(lost)
+                self.claims += len(claimed)
+        if lost:
+            await self._refresh_index(db, lost)
+        return [gpu_id for gpu_id in fresh if gpu_id in claimed]
+
+    async def _refresh_index(self, db: AsyncSession, gpu_ids: List[int]) -> None:
+        # A lost claim means this process's index is behind (e.g. another worker
+        # took the GPU); reload the committed rows so later placements skip them
+        if not gpu_index.ready:
+            return
+        changes: Dict[int, Optional[Dict]] = dict.fromkeys(gpu_ids)
+        for start in range(0, len(gpu_ids), _CLAIM_CHUNK_SIZE):
+            result = await db.execute(
+                select(*_gpus.c).where(_gpus.c.id.in_(gpu_ids[start:start + _CLAIM_CHUNK_SIZE]))
+            )
+            for row in result:
+                changes[row.id] = dict(row._mapping)
+        gpu_index.apply(changes)
+
+    async def allocate(
+        self,
+        db: AsyncSession,
+        policy: PlacementPolicy,
+        min_vram: Optional[int] = None,
+        max_price: Optional[float] = None,
+        gpu_id: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Claim a GPU for a new task.
+
+        Args:
+            policy: Placement policy used to rank candidates.
+            gpu_id: Claim this specific GPU instead of placing the task.
+
+        Returns:
+            The claimed GPU id, or None if no matching GPU could be claimed.
+        """
+        if gpu_id is not None:
+            return gpu_id if await self.claim(db, gpu_id, min_vram, max_price) else None
+
+        if policy.uses_load and not self._loads_seeded:
+            await self._seed_loads(db)
+
+        tried: Set[int] = set()
+        attempts = 0
+        while attempts < settings.SCHEDULER_MAX_CLAIM_ATTEMPTS:
+            # A lost claim means the local index is behind another worker, so
+            # every later round reads candidates from the database instead
+            use_index = not tried
+            candidates = await self._candidates(
+                db, policy, min_vram, max_price, tried, use_index=use_index
+            )
+            if not candidates:
+                break
+            with self._lock:
+                loads = dict(self._loads) if policy.uses_load else {}
+            for candidate in policy.rank(candidates, loads):
+                tried.add(candidate.gpu_id)
+                attempts += 1
+                if await self.claim(db, candidate.gpu_id, min_vram, max_price):
+                    return candidate.gpu_id
+                if use_index or attempts >= settings.SCHEDULER_MAX_CLAIM_ATTEMPTS:
+                    break
+
+        with self._lock:
+            self.no_capacity += 1
+        return None
+
+    async def allocate_many(
+        self,
+        db: AsyncSession,
+        policy: PlacementPolicy,
+        count: int,
+        min_vram: Optional[int] = None,
+        max_price: Optional[float] = None
+    ) -> List[int]:
+        """
+        Claim GPUs for `count` tasks with the same requirements in one placement.
+
+        Candidates are gathered and ranked once for the whole group and claimed
+        in bulk; only GPUs lost to concurrent placements are replaced in later rounds.
+
+        Returns:
+            The claimed GPU ids, best ranked first; fewer than `count` if capacity ran out.
+        """
+        if policy.uses_load and not self._loads_seeded:
+            await self._seed_loads(db)
+
+        placed: List[int] = []
+        lost: Set[int] = set()
+        rounds = 0
+        while len(placed) < count and rounds < settings.SCHEDULER_MAX_CLAIM_ATTEMPTS:
+            needed = count - len(placed)
+            candidates = await self._candidates(
+                db, policy, min_vram, max_price, lost,
+                use_index=rounds == 0,
+                pool=needed + settings.SCHEDULER_CANDIDATE_POOL
+            )
+            rounds += 1
+            if not candidates:
+                break
+            with self._lock:
+                loads = dict(self._loads) if policy.uses_load else {}
+            chosen = [candidate.gpu_id for candidate in policy.rank(candidates, loads)[:needed]]
+            claimed = await self.claim_many(db, chosen, min_vram, max_price)
+            placed.extend(claimed)
+            lost.update(set(chosen).difference(claimed))
+
+        if len(placed) < count:
+            with self._lock:
+                self.no_capacity += 1
+        return placed
+
+    def _finish(self, claimed: Set[int], committed: bool) -> None:
+        with self._lock:
+            self._reserved.difference_update(claimed)
+            if committed:
+                for gpu_id in claimed:
+                    self._loads[gpu_id] = self._loads.get(gpu_id, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "claims": self.claims,
+                "conflicts": self.conflicts,
+                "no_capacity": self.no_capacity,
+                "reserved": len(self._reserved),
+            }
+
+
+scheduler = GPUScheduler()
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_claims(session):
+    claimed = session.info.pop(_CLAIMS_KEY, None)
+    if claimed:
+        scheduler._finish(claimed, committed=True)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_claims(session, transaction):
+    # Rolled back or abandoned transactions give their reservations back
+    if transaction.parent is None:
+        claimed = session.info.pop(_CLAIMS_KEY, None)
+        if claimed:
+            scheduler._finish(claimed, committed=False)
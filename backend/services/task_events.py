@@ -0,0 +1,331 @@
+"""
+Task state-change events and the in-process broadcaster behind /api/tasks/stream.
+
+Every transition (queued, running, completed, failed, cancelled, requeued) is
+appended to the task_events table in the same transaction that makes it, so
+events are never published for work that rolled back, and the event id is a
+global cursor that survives restarts.
+
+Each API process runs one broadcaster. It tails the table with a single
+indexed query, and fans new events out to the subscribers of their requester.
+Transitions committed in this process wake it immediately. Those made by
+separate worker processes arrive within TASK_EVENT_POLL_SECONDS.
+
+Ids are handed out on insert, not on commit, so on PostgreSQL an event can
+commit after a higher id has been read. The tail keeps re-reading the ids it
+skipped for a grace window (core.sequence_tail) and delivers such late
+events when they appear, out of id order.
+
+A subscriber that resumes from an event id first replays the missed events
+from the table, then switches to live delivery; events are delivered once
+each, including late events that commit while the replay runs. A subscriber
+that falls too far behind is disconnected; it reconnects and resumes from its
+last in-order event id (a late event committing while it is disconnected is
+not replayed).
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..core.config import settings
+from ..core.sequence_tail import SequenceTail
+from ..database import AsyncSessionLocal
+from ..models.task import TaskStatus
+
+logger = logging.getLogger(__name__)
+
+_events = models.TaskEvent.__table__
+
+_RECORDED_KEY = "task_events_recorded"
+
+# Rows read per tail or replay query
+_PAGE_SIZE = 1000
+
+# How often old events are pruned
+_PRUNE_INTERVAL_SECONDS = 3600
+
+# How long an id skipped by the tail is watched for a late commit
+_LATE_COMMIT_SECONDS = 30
+
+
+async def record_task_events(
+    db: AsyncSession,
+    events: Iterable[Tuple[int, int, TaskStatus]]
+) -> None:
+    """
+    Append (task_id, requester_id, status) transitions within the session's transaction
+    """
+    rows = [
+        {"task_id": task_id, "requester_id": requester_id, "status": TaskStatus(task_status)}
+        for task_id, requester_id, task_status in events
+    ]
+    if not rows:
+        return
+    await db.execute(insert(_events), rows)
+    db.sync_session.info[_RECORDED_KEY] = True
+
+
+def _serialize(row) -> Dict[str, Any]:
+    return {
+        "id": row.id,
+        "task_id": row.task_id,
+        "status": row.status.value,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+class Subscription:
+    """One client's view of the event stream"""
+
+    def __init__(
+        self,
+        broadcaster: "TaskEventBroadcaster",
+        requester_id: int,
+        task_id: Optional[int],
+        resume_after: Optional[int],
+        live_after: int,
+        pending: Set[int]
+    ):
+        self.broadcaster = broadcaster
+        self.requester_id = requester_id
+        self.task_id = task_id
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.TASK_STREAM_QUEUE_SIZE)
+        # Events in (resume_after, live_after] come from the table; later ones arrive live
+        self._replay_from = resume_after
+        self._live_after = live_after
+        # Ids in the replay range that had not committed yet; they may be both replayed and arrive live
+        self._pending = pending
+        self._replayed: Set[int] = set()
+
+    def matches(self, row) -> bool:
+        return self.task_id is None or row.task_id == self.task_id
+
+    def offer(self, payload: Dict[str, Any]) -> None:
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # Too far behind to buffer; the client resumes from its last event id
+            self.broadcaster.overflows += 1
+            self.broadcaster.unsubscribe(self)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            # Unblock a consumer waiting for the next event
+            self._queue.put_nowait({})
+        except asyncio.QueueFull:
+            pass
+
+    async def _replay(self) -> AsyncIterator[Dict[str, Any]]:
+        cursor = self._replay_from
+        while cursor is not None and cursor < self._live_after:
+            query = (
+                select(*_events.c)
+                .where(
+                    _events.c.requester_id == self.requester_id,
+                    _events.c.id > cursor,
+                    _events.c.id <= self._live_after
+                )
+                .order_by(_events.c.id)
+                .limit(_PAGE_SIZE)
+            )
+            if self.task_id is not None:
+                query = query.where(_events.c.task_id == self.task_id)
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(query)).all()
+            for row in rows:
+                if row.id in self._pending:
+                    self._replayed.add(row.id)
+                yield _serialize(row)
+            if len(rows) < _PAGE_SIZE:
+                break
+            cursor = rows[-1].id
+
+    async def events(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield events in id order; yields None after `heartbeat` idle seconds.
+
+        Ends when the subscription is closed (unsubscribed or overflowed).
+        """
+        async for payload in self._replay():
+            yield payload
+        while not self.closed:
+            try:
+                payload = await asyncio.wait_for(self._queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+            if self.closed:
+                break
+            if payload["id"] in self._replayed:
+                self._replayed.discard(payload["id"])
+                continue
+            yield payload
+
+
+class TaskEventBroadcaster:
+    """Tails task_events and fans new events out to in-process subscribers"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._tail: Optional[SequenceTail] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pruned_at = 0.0
+        self.published = 0
+        self.overflows = 0
+
+    def start(self) -> None:
+        """Start tailing on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._tail_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                self.unsubscribe(subscription)
+
+    def wake(self) -> None:
+        """Read new events now instead of at the next poll (safe from any thread)"""
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            if asyncio.get_running_loop() is loop:
+                wakeup.set()
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(wakeup.set)
+
+    async def subscribe(
+        self,
+        requester_id: int,
+        task_id: Optional[int] = None,
+        last_event_id: Optional[int] = None
+    ) -> Subscription:
+        """
+        Follow a requester's task events, optionally for one task only.
+
+        Args:
+            last_event_id: Replay events after this id before live ones.
+        """
+        self.start()
+        await self._ready.wait()
+        # Everything up to last_id has been dispatched except the tail's gaps,
+        # so it is the boundary between replayed and live events
+        live_after = self._tail.last_id
+        pending = set()
+        if last_event_id is not None:
+            pending = {row_id for row_id in self._tail.gaps() if row_id > last_event_id}
+        subscription = Subscription(self, requester_id, task_id, last_event_id, live_after, pending)
+        self._subscribers.setdefault(requester_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.close()
+        subscribers = self._subscribers.get(subscription.requester_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.requester_id]
+
+    async def _tail_loop(self) -> None:
+        while True:
+            try:
+                if self._tail is None:
+                    async with AsyncSessionLocal() as db:
+                        last_id = (await db.execute(select(func.max(_events.c.id)))).scalar() or 0
+                    self._tail = SequenceTail(last_id, grace=_LATE_COMMIT_SECONDS)
+                self._ready.set()
+                await self._read_new()
+                if time.monotonic() - self._pruned_at >= _PRUNE_INTERVAL_SECONDS:
+                    await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event tail failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.TASK_EVENT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _read_new(self) -> None:
+        after = None
+        while True:
+            query = select(*_events.c).where(self._tail.condition(_events.c.id))
+            if after is not None:
+                query = query.where(_events.c.id > after)
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(query.order_by(_events.c.id).limit(_PAGE_SIZE))).all()
+            for row in rows:
+                if not self._tail.accept(row.id):
+                    continue
+                subscribers = self._subscribers.get(row.requester_id)
+                if not subscribers:
+                    continue
+                payload = _serialize(row)
+                for subscription in list(subscribers):
+                    if subscription.matches(row):
+                        subscription.offer(payload)
+                        self.published += 1
+            if len(rows) < _PAGE_SIZE:
+                return
+            after = rows[-1].id
+
+    async def _prune(self) -> None:
+        self._pruned_at = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.TASK_EVENT_RETENTION_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(_events).where(_events.c.created_at < cutoff))
+            await db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "last_event_id": self._tail.last_id if self._tail else 0,
+            "late_events": self._tail.late if self._tail else 0,
+            "published": self.published,
+            "overflows": self.overflows,
+        }
+
+
+task_events = TaskEventBroadcaster()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_broadcaster(session):
+    if session.info.pop(_RECORDED_KEY, None):
+        task_events.wake()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_recorded(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_RECORDED_KEY, None)
@@ -0,0 +1,307 @@
+"""
+Streamed task output, readable while the task runs.
+
+Executors of streaming task types (text generation) append chunks, e.g.
+tokens, to an OutputStream instead of only returning the whole result at the
+end. Readers in the same process are woken on every append and read straight
+from memory. Chunks are also written to task_output_chunks in one batch per
+TASK_OUTPUT_FLUSH_SECONDS, so clients of other API processes, and clients
+that reconnect later, follow the same stream from the table.
+
+Chunks are numbered per task. A retried task streams again after the chunks
+of its earlier attempt, and every chunk carries its attempt, so readers can
+tell that the output restarted. Tasks answered from the result cache never
+run; their whole output is written as a single chunk when they are created.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+
+from .. import models
+from ..core.config import settings
+from ..core.utils import percentile
+from ..database import AsyncSessionLocal
+from ..models.task import TaskStatus, TaskType
+
+logger = logging.getLogger(__name__)
+
+_chunks = models.TaskOutputChunk.__table__
+_tasks = models.Task.__table__
+
+# Task types whose executors stream their output
+STREAMING_TASK_TYPES = {TaskType.TEXT_GENERATION}
+
+# Rows read per poll when following a stream from the table
+_PAGE_SIZE = 1000
+
+# Time-to-first-chunk samples kept for percentiles
+_LATENCY_SAMPLES = 1000
+
+# How often old chunks are pruned
+_PRUNE_INTERVAL_SECONDS = 3600
+
+_ACTIVE_STATUSES = (TaskStatus.PENDING, TaskStatus.RUNNING)
+
+
+class OutputChunk(NamedTuple):
+    seq: int
+    attempt: int
+    text: str
+
+
+class OutputStream:
+    """The chunks one attempt of a task has produced so far, in this process"""
+
+    def __init__(self, streams: "TaskOutputStreams", task_id: int, attempt: int, base_seq: int,
+                 submitted_at: Optional[datetime]):
+        self.streams = streams
+        self.task_id = task_id
+        self.attempt = attempt
+        self.base_seq = base_seq  # seq of chunks[0]; earlier seqs belong to previous attempts
+        self.chunks: List[str] = []
+        self.flushed = 0  # Leading chunks already in the table
+        self.closed = False
+        self._submitted_at = submitted_at
+        self._changed = asyncio.Event()
+
+    @property
+    def next_seq(self) -> int:
+        return self.base_seq + len(self.chunks)
+
+    def append(self, text: str) -> None:
+        """Publish the next piece of output"""
+        if self.closed:
+            raise RuntimeError(f"Output stream of task {self.task_id} is closed")
+        if not text:
+            return
+        if not self.chunks:
+            self.streams._record_first_chunk(self._submitted_at)
+        self.chunks.append(text)
+        self.streams.appended += 1
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def since(self, after: int) -> List[OutputChunk]:
+        start = max(after + 1 - self.base_seq, 0)
+        return [
+            OutputChunk(self.base_seq + index, self.attempt, text)
+            for index, text in enumerate(self.chunks[start:], start)
+        ]
+
+
+class TaskOutputStreams:
+    """Open output streams of this process, their batched persistence, and readers"""
+
+    def __init__(self):
+        self._streams: Dict[int, OutputStream] = {}
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pruned_at = 0.0
+        self._lock = threading.Lock()
+        self._first_chunk: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self.appended = 0
+        self.flushed = 0
+
+    def _start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_lock is None:
+            return
+        for stream in list(self._streams.values()):
+            stream.closed = True
+            stream._notify()
+        await self._flush(list(self._streams.values()))
+        self._streams.clear()
+
+    async def open(self, task_id: int, attempt: int, submitted_at: Optional[datetime] = None) -> OutputStream:
+        """Start streaming an attempt of a task; its chunks follow any earlier attempt's"""
+        self._start()
+        async with AsyncSessionLocal() as db:
+            last_seq = (await db.execute(
+                select(func.max(_chunks.c.seq)).where(_chunks.c.task_id == task_id)
+            )).scalar()
+        stream = OutputStream(self, task_id, attempt, 0 if last_seq is None else last_seq + 1, submitted_at)
+        self._streams[task_id] = stream
+        return stream
+
+    async def close(self, stream: OutputStream) -> None:
+        """
+        End a stream and persist what is left of it.
+
+        Call before the task's final status is committed: readers that follow
+        the table stop once they see a finished task.
+        """
+        stream.closed = True
+        stream._notify()
+        try:
+            await self._flush([stream])
+        except Exception:
+            # The full result still lands in output_data
+            logger.exception("Could not persist the output stream of task %s", stream.task_id)
+        # Late readers in this process are still served from memory for a while
+        asyncio.get_running_loop().call_later(settings.TASK_OUTPUT_MEMORY_SECONDS, self._forget, stream)
+
+    def _forget(self, stream: OutputStream) -> None:
+        if self._streams.get(stream.task_id) is stream:
+            del self._streams[stream.task_id]
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.TASK_OUTPUT_FLUSH_SECONDS)
+            try:
+                await self._flush([stream for stream in self._streams.values() if not stream.closed])
+                if time.monotonic() - self._pruned_at >= _PRUNE_INTERVAL_SECONDS:
+                    await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Unflushed chunks stay in memory and go out with the next batch
+                logger.exception("Could not persist streamed task output")
+
+    async def _flush(self, streams: List[OutputStream]) -> None:
+        async with self._flush_lock:
+            pending = [(stream, len(stream.chunks)) for stream in streams if stream.flushed < len(stream.chunks)]
+            if not pending:
+                return
+            rows = [
+                {
+                    "task_id": stream.task_id,
+                    "seq": stream.base_seq + index,
+                    "attempt": stream.attempt,
+                    "text": stream.chunks[index],
+                }
+                for stream, upto in pending
+                for index in range(stream.flushed, upto)
+            ]
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(_chunks), rows)
+                await db.commit()
+            for stream, upto in pending:
+                stream.flushed = upto
+            self.flushed += len(rows)
+
+    async def record_whole(self, db, outputs: Iterable[Tuple[int, Optional[str]]]) -> None:
+        """
+        Write (task_id, text) outputs of tasks that never ran (answered from the
+        result cache) as one chunk each, within the session's transaction
+        """
+        rows = [
+            {"task_id": task_id, "seq": 0, "attempt": 1, "text": text}
+            for task_id, text in outputs
+            if text
+        ]
+        if rows:
+            await db.execute(insert(_chunks), rows)
+
+    async def _prune(self) -> None:
+        self._pruned_at = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.TASK_OUTPUT_RETENTION_SECONDS)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(_chunks).where(_chunks.c.created_at < cutoff))
+            await db.commit()
+
+    async def read(
+        self,
+        task_id: int,
+        after: int = -1,
+        heartbeat: Optional[float] = None
+    ) -> AsyncIterator[Optional[OutputChunk]]:
+        """
+        Follow a task's output from the chunk after seq `after` until the task finishes.
+
+        Yields None after `heartbeat` idle seconds.
+        """
+        idle_since = time.monotonic()
+        finishing = False
+        while True:
+            stream = self._streams.get(task_id)
+            if stream is not None and after + 1 >= stream.base_seq:
+                # Produced in this process: serve from memory. Take the wakeup
+                # before the snapshot so appends made while yielding are not missed
+                changed = stream._changed
+                closed = stream.closed
+                for chunk in stream.since(after):
+                    after = chunk.seq
+                    yield chunk
+                if closed:
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                continue
+
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(_chunks.c.seq, _chunks.c.attempt, _chunks.c.text)
+                    .where(_chunks.c.task_id == task_id, _chunks.c.seq > after)
+                    .order_by(_chunks.c.seq)
+                    .limit(_PAGE_SIZE)
+                )).all()
+                task_status = None
+                if not rows:
+                    task_status = (await db.execute(
+                        select(_tasks.c.status).where(_tasks.c.id == task_id)
+                    )).scalar()
+            if rows:
+                for row in rows:
+                    after = row.seq
+                    yield OutputChunk(*row)
+                idle_since = time.monotonic()
+                continue
+            if finishing:
+                return
+            if task_status not in _ACTIVE_STATUSES:
+                # Chunks are committed before the final status; one more read catches the tail
+                finishing = True
+                continue
+            if heartbeat is not None and time.monotonic() - idle_since >= heartbeat:
+                idle_since = time.monotonic()
+                yield None
+            await asyncio.sleep(settings.TASK_OUTPUT_FLUSH_SECONDS)
+
+    def _record_first_chunk(self, submitted_at: Optional[datetime]) -> None:
+        if submitted_at is None:
+            return
+        now = datetime.now(timezone.utc) if submitted_at.tzinfo else datetime.utcnow()
+        with self._lock:
+            self._first_chunk.append(max((now - submitted_at).total_seconds(), 0.0))
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            samples = list(self._first_chunk)
+        return {
+            "open_streams": sum(1 for stream in self._streams.values() if not stream.closed),
+            "chunks_appended": self.appended,
+            "chunks_persisted": self.flushed,
+            # From submission to the first chunk a client can read
+            "time_to_first_chunk": {
+                "p50_seconds": round(percentile(samples, 0.50), 3),
+                "p95_seconds": round(percentile(samples, 0.95), 3),
+                "p99_seconds": round(percentile(samples, 0.99), 3),
+                "samples": len(samples),
+            },
+        }
+
+
+task_output = TaskOutputStreams()
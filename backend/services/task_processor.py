@@ -1,88 +1,72 @@
+import asyncio
 import time
 import random
-from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
 from sqlalchemy.orm import Session
 from .. import models, schemas
-from ..database import SessionLocal
 
-def process_task(db: Session, task_id: int):
+# Simulated model output
+MOCK_COMPLETION = (
+    "This is a mock response from the AI model. In a real implementation, "
+    "this would be the actual model output."
+)
+
+async def _generate(stream, duration: float) -> str:
+    # Emit the completion token by token over the run, as a model would
+    tokens = [word + " " for word in MOCK_COMPLETION.split(" ")]
+    tokens[-1] = tokens[-1].rstrip()
+    for token in tokens:
+        await asyncio.sleep(duration / len(tokens))
+        stream.append(token)
+    return "".join(tokens)
+
+async def execute_task(task, stream=None) -> Tuple[schemas.TaskStatus, Dict[str, Any], float]:
     """
-    Process a task in the background
+    Run a claimed task on its GPU (simulated)
+
+    Args:
+        task: The queue's ClaimedTask snapshot.
+        stream: OutputStream that receives output as it is produced
+            (streaming task types such as text generation).
+
+    Returns:
+        (final status, output_data, cost)
     """
-    try:
-        # Create a new session for this background task
-        db = SessionLocal()
-        
-        # Get the task
-        task = db.query(models.Task).filter(
-            models.Task.id == task_id
-        ).first()
-        
-        if not task:
-            print(f"Task {task_id} not found")
-            return
-        
-        # Update task status to running
-        task.status = schemas.TaskStatus.RUNNING
-        task.started_at = datetime.utcnow()
-        db.commit()
-        
-        # Simulate processing time (1-5 seconds)
-        processing_time = random.uniform(1, 5)
-        time.sleep(processing_time)
-        
-        # Simulate task success/failure (80% success rate)
-        if random.random() < 0.8:  # 80% success rate
-            # Task completed successfully
-            task.status = schemas.TaskStatus.COMPLETED
-            task.output_data = {
-                "result": "Task completed successfully",
-                "processing_time_seconds": round(processing_time, 2),
-                "mock_data": {
-                    "generated_text": "This is a mock response from the AI model. In a real implementation, this would be the actual model output.",
-                    "tokens_generated": random.randint(10, 100),
-                    "inference_time": round(processing_time, 2)
-                }
-            }
-            # Calculate cost based on processing time and GPU rate
-            task.cost = round(task.gpu.price_per_hour * (processing_time / 3600), 6)
-        else:
-            # Task failed
-            task.status = schemas.TaskStatus.FAILED
-            task.output_data = {
-                "error": "Task processing failed",
-                "reason": "Simulated random failure"
+    # Simulate processing time (1-5 seconds) without blocking the event loop
+    processing_time = random.uniform(1, 5)
+    if stream is not None:
+        generated_text = await _generate(stream, processing_time)
+    else:
+        generated_text = MOCK_COMPLETION
+        await asyncio.sleep(processing_time)
+    
+    # Simulate task success/failure (80% success rate)
+    if random.random() < 0.8:
+        output_data = {
+            "result": "Task completed successfully",
+            "processing_time_seconds": round(processing_time, 2),
+            "mock_data": {
+                "generated_text": generated_text,
+                "tokens_generated": random.randint(10, 100) if stream is None else len(generated_text.split(" ")),
+                "inference_time": round(processing_time, 2)
             }
-        
-        # Mark GPU as available again
-        if task.gpu:
-            task.gpu.status = schemas.GPUStatus.AVAILABLE
-        
-        task.completed_at = datetime.utcnow()
-        db.commit()
-        
-        print(f"Task {task_id} processed with status: {task.status}")
-        
-    except Exception as e:
-        print(f"Error processing task {task_id}: {str(e)}")
-        # Try to update task status to failed
-        try:
-            task = db.query(models.Task).filter(
-                models.Task.id == task_id
-            ).first()
-            if task:
-                task.status = schemas.TaskStatus.FAILED
-                task.output_data = {
-                    "error": "Internal server error",
-                    "details": str(e)
-                }
-                if task.gpu:
-                    task.gpu.status = schemas.GPUStatus.AVAILABLE
-                db.commit()
-        except:
-            pass
-    finally:
-        db.close()
+        }
+        # Calculate cost based on processing time and GPU rate
+        cost = round((task.price_per_hour or 0.0) * (processing_time / 3600), 6)
+        return schemas.TaskStatus.COMPLETED, output_data, cost
+    
+    return schemas.TaskStatus.FAILED, {
+        "error": "Task processing failed",
+        "reason": "Simulated random failure"
+    }, 0.0
+
+def streamed_text(output_data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    The text a streaming run emitted for this result (e.g. to replay a cached result)
+    """
+    if not isinstance(output_data, dict):
+        return None
+    return (output_data.get("mock_data") or {}).get("generated_text")
 
 def process_payment(db: Session, payment_id: int):
     """
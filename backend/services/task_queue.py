@@ -0,0 +1,697 @@
+"""
+Durable task queue and worker pool.
+
+The tasks table is the queue: a PENDING row is a queued task. A worker claims
+one with a conditional UPDATE that also takes a lease:
+
+    UPDATE tasks SET status = 'RUNNING', lease_owner = :worker, lease_expires_at = :deadline,
+                     attempts = attempts + 1
+    WHERE id = :id AND (status = 'PENDING' OR (status = 'RUNNING' AND lease expired))
+
+and renews the lease while the task runs. A worker that crashes stops renewing,
+so its tasks become claimable again once their lease lapses. Finishing a task
+is conditional on still holding the lease, so a task that was cancelled or
+recovered by another worker in the meantime is never overwritten.
+
+Cancelling a task that a worker holds a live lease on keeps the lease and
+the GPU: the worker notices at its next renewal, stops the task and releases
+the GPU, and if the worker is gone, the GPU is released once the lease lapses.
+
+Worker pools run as asyncio tasks, inside the API process when
+TASK_WORKERS_EMBEDDED is set and in dedicated processes started with
+`python -m backend.worker`; request handlers only insert rows and never wait
+for task execution.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import and_, bindparam, case, or_, select, update
+
+from .. import models
+from ..core.config import settings
+from ..core.utils import percentile
+from ..database import AsyncSessionLocal
+from ..models.task import TaskPriority, TaskStatus, TaskType
+from .dispatcher import FairShareLane
+from .scheduler import PLACEMENT_POLICIES, scheduler
+from .blob_store import load_payload, spill_payload
+from .task_events import record_task_events
+from .task_output import STREAMING_TASK_TYPES, task_output
+from .task_processor import execute_task
+
+logger = logging.getLogger(__name__)
+
+_tasks = models.Task.__table__
+_gpus = models.GPU.__table__
+
+
+class ClaimedTask(NamedTuple):
+    id: int
+    requester_id: int
+    task_type: TaskType
+    priority: TaskPriority
+    input_data: Optional[Dict[str, Any]]
+    gpu_id: Optional[int]
+    price_per_hour: Optional[float]
+    attempts: int
+    created_at: Optional[datetime]
+
+
+_CANDIDATE_COLUMNS = (_tasks.c.id, _tasks.c.status, _tasks.c.attempts)
+
+# Queue-wait samples kept per (task type, priority) class
+_WAIT_SAMPLES = 1000
+
+
+def _lease_expired(now: datetime):
+    return and_(
+        _tasks.c.status == TaskStatus.RUNNING,
+        or_(_tasks.c.lease_expires_at.is_(None), _tasks.c.lease_expires_at < now)
+    )
+
+
+def _lease_deadline(now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.TASK_LEASE_SECONDS)
+
+
+class TaskQueue:
+    """
+    Claims, renews and finishes leased tasks.
+
+    Tasks claimed by pools in this process are remembered so local workers skip
+    them instead of racing each other for the same row.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._claimed: Set[int] = set()
+        self._pools: List["WorkerPool"] = []
+        self._lanes: Dict[TaskType, FairShareLane] = {task_type: FairShareLane(task_type) for task_type in TaskType}
+        self._waits: Dict[str, Deque[float]] = {}
+        self.claims = 0
+        self.recovered = 0
+        self.completed = 0
+        self.failed = 0
+        self.lost_leases = 0
+        self.abandoned = 0
+        self._swept_at = 0.0
+
+    def notify(self) -> None:
+        """Wake idle workers in this process (e.g. after tasks were queued)"""
+        for lane in self._lanes.values():
+            lane.drained_at = 0.0
+        for pool in list(self._pools):
+            pool.notify()
+
+    async def claim_next(self, worker_id: str, task_type: TaskType) -> Optional[ClaimedTask]:
+        """
+        Lease the next runnable task of `task_type` to `worker_id`.
+
+        Tasks whose lease expired are recovered first; new tasks are then taken
+        in fair-share order across requesters and priorities.
+
+        Returns:
+            The claimed task, or None if nothing is runnable.
+        """
+        lane = self._lanes[task_type]
+        if lane.drained_at and time.monotonic() - lane.drained_at < settings.TASK_POLL_INTERVAL_SECONDS:
+            return None
+        batch = max(settings.TASK_WORKER_CONCURRENCY, 1) * 2
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            if time.monotonic() - self._swept_at >= settings.TASK_POLL_INTERVAL_SECONDS:
+                # GPUs of cancelled tasks whose worker went away without acknowledging
+                self._swept_at = time.monotonic()
+                if await self._end_cancelled(db, _tasks.c.lease_expires_at < now):
+                    await db.commit()
+            expired = await db.execute(
+                select(*_CANDIDATE_COLUMNS)
+                .where(_lease_expired(now), _tasks.c.task_type == task_type)
+                .order_by(_tasks.c.lease_expires_at).limit(batch)
+            )
+            claimed = await self._claim_first(db, expired.all(), worker_id)
+            if claimed is None:
+                claimed = await self._dispatch(db, lane, worker_id, batch)
+        if claimed is None:
+            lane.drained_at = time.monotonic()
+        return claimed
+
+    async def _dispatch(self, db, lane: FairShareLane, worker_id: str, batch: int) -> Optional[ClaimedTask]:
+        pending = and_(_tasks.c.status == TaskStatus.PENDING, _tasks.c.task_type == lane.task_type)
+        if not len(lane) or time.monotonic() - lane.refreshed_at >= settings.TASK_POLL_INTERVAL_SECONDS:
+            flows = await db.execute(
+                select(_tasks.c.requester_id, _tasks.c.priority).where(pending).distinct()
+            )
+            lane.sync(tuple(flow) for flow in flows.all())
+
+        for flow in lane.order():
+            requester_id, priority = flow
+            result = await db.execute(
+                select(*_CANDIDATE_COLUMNS)
+                .where(pending, _tasks.c.requester_id == requester_id, _tasks.c.priority == priority)
+                .order_by(_tasks.c.id).limit(batch)
+            )
+            candidates = result.all()
+            if not candidates:
+                lane.drop(flow)
+                continue
+            claimed = await self._claim_first(db, candidates, worker_id)
+            if claimed is not None:
+                lane.charge(flow)
+                self._record_wait(claimed)
+                return claimed
+            # Every candidate was taken concurrently; let the next flow go
+        return None
+
+    async def _claim_first(self, db, candidates, worker_id: str) -> Optional[ClaimedTask]:
+        for task_id, task_status, attempts in candidates:
+            with self._lock:
+                if task_id in self._claimed:
+                    continue
+                self._claimed.add(task_id)
+            claimed = None
+            try:
+                recovering = task_status == TaskStatus.RUNNING
+                if recovering and attempts >= settings.TASK_MAX_ATTEMPTS:
+                    await self._abandon(db, task_id, attempts)
+                    continue
+                claimed = await self._claim(db, task_id, worker_id)
+            finally:
+                if claimed is None:
+                    self.forget(task_id)
+            if claimed is not None:
+                with self._lock:
+                    self.claims += 1
+                    if recovering:
+                        self.recovered += 1
+                if recovering:
+                    logger.info("Recovered task %s after an expired lease (attempt %s)", task_id, claimed.attempts)
+                return claimed
+        return None
+
+    def _record_wait(self, task: ClaimedTask) -> None:
+        created_at = task.created_at
+        if created_at is None:
+            return
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        waited = max((datetime.utcnow() - created_at).total_seconds(), 0.0)
+        key = f"{task.task_type.value}/{task.priority.value}"
+        with self._lock:
+            samples = self._waits.get(key)
+            if samples is None:
+                samples = self._waits[key] = deque(maxlen=_WAIT_SAMPLES)
+            samples.append(waited)
+
+    async def _claim(self, db, task_id: int, worker_id: str) -> Optional[ClaimedTask]:
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(_tasks)
+            .where(
+                _tasks.c.id == task_id,
+                or_(_tasks.c.status == TaskStatus.PENDING, _lease_expired(now))
+            )
+            .values(
+                status=TaskStatus.RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=_lease_deadline(now),
+                attempts=_tasks.c.attempts + 1,
+                started_at=now
+            )
+        )
+        if result.rowcount != 1:
+            # Claimed elsewhere or cancelled since the candidate scan
+            await db.rollback()
+            return None
+        row = (await db.execute(
+            select(
+                _tasks.c.id, _tasks.c.requester_id, _tasks.c.task_type, _tasks.c.priority,
+                _tasks.c.input_data, _tasks.c.gpu_id, _gpus.c.price_per_hour, _tasks.c.attempts,
+                _tasks.c.created_at
+            )
+            .select_from(_tasks.outerjoin(_gpus, _gpus.c.id == _tasks.c.gpu_id))
+            .where(_tasks.c.id == task_id)
+        )).one()
+        await record_task_events(db, [(task_id, row.requester_id, TaskStatus.RUNNING)])
+        await db.commit()
+        return ClaimedTask(*row)
+
+    async def _abandon(self, db, task_id: int, attempts: int) -> None:
+        # A task that keeps taking its worker down is failed instead of retried forever
+        now = datetime.utcnow()
+        result = await db.execute(
+            update(_tasks)
+            .where(_tasks.c.id == task_id, _lease_expired(now))
+            .values(
+                status=TaskStatus.FAILED,
+                output_data={
+                    "error": "Task processing failed",
+                    "reason": f"Worker lease expired {attempts} times"
+                },
+                completed_at=now,
+                lease_owner=None,
+                lease_expires_at=None
+            )
+            .returning(_tasks.c.gpu_id, _tasks.c.requester_id)
+        )
+        row = result.first()
+        if row is None:
+            await db.rollback()
+            return
+        if row.gpu_id is not None:
+            await scheduler.release(db, row.gpu_id)
+        await record_task_events(db, [(task_id, row.requester_id, TaskStatus.FAILED)])
+        await db.commit()
+        with self._lock:
+            self.abandoned += 1
+        logger.warning("Task %s failed after %s expired leases", task_id, attempts)
+
+    async def _end_cancelled(self, db, condition) -> int:
+        # Drop the leases of cancelled tasks matching `condition` and free their GPUs
+        result = await db.execute(
+            update(_tasks)
+            .where(_tasks.c.status == TaskStatus.CANCELLED, _tasks.c.lease_owner.is_not(None), condition)
+            .values(lease_owner=None, lease_expires_at=None)
+            .returning(_tasks.c.gpu_id)
+        )
+        gpu_ids = result.scalars().all()
+        for gpu_id in gpu_ids:
+            if gpu_id is not None:
+                await scheduler.release(db, gpu_id)
+        return len(gpu_ids)
+
+    async def cancel(self, db, task_id: int, requester_id: int) -> bool:
+        """
+        Cancel a queued or running task within the session's transaction.
+
+        A task running under a live lease keeps its GPU until the worker
+        acknowledges the cancellation or the lease lapses; otherwise the GPU is
+        released now.
+
+        Returns:
+            False if the task is no longer queued or running.
+        """
+        now = datetime.utcnow()
+        mine = and_(_tasks.c.id == task_id, _tasks.c.requester_id == requester_id)
+        row = (await db.execute(
+            update(_tasks)
+            .where(mine, or_(_tasks.c.status == TaskStatus.PENDING, _lease_expired(now)))
+            .values(status=TaskStatus.CANCELLED, updated_at=now, lease_owner=None, lease_expires_at=None)
+            .returning(_tasks.c.gpu_id)
+        )).first()
+        if row is not None:
+            if row.gpu_id is not None:
+                await scheduler.release(db, row.gpu_id)
+        else:
+            running = await db.execute(
+                update(_tasks)
+                .where(mine, _tasks.c.status == TaskStatus.RUNNING)
+                .values(status=TaskStatus.CANCELLED, updated_at=now)
+            )
+            if running.rowcount != 1:
+                return False
+        await record_task_events(db, [(task_id, requester_id, TaskStatus.CANCELLED)])
+        return True
+
+    async def acknowledge_cancel(self, task: ClaimedTask, worker_id: str) -> bool:
+        """
+        Free the GPU of a task cancelled while `worker_id` was running it.
+
+        Returns:
+            True if the task was cancelled under this worker's lease.
+        """
+        async with AsyncSessionLocal() as db:
+            released = await self._end_cancelled(
+                db, and_(_tasks.c.id == task.id, _tasks.c.lease_owner == worker_id)
+            )
+            await db.commit()
+        return released > 0
+
+    async def renew(self, task_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease on a running task.
+
+        Returns:
+            False if the worker no longer holds the task (cancelled or recovered elsewhere).
+        """
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(_tasks)
+                .where(
+                    _tasks.c.id == task_id,
+                    _tasks.c.lease_owner == worker_id,
+                    _tasks.c.status == TaskStatus.RUNNING
+                )
+                .values(lease_expires_at=_lease_deadline(now))
+            )
+            await db.commit()
+        if result.rowcount != 1:
+            with self._lock:
+                self.lost_leases += 1
+            return False
+        return True
+
+    async def finish(
+        self,
+        task: ClaimedTask,
+        worker_id: str,
+        task_status: str,
+        output_data: Dict[str, Any],
+        cost: float
+    ) -> bool:
+        """
+        Record the task's result and free its GPU, if the worker still holds the lease.
+
+        Returns:
+            True if the result was recorded.
+        """
+        task_status = TaskStatus(task_status)
+        # A large result goes to the blob store; the row keeps a reference
+        output_data = await spill_payload(output_data)
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(_tasks)
+                .where(
+                    _tasks.c.id == task.id,
+                    _tasks.c.lease_owner == worker_id,
+                    _tasks.c.status == TaskStatus.RUNNING
+                )
+                .values(
+                    status=task_status,
+                    output_data=output_data,
+                    cost=cost,
+                    completed_at=now,
+                    lease_owner=None,
+                    lease_expires_at=None
+                )
+            )
+            if result.rowcount != 1:
+                await db.rollback()
+                with self._lock:
+                    self.lost_leases += 1
+                # Cancelled while it ran; the result is dropped but the GPU is ours to free
+                if await self._end_cancelled(
+                    db, and_(_tasks.c.id == task.id, _tasks.c.lease_owner == worker_id)
+                ):
+                    await db.commit()
+                return False
+            if task.gpu_id is not None:
+                await scheduler.release(db, task.gpu_id)
+            await record_task_events(db, [(task.id, task.requester_id, task_status)])
+            await db.commit()
+        with self._lock:
+            if task_status == TaskStatus.COMPLETED:
+                self.completed += 1
+            else:
+                self.failed += 1
+        logger.info("Task %s processed with status: %s", task.id, task_status.value)
+        return True
+
+    async def release_leases(self, worker_id: str) -> int:
+        """
+        Put tasks still leased to `worker_id` back in the queue (graceful shutdown).
+
+        Returns:
+            The number of tasks requeued.
+        """
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(_tasks)
+                .where(
+                    _tasks.c.lease_owner == worker_id,
+                    _tasks.c.status == TaskStatus.RUNNING
+                )
+                .values(
+                    status=TaskStatus.PENDING,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    attempts=_tasks.c.attempts - 1,  # An interrupted run is not a failed attempt
+                    started_at=None
+                )
+                .returning(_tasks.c.id, _tasks.c.requester_id)
+            )
+            requeued = result.all()
+            await record_task_events(
+                db, [(task_id, requester_id, TaskStatus.PENDING) for task_id, requester_id in requeued]
+            )
+            await db.commit()
+        return len(requeued)
+
+    async def requeue_from_gpus(self, db, gpu_ids: List[int]) -> Tuple[int, int]:
+        """
+        Move the unfinished tasks of GPUs that went offline to other GPUs, within the session's transaction.
+
+        Queued and running tasks are placed again with the default policy and
+        go back to PENDING. A running task loses its lease, so whatever its
+        worker reports later is discarded, and the interrupted run does not
+        count as an attempt. Tasks no GPU can be found for fail.
+
+        Returns:
+            The number of tasks requeued and failed.
+        """
+        result = await db.execute(
+            update(_tasks)
+            .where(
+                _tasks.c.gpu_id.in_(gpu_ids),
+                _tasks.c.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
+            )
+            .values(
+                status=TaskStatus.PENDING,
+                gpu_id=None,
+                lease_owner=None,
+                lease_expires_at=None,
+                attempts=case(
+                    (_tasks.c.status == TaskStatus.RUNNING, _tasks.c.attempts - 1),
+                    else_=_tasks.c.attempts
+                ),
+                started_at=None
+            )
+            .returning(_tasks.c.id, _tasks.c.requester_id)
+        )
+        orphans = result.all()
+        if not orphans:
+            return 0, 0
+
+        placed = await scheduler.allocate_many(
+            db, PLACEMENT_POLICIES[settings.SCHEDULER_DEFAULT_POLICY], len(orphans)
+        )
+        requeued = orphans[:len(placed)]
+        if requeued:
+            await db.execute(
+                update(_tasks).where(_tasks.c.id == bindparam("task_id")).values(gpu_id=bindparam("new_gpu_id")),
+                [{"task_id": task_id, "new_gpu_id": gpu_id} for (task_id, _), gpu_id in zip(requeued, placed)]
+            )
+        failed = orphans[len(placed):]
+        if failed:
+            await db.execute(
+                update(_tasks)
+                .where(_tasks.c.id.in_([task_id for task_id, _ in failed]))
+                .values(
+                    status=TaskStatus.FAILED,
+                    output_data={
+                        "error": "Task processing failed",
+                        "reason": "Its GPU went offline and no other GPU was available"
+                    },
+                    completed_at=datetime.utcnow()
+                )
+            )
+        await record_task_events(
+            db,
+            [(task_id, requester_id, TaskStatus.PENDING) for task_id, requester_id in requeued]
+            + [(task_id, requester_id, TaskStatus.FAILED) for task_id, requester_id in failed]
+        )
+        with self._lock:
+            self.failed += len(failed)
+        return len(requeued), len(failed)
+
+    def forget(self, task_id: int) -> None:
+        with self._lock:
+            self._claimed.discard(task_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "claims": self.claims,
+                "recovered": self.recovered,
+                "completed": self.completed,
+                "failed": self.failed,
+                "lost_leases": self.lost_leases,
+                "abandoned": self.abandoned,
+                "in_flight": len(self._claimed),
+            }
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Queue counters, fair-share lanes and queue-wait percentiles (seconds) per class
+        """
+        with self._lock:
+            waits = {key: list(samples) for key, samples in self._waits.items()}
+        return {
+            "counters": self.stats(),
+            "lanes": {task_type.value: lane.stats() for task_type, lane in self._lanes.items()},
+            "queue_wait": {
+                key: {
+                    "count": len(values),
+                    "p50_s": round(percentile(values, 0.50), 3),
+                    "p95_s": round(percentile(values, 0.95), 3),
+                    "p99_s": round(percentile(values, 0.99), 3),
+                }
+                for key, values in sorted(waits.items())
+            },
+        }
+
+
+task_queue = TaskQueue()
+
+
+class WorkerPool:
+    """
+    Runs tasks from the shared queue, with separate workers per task type.
+
+    Each task type gets `concurrency` workers (or its TASK_TYPE_CONCURRENCY
+    override), so long training runs cannot occupy the slots of short
+    inference jobs. Each pool has its own lease owner id; several pools (in
+    this process or others) can work the same queue.
+    """
+
+    def __init__(
+        self,
+        queue: TaskQueue = task_queue,
+        concurrency: Optional[int] = None,
+        task_types: Optional[Iterable[TaskType]] = None
+    ):
+        self.queue = queue
+        overrides = settings.task_type_concurrency
+        self.concurrency: Dict[TaskType, int] = {
+            task_type: max(concurrency or overrides.get(task_type.value, settings.TASK_WORKER_CONCURRENCY), 0)
+            for task_type in (task_types or TaskType)
+        }
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        """Start the worker coroutines on the running event loop"""
+        if self._workers:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work(task_type))
+            for task_type, slots in self.concurrency.items()
+            for _ in range(slots)
+        ]
+        self.queue._pools.append(self)
+        logger.info(
+            "Task worker pool %s started with %s", self.worker_id,
+            ", ".join(f"{task_type.value}={slots}" for task_type, slots in self.concurrency.items())
+        )
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop the workers and requeue the tasks they were running"""
+        if not self._workers:
+            return
+        self._stopping = True
+        if self in self.queue._pools:
+            self.queue._pools.remove(self)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        try:
+            requeued = await self.queue.release_leases(self.worker_id)
+        except Exception:
+            # The leases expire on their own and the tasks are recovered then
+            logger.exception("Could not requeue tasks held by %s", self.worker_id)
+            return
+        if requeued:
+            logger.info("Requeued %d interrupted tasks from %s", requeued, self.worker_id)
+
+    async def _work(self, task_type: TaskType) -> None:
+        while not self._stopping:
+            try:
+                task = await self.queue.claim_next(self.worker_id, task_type)
+            except Exception:
+                logger.exception("Task claim failed")
+                task = None
+            if task is None:
+                await self._idle()
+                continue
+            try:
+                await self._run(task)
+            finally:
+                self.queue.forget(task.id)
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), settings.TASK_POLL_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _execute(self, task: ClaimedTask):
+        # Spilled inputs are read back here so a missing blob fails the task, not the worker
+        task = task._replace(input_data=await load_payload(task.input_data))
+        if task.task_type not in STREAMING_TASK_TYPES:
+            return await execute_task(task)
+        stream = await task_output.open(task.id, task.attempts, task.created_at)
+        try:
+            return await execute_task(task, stream)
+        finally:
+            # Persisted before finish() commits the final status readers wait for
+            await task_output.close(stream)
+
+    async def _run(self, task: ClaimedTask) -> None:
+        execution = asyncio.create_task(self._execute(task))
+        renew_every = max(settings.TASK_LEASE_SECONDS / 3, 0.1)
+        try:
+            while True:
+                done, _ = await asyncio.wait({execution}, timeout=renew_every)
+                if done:
+                    break
+                try:
+                    held = await self.queue.renew(task.id, self.worker_id)
+                except Exception:
+                    # Retry on the next beat; the lease still has time left
+                    logger.exception("Could not renew lease on task %s", task.id)
+                    continue
+                if not held:
+                    logger.info("Task %s is no longer leased to %s; stopping it", task.id, self.worker_id)
+                    execution.cancel()
+                    try:
+                        await self.queue.acknowledge_cancel(task, self.worker_id)
+                    except Exception:
+                        # Released by the sweep once the lease lapses
+                        logger.exception("Could not release the GPU of cancelled task %s", task.id)
+                    return
+        except asyncio.CancelledError:
+            execution.cancel()
+            raise
+
+        try:
+            task_status, output_data, cost = execution.result()
+        except Exception as e:
+            logger.exception("Error processing task %s", task.id)
+            task_status = TaskStatus.FAILED
+            output_data = {"error": "Internal server error", "details": str(e)}
+            cost = 0.0
+        try:
+            await self.queue.finish(task, self.worker_id, task_status, output_data, cost)
+        except Exception:
+            # Left RUNNING; recovered when its lease expires
+            logger.exception("Could not record the result of task %s", task.id)
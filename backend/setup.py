@@ -7,7 +7,8 @@ setup(
     install_requires=[
         'fastapi>=0.68.0',
         'uvicorn>=0.15.0',
-        'sqlalchemy>=1.4.0',
+        'sqlalchemy>=2.0.0',
+        'aiosqlite>=0.19.0',
         'pydantic>=1.8.0',
         'python-jose[cryptography]>=3.3.0',
         'passlib[bcrypt]>=1.7.4',
@@ -1,117 +1,195 @@
 """
 Utility module for detecting and querying NVIDIA GPUs using NVML.
+
+The readers take the NVML binding as an argument: the API serves snapshots
+from the long-lived sampler in services.gpu_telemetry, which shares them, and
+any module with pynvml's interface (e.g. a fake one on machines without GPUs)
+can stand in for pynvml.
 """
-import pynvml
-from typing import List, Dict, Any, Optional
+import importlib
+from types import ModuleType
+from typing import Iterable, List, Dict, Any, Optional
 import logging
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
-def get_system_gpus() -> List[Dict[str, Any]]:
+def load_nvml(module_name: str = "pynvml") -> ModuleType:
+    """Import the NVML binding by module path"""
+    return importlib.import_module(module_name)
+
+def _text(value) -> str:
+    # pynvml returns bytes or str depending on its version
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+def read_driver_version(nvml) -> str:
+    try:
+        return _text(nvml.nvmlSystemGetDriverVersion())
+    except nvml.NVMLError:
+        return "Unknown"
+
+def read_device_info(nvml, handle) -> Dict[str, Any]:
+    """
+    Properties of a device that do not change while it is attached.
+    """
+    mem_info = nvml.nvmlDeviceGetMemoryInfo(handle)
+    return {
+        'name': _text(nvml.nvmlDeviceGetName(handle)),
+        'uuid': _text(nvml.nvmlDeviceGetUUID(handle)),
+        'memory_total_gb': round(mem_info.total / (1024 ** 3), 2),
+    }
+
+def _read_memory(nvml, handle) -> Dict[str, Any]:
+    mem_info = nvml.nvmlDeviceGetMemoryInfo(handle)
+    return {
+        'memory_used_gb': round(mem_info.used / (1024 ** 3), 2),
+        'memory_free_gb': round(mem_info.free / (1024 ** 3), 2),
+    }
+
+def _read_utilization(nvml, handle) -> Dict[str, Any]:
+    util = nvml.nvmlDeviceGetUtilizationRates(handle)
+    return {'utilization_gpu': util.gpu, 'utilization_memory': util.memory}
+
+def _read_temperature(nvml, handle) -> Dict[str, Any]:
+    try:
+        temp = nvml.nvmlDeviceGetTemperature(handle, nvml.NVML_TEMPERATURE_GPU)
+    except nvml.NVMLError:
+        temp = None
+    return {'temperature_c': temp}
+
+def _read_power(nvml, handle) -> Dict[str, Any]:
+    try:
+        power_usage = nvml.nvmlDeviceGetPowerUsage(handle) / 1000.0  # Convert to Watts
+        power_limit = nvml.nvmlDeviceGetEnforcedPowerLimit(handle) / 1000.0  # Convert to Watts
+    except nvml.NVMLError:
+        power_usage = None
+        power_limit = None
+    return {'power_usage_w': power_usage, 'power_limit_w': power_limit}
+
+# Metric groups, each read with its own NVML calls, and the fields they return
+METRIC_GROUPS = {
+    'memory': (_read_memory, ('memory_used_gb', 'memory_free_gb')),
+    'utilization': (_read_utilization, ('utilization_gpu', 'utilization_memory')),
+    'temperature': (_read_temperature, ('temperature_c',)),
+    'power': (_read_power, ('power_usage_w', 'power_limit_w')),
+}
+
+def resolve_metric_groups(fields: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Metric groups needed for the requested group or field names (all when None).
+
+    Raises:
+        ValueError: A name is neither a group nor a field.
+    """
+    if fields is None:
+        return list(METRIC_GROUPS)
+    groups = []
+    for field in fields:
+        for group, (_, group_fields) in METRIC_GROUPS.items():
+            if field == group or field in group_fields:
+                if group not in groups:
+                    groups.append(group)
+                break
+        else:
+            raise ValueError(f"Unknown GPU metric: {field}")
+    return groups
+
+def read_device_metrics(nvml, handle, groups: Iterable[str]) -> Dict[str, Any]:
+    """
+    Read only the given metric groups of a device; costs one or two NVML calls per group.
+    """
+    metrics: Dict[str, Any] = {}
+    for group in groups:
+        metrics.update(METRIC_GROUPS[group][0](nvml, handle))
+    return metrics
+
+def read_device_sample(nvml, handle) -> Dict[str, Any]:
+    """
+    Current memory use, utilization, temperature and power of a device.
+    """
+    return read_device_metrics(nvml, handle, METRIC_GROUPS)
+
+def get_system_gpus(nvml=None) -> List[Dict[str, Any]]:
     """
     Get a list of all NVIDIA GPUs in the system with their details.
-    
+
+    Opens and closes an NVML session per call, so it suits scripts and
+    one-off checks; the API reads services.gpu_telemetry instead.
+
     Returns:
         List[Dict[str, Any]]: A list of dictionaries containing GPU information.
     """
     gpus = []
-    
+
     try:
-        # Initialize NVML
-        pynvml.nvmlInit()
-        
-        # Get number of GPUs
-        device_count = pynvml.nvmlDeviceGetCount()
-        
-        for i in range(device_count):
+        nvml = nvml or load_nvml()
+        nvml.nvmlInit()
+    except Exception as e:
+        logger.error(f"NVML Error: {str(e)}")
+        raise RuntimeError(f"Failed to initialize NVML: {str(e)}")
+
+    try:
+        driver_version = read_driver_version(nvml)
+        for i in range(nvml.nvmlDeviceGetCount()):
             try:
-                handle = pynvml.nvmlDeviceGetHandleByIndex(i)
-                
-                # Get basic GPU info
-                name = pynvml.nvmlDeviceGetName(handle).decode('utf-8')
-                uuid = pynvml.nvmlDeviceGetUUID(handle).decode('utf-8')
-                
-                # Get memory info
-                mem_info = pynvml.nvmlDeviceGetMemoryInfo(handle)
-                total_memory_gb = round(mem_info.total / (1024 ** 3), 2)
-                
-                # Get utilization rates
-                util = pynvml.nvmlDeviceGetUtilizationRates(handle)
-                
-                # Get temperature
-                try:
-                    temp = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-                except pynvml.NVMLError:
-                    temp = None
-                
-                # Get power usage
-                try:
-                    power_usage = pynvml.nvmlDeviceGetPowerUsage(handle) / 1000.0  # Convert to Watts
-                    power_limit = pynvml.nvmlDeviceGetEnforcedPowerLimit(handle) / 1000.0  # Convert to Watts
-                except pynvml.NVMLError:
-                    power_usage = None
-                    power_limit = None
-                
-                # Get driver version
-                try:
-                    driver_version = pynvml.nvmlSystemGetDriverVersion().decode('utf-8')
-                except pynvml.NVMLError:
-                    driver_version = "Unknown"
-                
-                gpu_info = {
+                handle = nvml.nvmlDeviceGetHandleByIndex(i)
+                gpus.append({
                     'index': i,
-                    'name': name,
-                    'uuid': uuid,
-                    'memory_total_gb': total_memory_gb,
-                    'memory_used_gb': round(mem_info.used / (1024 ** 3), 2),
-                    'memory_free_gb': round(mem_info.free / (1024 ** 3), 2),
-                    'utilization_gpu': util.gpu,
-                    'utilization_memory': util.memory,
-                    'temperature_c': temp,
-                    'power_usage_w': power_usage,
-                    'power_limit_w': power_limit,
+                    **read_device_info(nvml, handle),
+                    **read_device_sample(nvml, handle),
                     'driver_version': driver_version,
                     'status': 'available'  # Default status
-                }
-                
-                gpus.append(gpu_info)
-                
-            except pynvml.NVMLError as e:
+                })
+            except nvml.NVMLError as e:
                 logger.error(f"Error getting info for GPU {i}: {str(e)}")
                 continue
-        
-    except pynvml.NVMLError as e:
-        logger.error(f"NVML Error: {str(e)}")
-        raise RuntimeError(f"Failed to initialize NVML: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error getting GPU info: {str(e)}")
         raise RuntimeError(f"Failed to get GPU information: {str(e)}")
     finally:
         # Always try to shut down NVML
         try:
-            pynvml.nvmlShutdown()
-        except:
+            nvml.nvmlShutdown()
+        except Exception:
             pass
-    
+
     return gpus
 
-def get_gpu_by_uuid(uuid: str) -> Optional[Dict[str, Any]]:
+def get_gpu_by_uuid(uuid: str, fields: Optional[Iterable[str]] = None, nvml=None) -> Optional[Dict[str, Any]]:
     """
     Get information about a specific GPU by its UUID.
-    
+
+    Resolves the handle directly instead of enumerating every device, and
+    reads only the requested metrics.
+
     Args:
         uuid: The UUID of the GPU to find.
-        
+        fields: Metric groups or field names to read (see METRIC_GROUPS); all when None.
+
     Returns:
         Optional[Dict[str, Any]]: The GPU information if found, None otherwise.
     """
+    groups = resolve_metric_groups(fields)
     try:
-        gpus = get_system_gpus()
-        for gpu in gpus:
-            if gpu['uuid'] == uuid:
-                return gpu
-        return None
+        nvml = nvml or load_nvml()
+        nvml.nvmlInit()
     except Exception as e:
         logger.error(f"Error getting GPU by UUID {uuid}: {str(e)}")
         return None
+    try:
+        handle = nvml.nvmlDeviceGetHandleByUUID(uuid)
+        return {
+            'index': nvml.nvmlDeviceGetIndex(handle),
+            **read_device_info(nvml, handle),
+            **read_device_metrics(nvml, handle, groups),
+            'driver_version': read_driver_version(nvml),
+            'status': 'available'
+        }
+    except nvml.NVMLError as e:
+        logger.debug(f"GPU {uuid} not found: {str(e)}")
+        return None
+    finally:
+        try:
+            nvml.nvmlShutdown()
+        except Exception:
+            pass
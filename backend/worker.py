@@ -0,0 +1,62 @@
+"""
+Standalone task worker.
+
+    python -m backend.worker --concurrency 8
+    python -m backend.worker --task-types model_training --concurrency 1
+
+Runs a worker pool against the shared database until SIGINT/SIGTERM. Start as
+many processes as the workload needs; they coordinate through task leases.
+Restricting a process to some task types scales those lanes independently.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from typing import List, Optional
+
+from backend.database import async_engine
+from backend.models.task import TaskType
+from backend.services.task_output import task_output
+from backend.services.task_queue import WorkerPool, task_queue
+
+
+async def run(concurrency: Optional[int], task_types: Optional[List[TaskType]]) -> None:
+    pool = WorkerPool(task_queue, concurrency=concurrency, task_types=task_types)
+    pool.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    # Interrupted tasks go back to the queue instead of waiting out their leases
+    await pool.stop()
+    await task_output.stop()
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run Orbyte task workers")
+    parser.add_argument(
+        "--concurrency", type=int, default=None,
+        help="Tasks of each type this process runs at once (default: TASK_WORKER_CONCURRENCY "
+             "with TASK_TYPE_CONCURRENCY overrides)"
+    )
+    parser.add_argument(
+        "--task-types", default=None,
+        help=f"Comma-separated task types to run (default: all of {', '.join(t.value for t in TaskType)})"
+    )
+    args = parser.parse_args()
+    task_types = None
+    if args.task_types:
+        try:
+            task_types = [TaskType(value.strip().lower()) for value in args.task_types.split(",") if value.strip()]
+        except ValueError as e:
+            parser.error(str(e))
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run(args.concurrency, task_types))
+
+
+if __name__ == "__main__":
+    main()